@@ -0,0 +1,83 @@
+"""Startup time benchmark of the GUI.
+
+Starts the tool in fresh interpreters and measures the time until the main window is shown, split into importing the
+entry point, creating the themed QApplication and building the main window. It also checks that the modules kept out
+of startup (paramiko, psutil, QtCharts, PyYAML) are still not imported, one stray import costs more than the rest.
+
+    python benchmarks/startup_time.py --runs 10
+    python benchmarks/startup_time.py --max-ms 1500   # Exit code 1 when the median is slower, for CI
+
+Runs with the offscreen Qt platform unless --platform is given, so it works without a display.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded when a test runs or a tab is opened, never while starting up
+LAZY_MODULES = ("paramiko", "psutil", "PySide6.QtCharts", "yaml")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import sftp_test_tool.cli
+imported = time.perf_counter()
+from sftp_test_tool.gui.app import create_application
+from sftp_test_tool.gui.main_window import MainWindow
+app = create_application()
+application = time.perf_counter()
+window = MainWindow()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "application_ms": (application - imported) * 1000,
+                  "window_ms": (shown - application) * 1000, "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def measure(platform):
+    """Runs one startup in a new interpreter, returns its timings including the interpreter start."""
+    env = dict(os.environ, QT_QPA_PLATFORM=platform)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD % (LAZY_MODULES,)], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures how long the GUI takes to start.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of startups, the first one warms the disk cache")
+    parser.add_argument("--platform", default="offscreen", help="Qt platform plugin (default: offscreen)")
+    parser.add_argument("--max-ms", type=float, help="Fail when the median time to the shown window is slower")
+    args = parser.parse_args()
+
+    measure(args.platform)  # Warm-up, not counted
+    runs = [measure(args.platform) for _ in range(args.runs)]
+
+    for key, label in (("import_ms", "Import entry point"), ("application_ms", "Create themed QApplication"),
+                       ("window_ms", "Build and show main window"), ("process_ms", "Whole process incl. interpreter")):
+        values = [run[key] for run in runs]
+        print(f"{label:<32} median {statistics.median(values):7.1f} ms, min {min(values):7.1f} ms, max {max(values):7.1f} ms")
+    startup = statistics.median(run["import_ms"] + run["application_ms"] + run["window_ms"] for run in runs)
+    print(f"{'Time to shown window':<32} median {startup:7.1f} ms")
+
+    failed = False
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    if loaded:
+        print(f"FAIL: imported at startup although they should load lazily: {', '.join(loaded)}")
+        failed = True
+    if args.max_ms is not None and startup > args.max_ms:
+        print(f"FAIL: startup took {startup:.1f} ms, the budget is {args.max_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
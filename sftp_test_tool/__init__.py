@@ -0,0 +1,8 @@
+"""SFTP Stress Test Tool.
+
+settings: connection defaults from _internal/env/.env
+engine: test plans and the benchmark workers of every test mode (imports paramiko)
+metrics: latency statistics, live metrics, host monitoring and the self-profiler
+gui: the PySide6 main window
+cli: command line entry point
+"""
@@ -0,0 +1,191 @@
+"""Command line entry point, starts the GUI when no command is given.
+
+Only the modules a command needs are imported, so the GUI does not load the test engine and the commands do not load
+the GUI.
+"""
+import argparse
+import faulthandler
+import os
+import sys
+import time
+
+from .settings import SFTP_DIRECTORY, SFTP_HOST, SFTP_PASS, SFTP_PORT, SFTP_USER
+
+
+def run_headless(worker):
+    """Runs a worker thread without the GUI, printing its log to stdout."""
+    from PySide6.QtCore import QCoreApplication
+    
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    worker.log_signal.connect(print)
+    worker.finished.connect(app.quit)
+    worker.start()
+    app.exec()
+    worker.wait()
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="SFTP Stress Test Tool. Starts the GUI when no command is given.")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    cleanup_parser = subparsers.add_parser("cleanup", help="Delete leftover stress test files from a remote directory")
+    cleanup_parser.add_argument("--host", default=SFTP_HOST, help="SFTP host address (default: GEIS_HOST from .env)")
+    cleanup_parser.add_argument("--port", type=int, default=SFTP_PORT)
+    cleanup_parser.add_argument("--directory", default=SFTP_DIRECTORY)
+    cleanup_parser.add_argument("--username", default=SFTP_USER, help="default: GEIS_USER from .env")
+    cleanup_parser.add_argument("--password", default=SFTP_PASS, help="default: GEIS_PASSWORD from .env")
+    cleanup_parser.add_argument("--sessions", type=int, default=10, help="Parallel SFTP sessions used for deleting")
+    cleanup_parser.add_argument("--pattern", help="Glob pattern of file names to delete (default: every file a test uploaded)")
+    
+    run_parser = subparsers.add_parser("run", help="Run a test plan without the GUI")
+    run_parser.add_argument("--plan", required=True, help="Path to a JSON or YAML test plan")
+    run_parser.add_argument("--metrics-port", type=int, help="Serve live Prometheus metrics on this port during the run")
+    run_parser.add_argument("--metrics-address", default="127.0.0.1", help="Bind address of the metrics endpoint (default: 127.0.0.1)")
+    run_parser.add_argument("--profile", action="store_true", help="Profile the tool's own threads and write flamegraph profiles to results/")
+    run_parser.add_argument("--timeline", action="store_true", help="Write the phases of every task as a Chrome trace (Perfetto) to results/")
+    run_parser.add_argument("--operations", action="store_true", help="Write every operation with its start, end and size as CSV to results/")
+    
+    handshake_parser = subparsers.add_parser("handshake", help="Benchmark TCP connect, SSH handshake and auth without transferring data")
+    handshake_parser.add_argument("--host", default=SFTP_HOST, help="SFTP host address (default: GEIS_HOST from .env)")
+    handshake_parser.add_argument("--port", type=int, default=SFTP_PORT)
+    handshake_parser.add_argument("--username", default=SFTP_USER, help="default: GEIS_USER from .env")
+    handshake_parser.add_argument("--password", default=SFTP_PASS, help="default: GEIS_PASSWORD from .env")
+    handshake_parser.add_argument("--concurrency", type=int, default=10, help="Handshakes in flight at the same time")
+    handshake_parser.add_argument("--attempts", type=int, default=1000, help="Total handshakes, 0 runs until --duration is over")
+    handshake_parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    handshake_parser.add_argument("--no-sftp", action="store_true", help="Skip opening the SFTP subsystem after auth")
+    handshake_parser.add_argument("--connect-timeout", type=float, default=30)
+    
+    import_parser = subparsers.add_parser("import-trace", help="Convert an sftp-server log or CSV file into a workload trace for replay")
+    import_parser.add_argument("input", help="sftp-server log (syslog or journal export) or CSV file")
+    import_parser.add_argument("--output", help="Trace file to write (default: input name with .jsonl)")
+    import_parser.add_argument("--format", choices=("sftp-server", "csv"), help="Input format (default: by file extension)")
+    import_parser.add_argument("--year", type=int, help="Year of syslog time stamps without year (default: current year)")
+    
+    sink_parser = subparsers.add_parser("sink-server", help="Run a local SFTP and SCP server that accepts uploads without storing them")
+    sink_parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    sink_parser.add_argument("--port", type=int, default=2222)
+    sink_parser.add_argument("--store", action="store_true", help="Keep uploaded data in memory instead of only names and sizes")
+    sink_parser.add_argument("--latency-ms", type=float, default=0, help="Added processing time per SFTP request")
+    sink_parser.add_argument("--bandwidth", help="Total bandwidth limit, e.g. 1Gbit")
+    sink_parser.add_argument("--bandwidth-per-session", help="Bandwidth limit per session, e.g. 100Mbit")
+    sink_parser.add_argument("--username", help="Only accept this user (default: any user and password)")
+    sink_parser.add_argument("--password")
+    sink_parser.add_argument("--reuse-port", action="store_true", help="Share the port with other sink processes (SO_REUSEPORT)")
+    
+    calibrate_parser = subparsers.add_parser("calibrate", help="Measure the upload ceiling of this client against local sink servers")
+    calibrate_parser.add_argument("--plan", help="Test plan whose load, payload and network settings are used")
+    calibrate_parser.add_argument("--connections", type=int, help="Concurrent connections (default: plan or 10)")
+    calibrate_parser.add_argument("--file-size", help="Generated payload per upload (default: plan or 10MB)")
+    calibrate_parser.add_argument("--sink-processes", type=int, default=2, help="Sink server processes sharing the load (default: 2)")
+    calibrate_parser.add_argument("--latency-ms", type=float, default=0, help="Added processing time per SFTP request of the sink")
+    calibrate_parser.add_argument("--bandwidth", help="Total bandwidth limit of the sink, e.g. 1Gbit")
+    calibrate_parser.add_argument("--bandwidth-per-session", help="Bandwidth limit per session of the sink")
+    
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_arguments(sys.argv[1:])
+    if sys.stderr is not None:  # The windowed exe has no stderr
+        faulthandler.enable()  # Prints the stacks of all threads if the process crashes in native code (Qt, crypto)
+    
+    if args.command == "cleanup":
+        from .engine.cleanup import RemoteCleanupWorker
+        
+        worker = RemoteCleanupWorker(args.host, args.port, args.directory, args.username, args.password, args.sessions, args.pattern)
+        run_headless(worker)
+        if worker.error:
+            sys.exit(2)
+        sys.exit(1 if worker.delete_errors else 0)
+    
+    if args.command == "handshake":
+        from .engine.handshake import HandshakeWorker
+        
+        worker = HandshakeWorker(args.concurrency, args.host, args.port, args.username, args.password, attempts=args.attempts,
+                                 duration=args.duration, open_sftp=not args.no_sftp, connect_timeout=args.connect_timeout)
+        run_headless(worker)
+        sys.exit(0)
+    
+    if args.command == "import-trace":
+        from .engine.trace_import import load_trace
+        
+        try:
+            trace = load_trace(args.input, args.format or None, args.year)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {str(e)}")
+            sys.exit(2)
+        output = args.output or os.path.splitext(args.input)[0] + ".jsonl"
+        trace.save(output)
+        print(f"Wrote {output}: {trace.describe()}")
+        print(f"Peak concurrency {trace.peak_concurrency()} sessions, replay it with mode replay and replay.trace, "
+              f"replay.speed compresses time, e.g. 24 plays a day in one hour")
+        sys.exit(0)
+    
+    if args.command == "sink-server":
+        from .engine.sink import SinkServer
+        
+        server = SinkServer(args.host, args.port, store=args.store, latency=args.latency_ms / 1000, bandwidth_total=args.bandwidth,
+                            bandwidth_per_session=args.bandwidth_per_session, username=args.username, password=args.password,
+                            reuse_port=args.reuse_port).start()
+        if sys.stdout is not None:  # None when started by calibrate from the windowed exe
+            print(f"{server.describe()}, press Ctrl+C to stop", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        if sys.stdout is not None:
+            print(server.format_summary())
+        sys.exit(0)
+    
+    if args.command == "calibrate":
+        from .engine.calibration import CalibrationWorker
+        from .engine.plan import TestPlan
+        
+        plan = TestPlan.load(args.plan) if args.plan else TestPlan()
+        plan.data["load"]["connections"] = args.connections or (plan.data["load"]["connections"] if args.plan else 10)
+        if args.file_size or not (plan.data["payload"]["file_size"] or plan.data["payload"]["path"]):
+            plan.data["payload"]["file_size"] = args.file_size or "10MB"
+        _, point = plan.expand()[0]
+        worker = CalibrationWorker(point, sink_processes=args.sink_processes, latency_ms=args.latency_ms,
+                                   bandwidth_total=args.bandwidth, bandwidth_per_session=args.bandwidth_per_session,
+                                   name=f"{plan.name}_calibration")
+        run_headless(worker)
+        sys.exit(0 if worker.result else 1)
+    
+    if args.command == "run":
+        from .engine.modes import SweepWorker, validate_points
+        from .engine.plan import TestPlan
+        from .metrics.live import MetricsHTTPServer
+        
+        try:
+            plan = TestPlan.load(args.plan)
+            validate_points(plan.expand())
+        except Exception as e:  # Missing file, JSON/YAML syntax, unknown mode or threshold, ...
+            print(f"ERROR: Invalid test plan '{args.plan}' - {str(e)}", file=sys.stderr)
+            sys.exit(2)
+        if args.profile:
+            plan.data["profiling"]["enabled"] = True
+        if args.timeline:
+            plan.data["profiling"]["timeline"] = True
+        if args.operations:
+            plan.data["profiling"]["operations"] = True
+        worker = SweepWorker(plan)
+        metrics_server = None
+        if args.metrics_port:
+            metrics_server = MetricsHTTPServer(args.metrics_port, args.metrics_address)
+            metrics_server.start()
+            print(f"Serving live metrics at {metrics_server.url}")
+        run_headless(worker)
+        if metrics_server:
+            metrics_server.stop()
+        # Exit code for CI gating: 0 = passed or no criteria, 1 = success criteria failed, 2 = the plan could not run
+        if worker.errors:
+            sys.exit(2)
+        sys.exit(1 if worker.verdict is False else 0)
+    
+    from .gui.app import run_gui
+    
+    sys.exit(run_gui())
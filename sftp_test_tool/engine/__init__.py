@@ -0,0 +1,5 @@
+"""Test plans and the benchmark workers of every test mode.
+
+Nothing is re-exported here: plan, payload and shaping load fast, the worker modules import paramiko and are only
+imported when a test runs.
+"""
@@ -0,0 +1,417 @@
+"""Concurrency auto-tuning: a hill-climbing controller that finds the session count with the best sustainable throughput."""
+import os
+import threading
+import time
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats
+from .base import BenchmarkWorker
+from .connection import classify_error
+from .payload import GeneratedPayload
+from .plan import TestPlan, format_size, parse_size, test_file_name
+from .protocols import open_session, session_type
+from .shaping import NetworkShaper, ShapedFile
+
+
+class AutoTuneWorker(BenchmarkWorker):
+    """Worker thread that adjusts the number of active upload sessions while the run goes on.
+
+    Every session uploads back to back over one connection. The controller runs each session count for one step:
+    warmup seconds to open the new sessions, then step_duration seconds of measurement. It doubles the sessions
+    while the throughput grows by at least min_gain and the step stays healthy (error rate and p99 latency within
+    their limits), then bisects between the best step and the first one past the knee. Unhealthy steps count as past
+    the knee, so the sessions back off as soon as the server starts failing or queueing. The best session count is
+    finally run once more to confirm that its throughput is sustainable.
+    """
+    TITLE = "auto-tune"
+    DEFAULT_FILE_SIZE = 1024 ** 2
+    SUSTAIN_TOLERANCE = 0.1  # The confirmation step may be this much slower than the best step
+
+    def __init__(self, max_connections: int, host: str, port: int, directory: str, username: str, password: str,
+                 start_sessions: int = 1, step_duration: float = 10, warmup: float = 2, min_gain: float = 0.05,
+                 max_error_rate: float = 0.01, max_latency_p99: float = None, payload_path: str = "",
+                 file_size: int = None, cleanup_after_run: bool = False, connect_timeout: float = None,
+                 operation_timeout: float = None, success_criteria: dict = None, shaper: "NetworkShaper" = None,
+                 protocol: str = "sftp"):
+        super().__init__(success_criteria)
+        if not 1 <= start_sessions <= max_connections:
+            raise ValueError(f"The auto-tune start ({start_sessions}) must be between 1 and the maximum connections ({max_connections}).")
+        self.connections = max_connections  # Upper limit of the search, also the sessions of the cleanup phase
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.start_sessions = start_sessions
+        self.step_duration = step_duration  # Seconds measured per step
+        self.warmup = warmup  # Seconds after a change of the session count that are not measured
+        self.min_gain = min_gain  # Relative throughput gain a step needs to count as better
+        self.max_error_rate = max_error_rate
+        self.max_latency_p99 = max_latency_p99  # Seconds, None does not limit the latency
+        self.payload_path = payload_path
+        self.file_size = file_size
+        self.cleanup_after_run = cleanup_after_run
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        self.shaper = shaper
+        self.session_type = session_type(protocol)
+        self.protocol = protocol
+        self.created_files = []
+        self.upload_stats = OperationStats("Upload", self.spill)
+        self.delete_stats = None
+        self.steps = []  # Measurement of every step in the order they ran
+        self.best = None  # Best step, None until a step was healthy
+        self.confirmation = None  # Repeated measurement of the best step
+        self.active_sessions = 0  # Sessions with a task_id below this upload, the others are closed
+        self._window = None  # OperationStats of the step being measured, None during warmup
+        self._threads = []
+        self._changed = threading.Condition()
+        self._finished = threading.Event()
+        self._error_logged = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        autotune = point["autotune"]
+        return cls(int(point["load"]["connections"]), target["host"], int(target["port"]), target["directory"],
+                   target["username"], TestPlan.resolve_password(target),
+                   start_sessions=int(autotune.get("start") or 1),
+                   step_duration=float(autotune.get("step_duration") or 10),
+                   warmup=float(autotune.get("warmup") or 0),
+                   min_gain=float(autotune.get("min_gain") or 0),
+                   max_error_rate=float(autotune.get("max_error_rate") or 0),
+                   max_latency_p99=float(autotune["max_latency_p99"]) if autotune.get("max_latency_p99") else None,
+                   payload_path=point["payload"].get("path") or "",
+                   file_size=parse_size(point["payload"].get("file_size")),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"),
+                   shaper=NetworkShaper.from_settings(point.get("network")),
+                   protocol=target.get("protocol") or "sftp")
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.created_files = []
+        self.upload_stats = OperationStats("Upload", self.spill)
+        self.delete_stats = None
+        self.steps = []
+        self.best = None
+        self.confirmation = None
+        self.active_sessions = 0
+        self._threads = []
+        self._finished.clear()
+        self._error_logged = False
+        self.verdict = None
+        self.abort_reason = None
+        start_time = time.time()
+        end_time = None
+
+        if self.file_size is None and not os.path.isfile(self.payload_path):
+            self.file_size = self.DEFAULT_FILE_SIZE
+        payload = format_size(self.file_size) if self.file_size is not None else os.path.basename(self.payload_path)
+        limits = f"error rate <= {self.max_error_rate * 100:g}%"
+        if self.max_latency_p99:
+            limits += f", p99 <= {self.max_latency_p99 * 1000:g} ms"
+        self.log_signal.emit(f"Auto-tune: {self.start_sessions} to {self.connections} sessions uploading {payload} back to back, "
+                             f"{self.warmup:g}s warmup and {self.step_duration:g}s measurement per step, a step needs "
+                             f"{self.min_gain * 100:g}% more throughput to count as better and {limits} to count as healthy.")
+        if self.shaper:
+            self.log_signal.emit(f"WAN emulation: {self.shaper.describe()}")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        try:
+            self._tune()
+            self._finished.set()
+            self._set_sessions(0)  # Wakes the parked sessions, they see the run finished
+            for thread in self._threads:
+                thread.join()
+            end_time = time.time()
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary():
+                self.log_signal.emit(line)
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.cleanup_after_run and self.created_files and not self.stop_event.is_set():
+                self.run_cleanup_phase()
+        finally:
+            self._finished.set()
+            with self._changed:
+                self._changed.notify_all()
+            run_finished.set()
+            self.network_monitor.stop()
+            self.network_monitor.wait()
+            if end_time is None:
+                end_time = time.time()
+            self.total_time = end_time - start_time
+            self.evaluate_thresholds()
+            self.log_signal.emit("=" * 50)
+            if self.abort_reason:
+                self.log_signal.emit(f"Auto-tune was aborted after {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Auto-tune was canceled after {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Completed auto-tune of {len(self.steps)} steps in {self.total_time:.2f} seconds.")
+
+    def _tune(self):
+        """Runs the steps of the search, sets best and confirmation. Returns early when the run is canceled."""
+        sessions = self.start_sessions
+        past_knee = None  # Lowest session count known to bring no gain
+        while True:  # Multiplicative increase until the throughput stops growing
+            step = self._measure(sessions)
+            if step is None:
+                return
+            if not self._improves(step):
+                past_knee = sessions
+                break
+            self.best = step
+            if sessions >= self.connections:
+                self.log_signal.emit(f"Reached the maximum of {self.connections} sessions, raise the parallel connections "
+                                     f"to search further.")
+                break
+            sessions = min(self.connections, sessions * 2)
+        if self.best is None:
+            self.log_signal.emit(f"Already {self.start_sessions} sessions were unhealthy, no sustainable session count was found.")
+            return
+        low, high = self.best["sessions"], past_knee
+        while high is not None and high - low > 1 and high - low > low * self.min_gain:  # Bisect towards the knee
+            sessions = (low + high) // 2
+            step = self._measure(sessions)
+            if step is None:
+                return
+            if self._improves(step):
+                self.best = step
+                low = sessions
+            else:
+                high = sessions
+        self.log_signal.emit(f"Knee at {self.best['sessions']} sessions, confirming that its throughput is sustainable...")
+        self.confirmation = self._measure(self.best["sessions"], "confirm")
+
+    def _measure(self, sessions, kind="step"):
+        """Runs the given number of sessions for one step, returns its measurement or None when canceled."""
+        self._set_sessions(sessions)
+        if self.stop_event.wait(self.warmup):
+            return None
+        window = OperationStats(f"{sessions} sessions")
+        self._window = window
+        start = time.perf_counter()
+        canceled = self.stop_event.wait(self.step_duration)
+        self._window = None
+        if canceled:
+            return None
+        elapsed = time.perf_counter() - start
+        summary = window.summary()
+        attempts = summary["count"] + summary["errors"]
+        step = {
+            "kind": kind,
+            "sessions": sessions,
+            "elapsed": elapsed,
+            "uploads": summary["count"],
+            "errors": summary["errors"],
+            "bytes_per_sec": summary["bytes"] / elapsed,
+            "uploads_per_sec": summary["count"] / elapsed,
+            "latency_p50": summary["latency_p50"],
+            "latency_p99": summary["latency_p99"],
+            "error_rate": summary["errors"] / attempts if attempts else 0.0,
+        }
+        step["unhealthy"] = self._unhealthy(step)
+        self.steps.append(step)
+        label = "Confirmation" if kind == "confirm" else f"Step {len(self.steps)}"
+        self.log_signal.emit(f"{label}: {self.format_step(step)}")
+        return step
+
+    def _unhealthy(self, step):
+        """Returns why a step is unhealthy, or an empty string."""
+        if not step["uploads"]:
+            return "no upload completed"
+        if step["error_rate"] > self.max_error_rate:
+            return f"error rate {step['error_rate'] * 100:.2f}% above {self.max_error_rate * 100:g}%"
+        if self.max_latency_p99 and step["latency_p99"] > self.max_latency_p99:
+            return f"p99 {step['latency_p99'] * 1000:.1f} ms above {self.max_latency_p99 * 1000:g} ms"
+        return ""
+
+    def _improves(self, step):
+        if step["unhealthy"]:
+            return False
+        return self.best is None or step["bytes_per_sec"] > self.best["bytes_per_sec"] * (1 + self.min_gain)
+
+    def _set_sessions(self, sessions):
+        """Changes the number of active sessions, starting the threads of new ones."""
+        with self._changed:
+            self.active_sessions = sessions
+            self._changed.notify_all()
+        while len(self._threads) < sessions:
+            thread = threading.Thread(target=self._session_task, args=(len(self._threads),),
+                                      name=f"autotune-session-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _session_task(self, task_id):
+        """Uploads back to back while task_id is below the active sessions, closes the session while it is not."""
+        name = os.path.basename(self.payload_path) if self.file_size is None else "autotune.dat"
+        remote_path = f"{self.directory}/{test_file_name(name, task_id)}"  # Overwritten by every upload of this session
+        session = None
+        buckets = ()
+        uploaded = False
+        try:
+            while not self._finished.is_set() and not self.stop_event.is_set():
+                if task_id >= self.active_sessions:
+                    if session:
+                        session.close()
+                        LIVE_METRICS.active_sessions.dec()
+                        session = None
+                    with self._changed:
+                        self._changed.wait_for(lambda: task_id < self.active_sessions or self._finished.is_set(), 1.0)
+                    continue
+                try:
+                    if session is None:
+                        if self.shaper:
+                            self.shaper.inject_delay(round_trips=self.session_type.CONNECT_ROUND_TRIPS)
+                            buckets = self.shaper.connection_buckets()
+                        session = open_session(self.protocol, self.host, self.port, self.username, self.password,
+                                               self.connect_timeout, self.operation_timeout, connector=self.connector)
+                        LIVE_METRICS.active_sessions.inc()
+                    self._upload(session, remote_path, buckets)
+                    if not uploaded:
+                        self.created_files.append(remote_path)
+                        uploaded = True
+                except Exception as e:
+                    self._record_error(e)
+                    if session:
+                        session.close()
+                        LIVE_METRICS.active_sessions.dec()
+                        session = None
+                    self.stop_event.wait(0.1)  # Do not spin on a server that refuses sessions
+        finally:
+            if session:
+                session.close()
+                LIVE_METRICS.active_sessions.dec()
+
+    def _upload(self, session, remote_path, buckets):
+        LIVE_METRICS.uploads_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            if self.shaper:
+                self.shaper.inject_delay(round_trips=self.session_type.PUT_ROUND_TRIPS)
+            if self.file_size is not None:
+                payload = GeneratedPayload(self.file_size)
+                size = session.put(ShapedFile(payload, buckets, self.shaper) if self.shaper else payload, remote_path,
+                                   self.file_size)
+            else:
+                with open(self.payload_path, "rb") as local_file:
+                    size = session.put(ShapedFile(local_file, buckets, self.shaper) if self.shaper else local_file,
+                                       remote_path, os.fstat(local_file.fileno()).st_size)
+        finally:
+            LIVE_METRICS.uploads_in_flight.dec()
+        end = time.perf_counter()
+        self.upload_stats.record(start, end, size)
+        window = self._window
+        if window:
+            window.record(start, end, size)
+        LIVE_METRICS.phase_latency.observe(end - start, "upload")
+        LIVE_METRICS.uploads.inc()
+        LIVE_METRICS.bytes_uploaded.inc(size)
+        LIVE_METRICS.recent_latencies.append(end - start)
+
+    def _record_error(self, error):
+        self.upload_stats.record_error()
+        window = self._window
+        if window:
+            window.record_error()
+        LIVE_METRICS.errors.inc(label_value=classify_error(error))
+        with self._lock:
+            first, self._error_logged = not self._error_logged, True
+        if first:  # Every error is counted, only the first is logged
+            self.log_signal.emit(f"First upload error - {str(error) or type(error).__name__}")
+
+    @staticmethod
+    def format_step(step):
+        text = (f"{step['sessions']} sessions -> {step['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, "
+                f"{step['uploads_per_sec']:.1f} uploads/s, p50 {step['latency_p50'] * 1000:.1f} ms, "
+                f"p99 {step['latency_p99'] * 1000:.1f} ms, errors {step['error_rate'] * 100:.2f}%")
+        return f"{text} - unhealthy, {step['unhealthy']}" if step["unhealthy"] else text
+
+    def sustained(self):
+        """True if the confirmation step was healthy and kept the throughput of the best step."""
+        if not self.best or not self.confirmation:
+            return False
+        return not self.confirmation["unhealthy"] and \
+            self.confirmation["bytes_per_sec"] >= self.best["bytes_per_sec"] * (1 - self.SUSTAIN_TOLERANCE)
+
+    def format_summary(self):
+        lines = [self.upload_stats.format_summary(), "Throughput by sessions:"]
+        for step in sorted((step for step in self.steps if step["kind"] == "step"), key=lambda step: step["sessions"]):
+            marker = "  <- knee" if step is self.best else ""
+            lines.append(f"  {self.format_step(step)}{marker}")
+        if self.best:
+            confirmed = self.confirmation or self.best
+            lines.append(f"Best sustainable concurrency: {self.best['sessions']} sessions, "
+                         f"{confirmed['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, p99 {confirmed['latency_p99'] * 1000:.1f} ms")
+            if self.confirmation and not self.sustained():
+                lines.append(f"WARNING: the confirmation step did not sustain the throughput of the best step "
+                             f"({self.format_step(self.confirmation)}), the server or the network is not stable enough "
+                             f"for this step duration.")
+        return lines
+
+    def slo_metrics(self):
+        step = self.confirmation or self.best
+        if not step:
+            return {"tuned_connections": 0, "throughput_mb_s": 0.0, "samples": 0}
+        return {
+            "tuned_connections": step["sessions"],
+            "throughput_mb_s": step["bytes_per_sec"] / (1024 * 1024),
+            "uploads_per_sec": step["uploads_per_sec"],
+            "upload_latency_p50": step["latency_p50"],
+            "upload_latency_p99": step["latency_p99"],
+            "error_rate": step["error_rate"],
+            "samples": step["uploads"] + step["errors"],
+        }
+
+    def result(self):
+        return {
+            "mode": "autotune",
+            "connections": self.connections,
+            "tuned_connections": self.best["sessions"] if self.best else None,
+            "sustained": self.sustained(),
+            "best": self.best,
+            "confirmation": self.confirmation,
+            "steps": list(self.steps),
+            "total_time": self.total_time,
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "upload": self.upload_stats.summary(),
+            "series": self.upload_stats.per_second(),
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+        }
+
+    @staticmethod
+    def describe_result(result):
+        step = result["confirmation"] or result["best"]
+        if not step:
+            return f"{result['label']}: no sustainable session count found in {len(result['steps'])} steps"
+        return (f"{result['label']}: best {result['tuned_connections']} sessions "
+                f"{'(sustained)' if result['sustained'] else '(not sustained)'}, "
+                f"{step['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, p99 {step['latency_p99'] * 1000:.1f} ms, "
+                f"{len(result['steps'])} steps")
+
+    @staticmethod
+    def report_row(result):
+        step = result["confirmation"] or result["best"] or {}
+        return {
+            "label": result["label"],
+            "connections": result["connections"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "tuned_connections": result["tuned_connections"] or "",
+            "sustained": result["sustained"],
+            "throughput_mb_s": f"{step['bytes_per_sec'] / (1024 * 1024):.3f}" if step else "",
+            "latency_p50_ms": f"{step['latency_p50'] * 1000:.1f}" if step else "",
+            "latency_p99_ms": f"{step['latency_p99'] * 1000:.1f}" if step else "",
+            "steps": len(result["steps"]),
+            "uploads": result["upload"]["count"],
+            "upload_errors": result["upload"]["errors"],
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
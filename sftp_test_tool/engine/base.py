@@ -0,0 +1,191 @@
+"""Base class of the benchmark workers of all test modes."""
+import threading
+
+from PySide6.QtCore import QThread, Signal
+
+from ..metrics.monitor import NetworkMonitor
+from ..metrics.profiler import SamplingProfiler
+from ..metrics.stats import OperationStats, RecordSpill
+from .cleanup import RemoteCleaner
+from .plan import parse_thresholds, results_base_path
+
+
+class BenchmarkWorker(QThread):
+    """Base of the test mode workers, holds the signals, cancellation and success criteria shared by all modes"""
+    TITLE = "benchmark"  # Used in log messages
+    protocol = "sftp"  # Transfer protocol of the uploads, the cleanup phase deletes with the same one
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    finished_signal = Signal(float)
+    statusbar_signal = Signal(str, int)
+    statusbar_hidden_state = Signal(bool)
+    verdict_signal = Signal(bool, str)  # passed, summary of failed thresholds
+
+    def __init__(self, success_criteria: dict = None):
+        super().__init__()
+        self.success_criteria = success_criteria or {}
+        self.thresholds = parse_thresholds(self.success_criteria)
+        self.verdict = None  # None without thresholds, otherwise True/False after the run
+        self.abort_reason = None
+        self.total_time = 0.0
+        self.profiling = None  # Sampling interval in seconds when the run profiles its own threads
+        self.run_name = self.TITLE  # Sweep point label, names the profile and trace files
+        self.trace_recorder = None  # TraceRecorder when the run records a workload trace
+        self.timeline = None  # TimelineRecorder when the run records the phases of every task
+        self.record_operations = False  # Write every operation to a CSV file while the run goes on
+        self.spill = None  # RecordSpill of the running test, passed to its OperationStats
+        self.connector = None  # SocketConnector opening the connections of the run, None uses default sockets
+        self.network_monitor = NetworkMonitor(interval=0.5)
+        self.network_monitor.status_signal.connect(self.statusbar_signal)
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        self.stop_event.set()
+
+    def run(self):
+        profiler = SamplingProfiler(self.profiling) if self.profiling else None
+        if profiler:
+            profiler.start()
+        if self.timeline:
+            self.timeline.begin()
+        if self.record_operations:
+            self.open_spill()
+        try:
+            self.execute()
+            if self.connector:
+                for line in self.connector.format_summary():
+                    self.log_signal.emit(line)
+        finally:
+            if self.spill:
+                self.close_spill()
+            if profiler:
+                profiler.stop()
+                self.report_profile(profiler)
+            if self.timeline:
+                self.write_timeline()
+            self.finished_signal.emit(self.total_time)
+
+    def execute(self):
+        """Runs the test, implemented by every mode."""
+        raise NotImplementedError
+
+    def report_profile(self, profiler):
+        """Logs the client CPU breakdown and writes the flamegraph profiles next to the results."""
+        self.log_signal.emit("=" * 50)
+        for line in profiler.format_summary():
+            self.log_signal.emit(line)
+        try:
+            cpu_path, wall_path = profiler.write(results_base_path(f"{self.run_name}_profile"))
+            self.log_signal.emit(f"Profiles written to '{cpu_path}' (CPU) and '{wall_path}' (wall clock).")
+        except OSError as e:
+            self.log_signal.emit(f"Could not write profile - {str(e)}")
+
+    def open_spill(self):
+        path = f"{results_base_path(f'{self.run_name}_operations')}.csv"
+        try:
+            self.spill = RecordSpill(path)
+        except OSError as e:
+            self.log_signal.emit(f"Could not write operation records - {str(e)}")
+
+    def close_spill(self):
+        try:
+            self.spill.close()
+            self.log_signal.emit(f"{self.spill.records} operation records written to '{self.spill.path}'.")
+        except OSError as e:
+            self.log_signal.emit(f"Could not write operation records - {str(e)}")
+        self.spill = None
+
+    def write_timeline(self):
+        """Writes the phase timeline of the run as Chrome trace JSON next to the results."""
+        path = f"{results_base_path(f'{self.run_name}_timeline')}.json"
+        try:
+            count = self.timeline.write(path)
+            self.log_signal.emit(f"Timeline of {count} phases written to '{path}', open it in ui.perfetto.dev or chrome://tracing.")
+        except OSError as e:
+            self.log_signal.emit(f"Could not write timeline - {str(e)}")
+
+    def write_trace(self, seed, content):
+        """Writes the operations recorded during the run as a workload trace next to the results."""
+        trace = self.trace_recorder.trace(seed, content, f"recorded from {self.run_name}")
+        path = f"{results_base_path(f'{self.run_name}_trace')}.jsonl"
+        try:
+            trace.save(path)
+            self.log_signal.emit(f"Workload trace of {len(trace.events)} operations written to '{path}', replay it with the replay mode.")
+        except OSError as e:
+            self.log_signal.emit(f"Could not write workload trace - {str(e)}")
+
+    def slo_metrics(self):
+        """Returns the metrics that success criteria thresholds can refer to, plus the sample count."""
+        raise NotImplementedError
+
+    def result(self):
+        """Returns the outcome and metrics of the last run as a dictionary, used for reports."""
+        raise NotImplementedError
+
+    @staticmethod
+    def describe_result(result):
+        """Returns the one line summary of a result used in the combined report of a test plan."""
+        raise NotImplementedError
+
+    @staticmethod
+    def report_row(result):
+        """Returns the CSV report columns of a result as a dictionary."""
+        raise NotImplementedError
+
+    def run_cleanup_phase(self):
+        """Deletes every file in created_files using the same amount of parallel sessions, for the modes that upload"""
+        self.log_signal.emit("=" * 50)
+        self.log_signal.emit(f"Cleanup phase: deleting {len(self.created_files)} uploaded files using {self.connections} sessions...")
+        self.delete_stats = OperationStats("Delete")
+        missing = 0
+        for host, port, remote_paths in self.cleanup_targets():
+            cleaner = RemoteCleaner(host, port, self.username, self.password, self.connections, self.stop_event, self.log_signal.emit,
+                                    self.protocol, self.connector)
+            self.delete_stats.merge(cleaner.delete(remote_paths))
+            missing += cleaner.missing
+        self.log_signal.emit(self.delete_stats.format_summary())
+        if missing:
+            self.log_signal.emit(f"Cleanup phase: {missing} files were already gone from the server.")
+
+    def cleanup_targets(self):
+        """Returns (host, port, remote paths) for every server the cleanup phase connects to."""
+        return [(self.host, self.port, list(self.created_files))]
+
+    def start_threshold_watch(self):
+        """Starts the early abort watcher if requested, returns the event that stops it."""
+        run_finished = threading.Event()
+        if self.thresholds and self.success_criteria.get("abort_on_breach"):
+            threading.Thread(target=self._watch_thresholds, args=(run_finished,), daemon=True).start()
+        return run_finished
+
+    def _watch_thresholds(self, run_finished):
+        """Aborts the run once a threshold is clearly breached on enough samples."""
+        min_samples = int(self.success_criteria.get("min_samples", 50))
+        margin = float(self.success_criteria.get("abort_margin", 0.5))
+        while not run_finished.wait(1.0):
+            metrics = self.slo_metrics()
+            if metrics["samples"] < min_samples:
+                continue
+            for threshold in self.thresholds:
+                if threshold.clearly_breached(metrics, margin):
+                    self.abort_reason = f"threshold clearly breached, {threshold.describe(metrics)}"
+                    self.log_signal.emit(f"Aborting run: {self.abort_reason}")
+                    self.stop_event.set()
+                    return
+
+    def evaluate_thresholds(self):
+        """Evaluates the success criteria against the final metrics and emits the verdict."""
+        if not self.thresholds:
+            return
+        metrics = self.slo_metrics()
+        self.log_signal.emit("=" * 50)
+        failed = []
+        for threshold in self.thresholds:
+            self.log_signal.emit(threshold.describe(metrics))
+            if not threshold.passes(metrics):
+                failed.append(f"{threshold.metric} {threshold.expression}")
+        if self.abort_reason and not failed:
+            failed.append("run aborted early")
+        self.verdict = not failed
+        self.log_signal.emit(f"Verdict: {'PASSED' if self.verdict else 'FAILED'}")
+        self.verdict_signal.emit(self.verdict, ", ".join(failed))
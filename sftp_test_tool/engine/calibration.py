@@ -0,0 +1,194 @@
+"""Calibration: runs the upload engine against local sink servers to measure how fast the client itself can upload."""
+import copy
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+from .modes import create_worker
+from .plan import write_run_report
+from .shaping import parse_rate
+
+
+def free_port(host="127.0.0.1"):
+    with socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind((host, 0))
+        return probe.getsockname()[1]
+
+
+def sink_server_command(arguments):
+    """Returns the command starting the sink-server command of this tool, also from the built executable."""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, "sink-server", *arguments]
+    return [sys.executable, "-c", "from sftp_test_tool.cli import main; main()", "sink-server", *arguments]
+
+
+def wait_for_port(host, port, timeout, processes):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError("The sink server exited while starting.")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"The sink server did not accept connections on port {port} within {timeout:g} seconds.")
+
+
+class CalibrationWorker(QThread):
+    """Runs one upload test plan point against loopback sink servers and reports the client ceiling.
+
+    The sinks run in their own processes, so their SSH encryption does not compete with the client for the GIL of
+    this process. With several sink processes they share one port (SO_REUSEPORT), where the platform lacks it one
+    process is used. Sink and client CPU time are reported, a saturated sink means the client could go faster.
+    """
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    finished_signal = Signal(float)
+    statusbar_signal = Signal(str, int)
+    statusbar_hidden_state = Signal(bool)
+    verdict_signal = Signal(bool, str)
+
+    HOST = "127.0.0.1"
+    STARTUP_TIMEOUT = 30.0
+    SATURATED = 0.9  # Share of one core above which a process counts as CPU bound
+    MACHINE_SATURATED = 0.8  # Share of all cores above which the machine counts as CPU bound
+
+    def __init__(self, point, sink_processes=1, latency_ms=0.0, bandwidth_total=None, bandwidth_per_session=None,
+                 store=False, name="calibration"):
+        super().__init__()
+        self.point = point
+        self.sink_processes = max(1, int(sink_processes))
+        self.latency_ms = float(latency_ms or 0.0)
+        self.bandwidth_total = bandwidth_total
+        self.bandwidth_per_session = bandwidth_per_session
+        self.store = store
+        self.name = name
+        self.result = None
+        self.report_path = None
+        self.verdict = None
+        self.current_worker = None
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        self.stop_event.set()
+        if self.current_worker:
+            self.current_worker.cancel()
+
+    def calibration_point(self, port):
+        """The plan point with the sink as target, uploads only and without cleanup or success criteria."""
+        point = copy.deepcopy(self.point)
+        if point.get("mode", "upload") != "upload":
+            self.log_signal.emit(f"Calibration measures uploads, the {point['mode']} settings of the plan are not used.")
+        point["mode"] = "upload"
+        point["target"] = {"host": self.HOST, "port": port, "directory": "calibration", "username": "calibration",
+                           "password": "calibration"}
+        point["workload"]["cleanup"] = False
+        point["workload"]["record_trace"] = False
+        point["success_criteria"] = {}
+        return point
+
+    def start_sinks(self, port):
+        processes = self.sink_processes
+        if processes > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            self.log_signal.emit("Several sink processes need SO_REUSEPORT, which this platform lacks, using one.")
+            processes = 1
+        arguments = ["--host", self.HOST, "--port", str(port), "--latency-ms", f"{self.latency_ms:g}"]
+        if self.bandwidth_total:  # Every process enforces its own limit, so the total is split over them
+            arguments += ["--bandwidth", f"{parse_rate(self.bandwidth_total) / processes:.0f}"]
+        if self.bandwidth_per_session:
+            arguments += ["--bandwidth-per-session", str(self.bandwidth_per_session)]
+        if self.store:
+            arguments.append("--store")
+        if processes > 1:
+            arguments.append("--reuse-port")
+        cwd = None if getattr(sys, "frozen", False) else os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return [subprocess.Popen(sink_server_command(arguments), cwd=cwd, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.DEVNULL) for _ in range(processes)]
+
+    def run(self):
+        import psutil
+
+        start_time = time.time()
+        port = free_port(self.HOST)
+        sinks = self.start_sinks(port)
+        try:
+            wait_for_port(self.HOST, port, self.STARTUP_TIMEOUT, sinks)
+            self.log_signal.emit(f"Started {len(sinks)} sink server process(es) on {self.HOST}:{port}"
+                                 f"{f', {self.latency_ms:g} ms per request' if self.latency_ms else ''}"
+                                 f"{f', {self.bandwidth_total} total' if self.bandwidth_total else ''}"
+                                 f"{f', {self.bandwidth_per_session} per session' if self.bandwidth_per_session else ''}.")
+            worker = create_worker(self.calibration_point(port))
+            worker.run_name = self.name
+            self.current_worker = worker
+            worker.log_signal.connect(self.log_signal)
+            worker.progress_signal.connect(self.progress_signal)
+            worker.statusbar_hidden_state.connect(self.statusbar_hidden_state)
+            worker.network_monitor.status_signal.connect(self.statusbar_signal)
+            if self.stop_event.is_set():
+                return
+
+            client = psutil.Process()
+            sink_processes = [psutil.Process(sink.pid) for sink in sinks]
+            client_before = sum(client.cpu_times()[:2])
+            sinks_before = [sum(process.cpu_times()[:2]) for process in sink_processes]
+            started = time.perf_counter()
+            worker.run()  # Runs synchronously inside this thread
+            # CPU share of the upload window, starting and stopping the run costs little CPU but takes time. Windows
+            # shorter than a second are too coarse for the CPU time counters, then the whole run is used
+            elapsed = worker.upload_stats.summary()["elapsed"]
+            if elapsed < 1.0:
+                elapsed = time.perf_counter() - started
+            client_cpu = (sum(client.cpu_times()[:2]) - client_before) / elapsed
+            sink_cpu = [(sum(process.cpu_times()[:2]) - before) / elapsed for process, before in zip(sink_processes, sinks_before)]
+            self.current_worker = None
+
+            self.result = worker.result()
+            self.result["label"] = self.name
+            self.result["parameters"] = self.point.get("parameters", {})
+            self.result["calibration"] = {"sink_processes": len(sinks), "latency_ms": self.latency_ms,
+                                          "client_cpu_cores": client_cpu, "sink_cpu_cores": sink_cpu}
+            for line in self.format_ceiling(worker, client_cpu, sink_cpu, psutil.cpu_count() or 1):
+                self.log_signal.emit(line)
+            try:
+                self.report_path = write_run_report(self.name, [self.result])
+                self.log_signal.emit(f"Report written to '{self.report_path}'.")
+            except OSError as e:
+                self.log_signal.emit(f"Could not write report - {str(e)}")
+        except Exception as e:
+            self.log_signal.emit(f"Calibration failed: {str(e)}")
+        finally:
+            for sink in sinks:
+                sink.terminate()
+            for sink in sinks:
+                try:
+                    sink.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    sink.kill()
+            self.finished_signal.emit(time.time() - start_time)
+
+    def format_ceiling(self, worker, client_cpu, sink_cpu, cores):
+        upload = worker.upload_stats.summary()
+        lines = ["=" * 50,
+                 f"Client ceiling with {worker.connections} connections: {upload['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, "
+                 f"{upload['ops_per_sec']:.1f} uploads/s, p99 {upload['latency_p99'] * 1000:.1f} ms",
+                 f"CPU: client {client_cpu * 100:.0f}% of one core, sink {' + '.join(f'{cpu * 100:.0f}%' for cpu in sink_cpu)}, "
+                 f"{cores} core{'s' if cores > 1 else ''} in total"]
+        if client_cpu + sum(sink_cpu) > self.MACHINE_SATURATED * cores:
+            lines.append("Client and sink together kept every CPU core busy, the client ceiling is at least this high. "
+                         "Calibrate on a machine with more cores to see the client alone.")
+        elif any(cpu > self.SATURATED for cpu in sink_cpu):
+            lines.append("The sink was CPU bound, the client ceiling is at least this high. Use more sink processes to raise it.")
+        elif client_cpu > self.SATURATED:
+            lines.append("The client is CPU bound (SSH encryption runs under the GIL of one process), a real server can "
+                         "not be measured faster than this with these settings.")
+        elif self.latency_ms or self.bandwidth_total or self.bandwidth_per_session:
+            lines.append("Neither side was CPU bound, the emulated latency or bandwidth of the sink limited the run.")
+        else:
+            lines.append("Neither side was CPU bound, more connections may raise the ceiling.")
+        return lines
@@ -0,0 +1,124 @@
+"""Deleting uploaded test files from the remote directory with parallel sessions."""
+import fnmatch
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import QThread, Signal
+
+from ..metrics.stats import OperationStats
+from .connection import connect_sftp
+from .plan import CLEANUP_PATTERN
+from .protocols import open_session
+
+
+class RemoteCleaner:
+    """Deletes remote files in parallel, spreading them over a pool of sessions of the protocol that uploaded them"""
+
+    def __init__(self, host, port, username, password, sessions, stop_event, log, protocol="sftp", connector=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sessions = max(1, sessions)
+        self.stop_event = stop_event
+        self.log = log  # Callable taking a single log message
+        self.protocol = protocol
+        self.connector = connector
+        self.stats = OperationStats("Delete")
+        self.missing = 0  # Paths that were already gone on the server
+        self._missing_lock = threading.Lock()
+
+    def delete(self, remote_paths):
+        """Deletes all given remote paths and returns the collected delete statistics."""
+        pending = queue.SimpleQueue()
+        for remote_path in remote_paths:
+            pending.put(remote_path)
+
+        sessions = min(self.sessions, len(remote_paths))
+        if sessions == 0:
+            return self.stats
+
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [executor.submit(self._delete_session, session_id, pending) for session_id in range(sessions)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.log(f"Cleanup session failed - {str(e)}")
+        return self.stats
+
+    def _delete_session(self, session_id, pending):
+        """Pulls paths from the shared queue and removes them over one session."""
+        session = None
+        try:
+            session = open_session(self.protocol, self.host, self.port, self.username, self.password, connector=self.connector)
+            while not self.stop_event.is_set():
+                try:
+                    remote_path = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    session.remove(remote_path)
+                    self.stats.record(start, time.perf_counter())
+                except FileNotFoundError:
+                    with self._missing_lock:
+                        self.missing += 1
+                except Exception as e:
+                    self.stats.record_error()
+                    self.log(f"Cleanup session {session_id}: Failed to delete '{remote_path}' - {str(e)}")
+        finally:
+            if session:
+                session.close()
+
+
+class RemoteCleanupWorker(QThread):
+    """Worker thread that deletes leftover stress test files from a remote directory"""
+    log_signal = Signal(str)
+    finished_signal = Signal(int)  # Number of deleted files
+
+    def __init__(self, host, port, directory, username, password, sessions, pattern=CLEANUP_PATTERN):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.sessions = sessions
+        self.pattern = pattern or CLEANUP_PATTERN
+        self.stop_event = threading.Event()
+        self.error = None  # Why listing the directory failed
+        self.delete_errors = 0
+
+    def run(self):
+        deleted = 0
+        transport = None
+        sftp = None
+        try:
+            self.log_signal.emit(f"Listing '{self.directory}' for files matching '{self.pattern}'...")
+            transport, sftp = connect_sftp(self.host, self.port, self.username, self.password)
+            names = [name for name in sftp.listdir(self.directory) if fnmatch.fnmatch(name, self.pattern)]
+            sftp.close()
+            transport.close()
+            sftp = transport = None
+
+            self.log_signal.emit(f"Deleting {len(names)} files using {self.sessions} sessions...")
+            cleaner = RemoteCleaner(self.host, self.port, self.username, self.password, self.sessions, self.stop_event, self.log_signal.emit)
+            stats = cleaner.delete([f"{self.directory}/{name}" for name in names])
+            deleted = stats.summary()["count"]
+            self.delete_errors = stats.summary()["errors"]
+            self.log_signal.emit(stats.format_summary())
+            if cleaner.missing:
+                self.log_signal.emit(f"{cleaner.missing} files were already gone from the server.")
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            self.log_signal.emit(f"Remote cleanup failed - {self.error}")
+        finally:
+            if sftp:
+                sftp.close()
+            if transport:
+                transport.close()
+            self.finished_signal.emit(deleted)
@@ -0,0 +1,100 @@
+"""Opening SFTP sessions and classifying the failures of all transfer protocols."""
+import base64
+import errno
+import ftplib
+import hashlib
+import socket
+import ssl
+import time
+
+import paramiko
+
+
+def connect_sftp(host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None, open_sftp=True,
+                 connector=None):
+    """Opens an authenticated transport and SFTP client, returns both so the caller can close them.
+
+    phase_timer is an optional callable (phase, start, end) that receives the perf_counter timestamps of the
+    tcp_connect, ssh_handshake, auth and sftp_open phases. With open_sftp=False the SFTP subsystem is not
+    requested and None is returned instead of the client. connector is the SocketConnector of the run, without one
+    every connection resolves the host and uses a default socket.
+    """
+    def timed(phase, start):
+        if phase_timer:
+            phase_timer(phase, start, time.perf_counter())
+
+    start = time.perf_counter()
+    if connector:
+        sock = connector.connect(host, port, connect_timeout)
+    else:
+        sock = socket.create_connection((host, port), timeout=connect_timeout)
+    timed("tcp_connect", start)
+    transport = paramiko.Transport(sock)
+    if connect_timeout:
+        transport.banner_timeout = connect_timeout
+        transport.auth_timeout = connect_timeout
+    try:
+        start = time.perf_counter()
+        transport.start_client(timeout=connect_timeout)
+        timed("ssh_handshake", start)
+        start = time.perf_counter()
+        transport.auth_password(username, password)
+        timed("auth", start)
+        if not open_sftp:
+            return transport, None
+        start = time.perf_counter()
+        sftp = paramiko.SFTPClient.from_transport(transport)
+        timed("sftp_open", start)
+        if operation_timeout:
+            sftp.get_channel().settimeout(operation_timeout)
+    except Exception:
+        transport.close()
+        raise
+    return transport, sftp
+
+
+class SCPError(IOError):
+    """Error reported by the scp program on the server, e.g. a missing directory or a full disk"""
+
+
+def key_fingerprint(data):
+    """Returns the SHA256 fingerprint of a key or certificate in the format of ssh-keygen -l, e.g. "SHA256:nThbg6k..."."""
+    return "SHA256:" + base64.b64encode(hashlib.sha256(data).digest()).decode("ascii").rstrip("=")
+
+
+def host_key_fingerprint(transport):
+    """Returns the SHA256 fingerprint of the server's host key."""
+    return key_fingerprint(transport.get_remote_server_key().asbytes())
+
+
+def classify_error(error):
+    """Maps an exception of a connection or transfer to a short category used as metrics label."""
+    if isinstance(error, paramiko.AuthenticationException):
+        return "auth"
+    if isinstance(error, ftplib.error_perm) and str(error).startswith("530"):
+        return "auth"  # FTP: Login incorrect
+    if isinstance(error, (socket.timeout, TimeoutError)):
+        return "timeout"
+    if isinstance(error, ConnectionRefusedError):
+        return "connection_refused"
+    if isinstance(error, (ConnectionResetError, EOFError, BrokenPipeError)):
+        return "connection_reset"
+    if isinstance(error, socket.gaierror):
+        return "dns"
+    if isinstance(error, OSError) and error.errno in (errno.EADDRNOTAVAIL, errno.EADDRINUSE):
+        return "local_ports"  # The load generator ran out of ephemeral ports, see SocketConnector
+    if isinstance(error, paramiko.ChannelException):
+        return "channel_refused"  # Server refused the session channel, e.g. MaxSessions reached
+    if isinstance(error, paramiko.SSHException) and "banner" in str(error):
+        return "banner"  # Connection dropped before the SSH banner, typical for sshd MaxStartups throttling
+    if isinstance(error, paramiko.SSHException):
+        return "ssh"
+    if isinstance(error, ssl.SSLError):
+        return "tls"
+    if isinstance(error, ftplib.Error):
+        return "ftp"  # FTP reply codes 4xx and 5xx, e.g. 421 when the server limits the connections
+    if isinstance(error, SCPError):
+        return "scp"
+    if isinstance(error, (IOError, OSError)):
+        return "sftp"  # paramiko raises IOError subclasses for SFTP status codes
+    return "other"
@@ -0,0 +1,442 @@
+"""Directory scaling benchmark: how listing, stat and upload latency grow with the number of entries in one directory."""
+import io
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats
+from .base import BenchmarkWorker
+from .connection import classify_error, connect_sftp
+from .plan import TestPlan, format_size, parse_size, test_file_name
+from .smallfile import PipelinedUploader
+
+OPERATIONS = ("listdir", "listdir_attr", "stat", "put")  # Measured at every level, in this order
+
+
+class DirScaleWorker(BenchmarkWorker):
+    """Worker thread for the directory scaling benchmark.
+
+    Fills the target directory level by level with parallel pipelined sessions (see PipelinedUploader) and measures
+    listdir, listdir_attr, stat of random entries and put of a new file on one otherwise idle session at every level,
+    so the latencies show the cost of the directory size alone. Entries that were already in the directory count
+    towards the levels. The probe files of put are removed again before the next level is filled.
+    """
+    TITLE = "directory scaling benchmark"
+    DEFAULT_PROBE_SIZE = 1024
+    DEGRADATION_FACTOR = 2.0  # p50 above this multiple of the first level's p50 marks the level where an operation degrades
+
+    def __init__(self, connections: int, host: str, port: int, directory: str, username: str, password: str,
+                 levels=(1000, 10000, 100000), samples: int = 10, window: int = 16, fill_size: int = 0,
+                 probe_size: int = None, cleanup_after_run: bool = False, connect_timeout: float = None,
+                 operation_timeout: float = None, success_criteria: dict = None):
+        super().__init__(success_criteria)
+        self.connections = connections
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.levels = sorted({int(level) for level in levels if int(level) > 0})
+        if not self.levels:
+            raise ValueError("The directory scaling benchmark needs at least one entry count greater than 0.")
+        self.samples = max(1, samples)  # Measurements of every operation per level
+        self.window = window  # Fill files in flight per session
+        self.fill_data = b"\0" * (fill_size or 0)
+        self.probe_data = b"\0" * (probe_size if probe_size is not None else self.DEFAULT_PROBE_SIZE)
+        self.cleanup_after_run = cleanup_after_run
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        self.created_files = []
+        self.results = []  # One entry per measured level, see _measure_level
+        self.fill_stats = OperationStats("Fill", self.spill)
+        self.delete_stats = None
+        self.failures = {}  # Error category -> count
+        self.files_filled = 0
+        self.fill_total = 0  # Fill files of the whole run, the largest level minus the entries found at the start
+        self._next_number = 0
+        self._random = random.Random(0)  # Same stat targets for the same directory contents
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        dirscale = point["dirscale"]
+        return cls(int(point["load"]["connections"]), target["host"], int(target["port"]), target["directory"],
+                   target["username"], TestPlan.resolve_password(target),
+                   levels=[parse_count(level) for level in dirscale["levels"]],
+                   samples=int(dirscale["samples"]),
+                   window=int(dirscale["window"]),
+                   fill_size=parse_size(dirscale.get("fill_size")) or 0,
+                   probe_size=parse_size(point["payload"].get("file_size")),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"))
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.fill_stats = OperationStats("Fill", self.spill)
+        self.delete_stats = None
+        self.failures = {}
+        self.created_files = []
+        self.results = []
+        self.files_filled = 0
+        self.fill_total = 0
+        self._next_number = 0
+        self.verdict = None
+        self.abort_reason = None
+        start_time = time.time()
+        end_time = None
+
+        self.log_signal.emit(f"Directory scaling: filling '{self.directory}' to {', '.join(str(level) for level in self.levels)} "
+                             f"entries with {self.connections} sessions ({self.window} files in flight each), measuring "
+                             f"{self.samples} samples of {', '.join(OPERATIONS)} ({format_size(len(self.probe_data))}) per level.")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        transport = None
+        sftp = None
+        try:
+            try:
+                transport, sftp = connect_sftp(self.host, self.port, self.username, self.password,
+                                               connect_timeout=self.connect_timeout, operation_timeout=self.operation_timeout,
+                                               connector=self.connector)
+                entries = len(sftp.listdir(self.directory))
+                self.fill_total = max(0, self.levels[-1] - entries)
+                if entries:
+                    self.log_signal.emit(f"'{self.directory}' already holds {entries} entries, they count towards the levels.")
+                for level in self.levels:
+                    if self.stop_event.is_set():
+                        break
+                    if level < entries:
+                        self.log_signal.emit(f"Skipping {level} entries, the directory already holds {entries}.")
+                        continue
+                    fill_time = self._fill(level - entries) if level > entries else 0.0
+                    if self.stop_event.is_set():
+                        break
+                    result = self._measure_level(sftp, level, fill_time)
+                    self.results.append(result)
+                    entries = result["entries"] if result["entries"] is not None else level
+                    self.log_signal.emit(self.format_level(result))
+            except Exception as e:
+                LIVE_METRICS.errors.inc(label_value=classify_error(e))
+                self.abort_reason = f"the probe session failed - {str(e) or type(e).__name__}"
+                self.log_signal.emit(f"Directory scaling failed - {str(e) or type(e).__name__}")
+            finally:
+                if sftp:
+                    sftp.close()
+                if transport:
+                    transport.close()
+            end_time = time.time()
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary():
+                self.log_signal.emit(line)
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.cleanup_after_run and self.created_files and not self.stop_event.is_set():
+                self.run_cleanup_phase()
+        finally:
+            run_finished.set()
+            self.network_monitor.stop()
+            self.network_monitor.wait()
+            if end_time is None:
+                end_time = time.time()
+            self.total_time = end_time - start_time
+            self.evaluate_thresholds()
+            if self.abort_reason and self.verdict is None:  # Fails without success criteria too
+                self.verdict = False
+                self.verdict_signal.emit(False, self.abort_reason)
+            self.log_signal.emit("=" * 50)
+            if self.abort_reason:
+                self.log_signal.emit(f"Directory scaling was aborted after {len(self.results)} levels in {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Directory scaling was canceled after {len(self.results)} levels in {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Completed directory scaling of {len(self.results)} levels in {self.total_time:.2f} seconds.")
+
+    def _fill(self, count):
+        """Uploads count new fill files with parallel sessions, returns the elapsed time."""
+        self.log_signal.emit(f"Filling {count} files...")
+        numbers = iter(range(self._next_number, self._next_number + count))
+        self._next_number += count
+        lock = threading.Lock()
+
+        def next_number():
+            with lock:
+                return next(numbers, None)
+
+        start = time.perf_counter()
+        sessions = min(self.connections, count)
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [executor.submit(self._fill_session, task_id, next_number) for task_id in range(sessions)]
+            for future in as_completed(futures):
+                future.result()
+        with lock:
+            unsent = sum(1 for _ in numbers)  # Left over when every session failed
+        if not self.stop_event.is_set():
+            self._fill_lost(unsent)
+        return time.perf_counter() - start
+
+    def _fill_session(self, task_id, next_number):
+        """Uploads fill files over one session until every number of the level is taken."""
+        if self.stop_event.is_set():
+            return
+        transport = None
+        sftp = None
+        sent = 0  # Files handed to the uploader
+        reported = 0  # Files reported through _filled
+
+        def filled(*args):
+            nonlocal reported
+            reported += 1
+            self._filled(*args)
+
+        try:
+            transport, sftp = connect_sftp(self.host, self.port, self.username, self.password,
+                                           connect_timeout=self.connect_timeout, operation_timeout=self.operation_timeout,
+                                           connector=self.connector)
+            LIVE_METRICS.active_sessions.inc()
+
+            def files():
+                nonlocal sent
+                while True:
+                    number = next_number()
+                    if number is None:
+                        return
+                    remote_path = f"{self.directory}/{test_file_name('dirscale.dat', number)}"
+                    self.created_files.append(remote_path)
+                    LIVE_METRICS.uploads_in_flight.inc()
+                    sent += 1
+                    yield remote_path, self.fill_data
+
+            PipelinedUploader(sftp, self.window).upload(files(), filled, self.stop_event)
+        except Exception as e:
+            self._record_failure(e, f"Fill session {task_id} failed")
+            LIVE_METRICS.uploads_in_flight.dec(sent - reported)
+            self._fill_lost(sent - reported)
+        finally:
+            if sftp:
+                sftp.close()
+                LIVE_METRICS.active_sessions.dec()
+            if transport:
+                transport.close()
+
+    def _filled(self, remote_path, start, end, nbytes, error):
+        LIVE_METRICS.uploads_in_flight.dec()
+        if error:
+            self.fill_stats.record_error()
+            self._record_failure(error, f"Filling '{remote_path}' failed")
+        else:
+            self.fill_stats.record(start, end, nbytes)
+            LIVE_METRICS.uploads.inc()
+        with self._lock:
+            self.files_filled += 1
+            done = self.files_filled
+        total = max(self.fill_total, done)  # Files of every level, without the entries the directory already held
+        if done * 100 // total != (done - 1) * 100 // total:
+            self.progress_signal.emit(min(100, done * 100 // total))
+
+    def _fill_lost(self, count):
+        """Counts fill files that were never uploaded because their session failed as fill errors."""
+        if count <= 0:
+            return
+        for _ in range(count):
+            self.fill_stats.record_error()
+        with self._lock:
+            self.files_filled += count
+            done = self.files_filled
+        self.progress_signal.emit(min(100, done * 100 // max(self.fill_total, done)))
+
+    def _record_failure(self, error, context):
+        category = classify_error(error)
+        LIVE_METRICS.errors.inc(label_value=category)
+        with self._lock:
+            first = category not in self.failures
+            self.failures[category] = self.failures.get(category, 0) + 1
+        if first:  # Only the first error of each kind, a full level would flood the log otherwise
+            self.log_signal.emit(f"First {category} error: {context} - {str(error) or type(error).__name__}")
+
+    def _measure_level(self, sftp, level, fill_time):
+        """Measures every operation samples times on the idle probe session, returns the result of the level."""
+        stats = {operation: OperationStats(f"{operation} at {level}") for operation in OPERATIONS}
+
+        def timed(operation, call):
+            start = time.perf_counter()
+            try:
+                value = call()
+            except Exception as e:
+                stats[operation].record_error()
+                self._record_failure(e, f"{operation} at {level} entries")
+                return None
+            stats[operation].record(start, time.perf_counter())
+            return value
+
+        names = None
+        for _ in range(self.samples):
+            if self.stop_event.is_set():
+                break
+            names = timed("listdir", lambda: sftp.listdir(self.directory)) or names
+            timed("listdir_attr", lambda: sftp.listdir_attr(self.directory))
+        for _ in range(self.samples if names else 0):
+            if self.stop_event.is_set():
+                break
+            name = self._random.choice(names)
+            timed("stat", lambda: sftp.stat(f"{self.directory}/{name}"))
+        probes = []
+        for sample in range(self.samples):
+            if self.stop_event.is_set():
+                break
+            remote_path = f"{self.directory}/{test_file_name('dirscale_probe.dat', level, sample)}"
+            if timed("put", lambda: sftp.putfo(io.BytesIO(self.probe_data), remote_path, file_size=len(self.probe_data))) is not None:
+                probes.append(remote_path)
+        for remote_path in probes:  # Outside the measurement, the next level starts from the same entry count
+            try:
+                sftp.remove(remote_path)
+            except (IOError, OSError):
+                self.created_files.append(remote_path)
+        filled = level - (len(names) if names else level)
+        return {
+            "level": level,
+            "entries": len(names) if names else None,
+            "fill_time": fill_time,
+            "missing": max(0, filled),  # Entries short of the level, e.g. after failed fill uploads
+            "operations": {operation: stats[operation].summary() for operation in OPERATIONS},
+        }
+
+    @staticmethod
+    def format_level(result):
+        parts = [f"{operation} p50 {summary['latency_p50'] * 1000:.1f} ms, p99 {summary['latency_p99'] * 1000:.1f} ms"
+                 for operation, summary in result["operations"].items() if summary["count"]]
+        entries = result["entries"] if result["entries"] is not None else "?"
+        fill = f", filled in {result['fill_time']:.1f}s" if result["fill_time"] else ""
+        return f"{entries} entries{fill}: " + ", ".join(parts)
+
+    def degradation(self):
+        """Returns {operation: (first level, its p50, last level, its p50, first level whose p50 exceeds
+        DEGRADATION_FACTOR times the first one or None)} over the measured levels."""
+        curves = {}
+        for operation in OPERATIONS:
+            points = [(result["level"], result["operations"][operation]["latency_p50"]) for result in self.results
+                      if result["operations"][operation]["count"]]
+            if len(points) < 2:
+                continue
+            (first_level, base), (last_level, last) = points[0], points[-1]
+            degraded = next((level for level, p50 in points[1:] if p50 > base * self.DEGRADATION_FACTOR), None)
+            curves[operation] = (first_level, base, last_level, last, degraded)
+        return curves
+
+    def format_summary(self):
+        fill = self.fill_stats.summary()
+        elapsed = fill["elapsed"]
+        lines = [f"Fill: {fill['count']} files, {fill['errors']} failed"
+                 + (f", {fill['count'] / elapsed:.1f} files/s" if elapsed > 0 else "")]
+        if self.results:
+            lines.append("Latency by directory entries (p50 / p99 in ms):")
+            lines.append("  " + f"{'entries':>10}" + "".join(f"{operation:>20}" for operation in OPERATIONS))
+            for result in self.results:
+                cells = []
+                for operation in OPERATIONS:
+                    summary = result["operations"][operation]
+                    cells.append(f"{summary['latency_p50'] * 1000:.1f} / {summary['latency_p99'] * 1000:.1f}"
+                                 if summary["count"] else "-")
+                entries = result["entries"] if result["entries"] is not None else result["level"]
+                lines.append("  " + f"{entries:>10}" + "".join(f"{cell:>20}" for cell in cells))
+        for result in self.results:
+            if result["missing"]:
+                lines.append(f"WARNING: the {result['level']} entries level was measured with {result['entries']} entries.")
+        curves = self.degradation()
+        for operation, (first_level, base, last_level, last, degraded) in curves.items():
+            growth = f"{last / base:.1f}x" if base > 0 else "n/a"
+            lines.append(f"{operation}: p50 {base * 1000:.1f} ms at {first_level} -> {last * 1000:.1f} ms at {last_level} "
+                         f"entries ({growth})" + (f", more than {self.DEGRADATION_FACTOR:g}x at {degraded} entries" if degraded else ""))
+        upload_levels = [curves[operation][4] for operation in ("stat", "put") if operation in curves and curves[operation][4]]
+        if upload_levels:
+            degraded = min(upload_levels)
+            below = max((result["level"] for result in self.results if result["level"] < degraded), default=self.levels[0])
+            lines.append(f"WARNING: stat and put slow down between {below} and {degraded} entries, shard directories that "
+                         f"hold more than {below} files.")
+        elif curves:
+            lines.append(f"stat and put stay within {self.DEGRADATION_FACTOR:g}x of {self.results[0]['level']} entries up to "
+                         f"{self.results[-1]['level']} entries.")
+        if self.failures:
+            lines.append("Failures by category: " + ", ".join(f"{category} {count}" for category, count in sorted(self.failures.items())))
+        return lines
+
+    def slo_metrics(self):
+        """Latencies at the largest measured level, the error rate over fill and measurements."""
+        fill = self.fill_stats.summary()
+        errors = fill["errors"]
+        attempts = fill["count"] + fill["errors"]
+        metrics = {}
+        for result in self.results:
+            for operation, summary in result["operations"].items():
+                errors += summary["errors"]
+                attempts += summary["count"] + summary["errors"]
+                if summary["count"]:
+                    metrics[f"{operation}_latency_p50"] = summary["latency_p50"]
+                    metrics[f"{operation}_latency_p99"] = summary["latency_p99"]
+        metrics["error_rate"] = errors / attempts if attempts else 0.0
+        metrics["samples"] = attempts
+        return metrics
+
+    def result(self):
+        return {
+            "mode": "dirscale",
+            "connections": self.connections,
+            "levels": list(self.results),
+            "degradation": {operation: {"first_level": curve[0], "first_p50": curve[1], "last_level": curve[2],
+                                        "last_p50": curve[3], "degraded_at": curve[4]}
+                            for operation, curve in self.degradation().items()},
+            "total_time": self.total_time,
+            "failures": dict(self.failures),
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "fill": self.fill_stats.summary(),
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+        }
+
+    @staticmethod
+    def describe_result(result):
+        if not result["levels"]:
+            return f"{result['label']}: no level measured"
+        first, last = result["levels"][0], result["levels"][-1]
+        parts = [f"{operation} p50 {first['operations'][operation]['latency_p50'] * 1000:.1f} -> "
+                 f"{last['operations'][operation]['latency_p50'] * 1000:.1f} ms" for operation in OPERATIONS]
+        return f"{result['label']}: {first['level']} -> {last['level']} entries, " + ", ".join(parts)
+
+    @staticmethod
+    def report_row(result):
+        last = result["levels"][-1] if result["levels"] else None
+        row = {
+            "label": result["label"],
+            "connections": result["connections"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "levels": len(result["levels"]),
+            "entries": (last["entries"] if last["entries"] is not None else last["level"]) if last else "",
+            "fill_files": result["fill"]["count"],
+            "fill_errors": result["fill"]["errors"],
+        }
+        for operation in OPERATIONS:
+            summary = last["operations"][operation] if last else None
+            curve = result["degradation"].get(operation)
+            row[f"{operation}_p50_ms"] = f"{summary['latency_p50'] * 1000:.1f}" if summary and summary["count"] else ""
+            row[f"{operation}_p99_ms"] = f"{summary['latency_p99'] * 1000:.1f}" if summary and summary["count"] else ""
+            row[f"{operation}_growth"] = (f"{curve['last_p50'] / curve['first_p50']:.1f}"
+                                          if curve and curve["first_p50"] > 0 else "")
+        row["verdict"] = {True: "pass", False: "fail", None: ""}[result.get("verdict")]
+        return row
+
+
+def parse_count(value):
+    """Converts entry counts like 1000, "10k" or "1M" into a number."""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().upper().replace("_", "")
+    for suffix, factor in (("K", 1000), ("M", 1000 ** 2)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
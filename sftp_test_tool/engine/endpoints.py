@@ -0,0 +1,205 @@
+"""Cluster targets: several endpoints of one service, how sessions are spread over them and per-backend results."""
+import socket
+import statistics
+import threading
+from collections import namedtuple
+
+from ..metrics.stats import OperationStats
+
+# Where sessions go: every session to the first endpoint (a load balancer VIP), in turn or in proportion to the weights
+BALANCING = ("vip", "round-robin", "weighted")
+
+Endpoint = namedtuple("Endpoint", "host port weight", defaults=(1,))
+
+
+def parse_endpoints(value, default_port):
+    """Parses the endpoints of a target: a list of "host", "host:port", "host:port*weight" or
+    {"host": ..., "port": ..., "weight": ...}, or one comma separated string of them."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [part for part in value.split(",") if part.strip()]
+    endpoints = []
+    for item in value:
+        if isinstance(item, dict):
+            endpoints.append(Endpoint(item["host"], int(item.get("port") or default_port), float(item.get("weight", 1))))
+            continue
+        text, _, weight = str(item).strip().partition("*")
+        host, port = text, default_port
+        if text.startswith("["):  # [IPv6]:port
+            host, _, rest = text[1:].partition("]")
+            port = int(rest[1:]) if rest.startswith(":") else default_port
+        elif text.count(":") == 1:
+            host, port = text.split(":")
+        endpoints.append(Endpoint(host, int(port), float(weight) if weight else 1))
+    for endpoint in endpoints:
+        if endpoint.weight <= 0:
+            raise ValueError(f"The weight of endpoint {endpoint.host}:{endpoint.port} must be greater than 0.")
+    return endpoints
+
+
+def resolve_endpoints(endpoints):
+    """Replaces every endpoint by one per address (A and AAAA records) of its name, keeping port and weight."""
+    resolved = []
+    for endpoint in endpoints:
+        infos = socket.getaddrinfo(endpoint.host, endpoint.port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))  # Unique, in resolver order
+        resolved.extend(Endpoint(address, endpoint.port, endpoint.weight) for address in addresses)
+    return resolved
+
+
+def format_endpoint(endpoint):
+    host = f"[{endpoint.host}]" if ":" in endpoint.host else endpoint.host
+    return f"{host}:{endpoint.port}"
+
+
+class EndpointSelector:
+    """Hands out the endpoint of every new session, thread-safe.
+
+    weighted uses smooth weighted round-robin (as nginx does): with weights 2 and 1 the order is a, b, a, a, b, a, ...
+    so the share of every endpoint matches its weight at any point of the run, not only at the end.
+    """
+
+    def __init__(self, endpoints, balancing="round-robin"):
+        if balancing not in BALANCING:
+            raise ValueError(f"Unknown balancing '{balancing}', expected one of: {', '.join(BALANCING)}")
+        if not endpoints:
+            raise ValueError("At least one endpoint is required.")
+        self.endpoints = endpoints if balancing != "vip" else endpoints[:1]
+        self.balancing = balancing
+        self._current = [0.0] * len(self.endpoints)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def expected_shares(self):
+        """Share of the sessions every endpoint should get."""
+        if self.balancing == "weighted":
+            total = sum(endpoint.weight for endpoint in self.endpoints)
+            return {endpoint: endpoint.weight / total for endpoint in self.endpoints}
+        return {endpoint: 1 / len(self.endpoints) for endpoint in self.endpoints}
+
+    def next(self):
+        with self._lock:
+            if self.balancing == "weighted":
+                total = 0.0
+                for index, endpoint in enumerate(self.endpoints):
+                    self._current[index] += endpoint.weight
+                    total += endpoint.weight
+                index = max(range(len(self.endpoints)), key=self._current.__getitem__)
+                self._current[index] -= total
+                return self.endpoints[index]
+            endpoint = self.endpoints[self._next % len(self.endpoints)]
+            self._next += 1
+            return endpoint
+
+    def describe(self):
+        if self.balancing == "vip":
+            return f"all sessions via {format_endpoint(self.endpoints[0])}"
+        weights = self.balancing == "weighted"
+        return f"{self.balancing} over " + ", ".join(
+            format_endpoint(endpoint) + (f" (weight {endpoint.weight:g})" if weights else "") for endpoint in self.endpoints)
+
+
+class BackendStats:
+    """Sessions, uploads and errors per backend.
+
+    A backend is an endpoint together with the host key it presented, so nodes behind one VIP are told apart as long
+    as they do not share their host key. Sessions that failed before the key exchange are added to the endpoint's
+    backend when it has exactly one, otherwise they count for the endpoint alone.
+    """
+    SLOW_FACTOR = 2.0  # p99 latency above this multiple of the median of all backends marks a backend as slow
+    ERROR_RATE = 0.05  # Share of failed tasks that marks a backend as unhealthy
+    IMBALANCE = 0.25  # Relative deviation from the expected share of sessions that marks the spread as unbalanced
+
+    def __init__(self, spill=None):
+        self.spill = spill
+        self.stats = {}  # (endpoint label, fingerprint or None) -> OperationStats
+        self.sessions = {}  # Same keys -> opened sessions
+        self._lock = threading.Lock()
+
+    def _stats(self, key):
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = OperationStats(self.label(key), self.spill)
+                self.sessions[key] = 0
+            return stats
+
+    @staticmethod
+    def label(key):
+        endpoint, fingerprint = key
+        return f"{endpoint} {fingerprint}" if fingerprint else endpoint
+
+    def session_opened(self, key):
+        self._stats(key)
+        with self._lock:
+            self.sessions[key] += 1
+
+    def record(self, key, start, end, nbytes):
+        self._stats(key).record(start, end, nbytes)
+
+    def record_error(self, key):
+        self._stats(key).record_error()
+
+    def summary(self):
+        """Returns the summary of every backend, keyed by its label."""
+        with self._lock:
+            items = dict(self.stats)
+            sessions = dict(self.sessions)
+        backends = {}  # Endpoint label -> its keys with a fingerprint
+        for endpoint, fingerprint in items:
+            if fingerprint:
+                backends.setdefault(endpoint, []).append((endpoint, fingerprint))
+        summary = {}
+        for key, stats in items.items():
+            endpoint, fingerprint = key
+            if fingerprint is None and len(backends.get(endpoint, ())) == 1:
+                continue  # Merged into the only backend of the endpoint below
+            unknown = items.get((endpoint, None)) if fingerprint and len(backends[endpoint]) == 1 else None
+            if unknown is not None:
+                merged = OperationStats(self.label(key))
+                merged.merge(stats)
+                merged.merge(unknown)
+                stats = merged
+            summary[self.label(key)] = {**stats.summary(), "sessions": sessions[key]}  # Failed sessions never opened
+        return summary
+
+    def format_summary(self, expected_shares=None):
+        """Returns log lines with one line per backend and warnings for slow, failing or unevenly used backends.
+
+        expected_shares maps endpoint labels to the share of sessions they should get, None skips the balance check.
+        """
+        summary = self.summary()
+        if len(summary) < 2:
+            return []
+        total_sessions = sum(backend["sessions"] for backend in summary.values()) or 1
+        lines = [f"Backends: {len(summary)}"]
+        for label, backend in sorted(summary.items()):
+            lines.append(f"  {label}: {backend['sessions']} sessions ({backend['sessions'] / total_sessions * 100:.0f}%), "
+                         f"{backend['count']} uploads, {backend['errors']} errors, "
+                         f"{backend['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, p50 {backend['latency_p50'] * 1000:.1f} ms, "
+                         f"p99 {backend['latency_p99'] * 1000:.1f} ms")
+        p99s = [backend["latency_p99"] for backend in summary.values() if backend["count"]]
+        median_p99 = statistics.median(p99s) if p99s else 0.0
+        for label, backend in sorted(summary.items()):
+            attempts = backend["count"] + backend["errors"]
+            if attempts and backend["errors"] / attempts > self.ERROR_RATE:
+                lines.append(f"WARNING: backend {label} failed {backend['errors'] / attempts * 100:.1f}% of its tasks.")
+            if len(p99s) > 1 and backend["count"] and backend["latency_p99"] > self.SLOW_FACTOR * median_p99:
+                lines.append(f"WARNING: backend {label} is slow, p99 {backend['latency_p99'] * 1000:.1f} ms against a median "
+                             f"of {median_p99 * 1000:.1f} ms over all backends.")
+        if expected_shares:
+            sessions_by_endpoint = {}
+            for label, backend in summary.items():
+                endpoint = label.split(" ", 1)[0]
+                sessions_by_endpoint[endpoint] = sessions_by_endpoint.get(endpoint, 0) + backend["sessions"]
+            for endpoint, share in expected_shares.items():
+                actual = sessions_by_endpoint.get(endpoint, 0) / total_sessions
+                if abs(actual - share) > self.IMBALANCE * share:
+                    lines.append(f"WARNING: endpoint {endpoint} got {actual * 100:.0f}% of the sessions, "
+                                 f"{share * 100:.0f}% were expected.")
+        fingerprints = {label.split(" ", 1)[1] for label in summary if " " in label}
+        endpoints = {label.split(" ", 1)[0] for label in summary}
+        if len(endpoints) == 1 and len(fingerprints) > 1:
+            lines.append(f"{len(fingerprints)} host keys behind {next(iter(endpoints))}, every host key is counted as one backend.")
+        return lines
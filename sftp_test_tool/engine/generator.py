@@ -0,0 +1,65 @@
+"""Generating dummy test files on disk."""
+import os
+import random
+
+from PySide6.QtCore import QThread, Signal
+
+from .workload import new_seed
+
+
+class DummyFileWorker(QThread):
+    """Worker thread for dummy file generation"""
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    finished_signal = Signal()
+    
+    def __init__(self, amount_of_files, file_name, save_path, file_size_suffix_index, size_in_mb, seed=None):
+        super().__init__()
+        self.amount_of_files = amount_of_files
+        self.file_name = file_name
+        self.save_path = save_path
+        self.file_size_suffix_index = file_size_suffix_index
+        self.size_in_mb = size_in_mb
+        self.seed = seed if seed is not None else new_seed()  # Random sizes repeat for the same seed
+        
+    def run(self):
+        """Create dummy files with the specified parameters"""
+        try:
+            os.makedirs(self.save_path, exist_ok=True)
+            rng = random.Random(self.seed)
+            if self.size_in_mb == "random":
+                self.log_signal.emit(f"Random sizes use seed {self.seed}, the same seed creates the same file sizes again.")
+            initial_chuck_size = 1024 if self.file_size_suffix_index == 0 else 1 if self.file_size_suffix_index == 1 else 1024
+            for i in range(1, self.amount_of_files + 1):
+                save_to = os.path.join(self.save_path, f"{self.file_name}_{i}.txt")
+                
+                if isinstance(self.size_in_mb, int):
+                    file_size = self.size_in_mb
+                elif self.size_in_mb.lower() == "random":
+                    file_size = rng.randint(1, 25)
+                    self.log_signal.emit(f"File {i}: Using random size of {file_size} MB")
+                else:
+                    file_size = int(self.size_in_mb)
+                
+                self.log_signal.emit(f"Creating file {i}/{self.amount_of_files}")
+                
+                with open(save_to, 'wb') as f:
+                    # Write in chunks to avoid memory issues with large files
+                    chunk_size = initial_chuck_size * 1024  # 1 MB or 1KB ---> Depends on the index of the combobox in previous class
+                    for j in range(file_size):
+                        f.write(b'\0' * chunk_size)
+                        # Update progress more granularly for large files
+                        if file_size > 10:
+                            sub_progress = int((i-1) / self.amount_of_files * 100) + int(j / file_size * (100 / self.amount_of_files))
+                            self.progress_signal.emit(sub_progress)
+                
+                # Update progress
+                overall_progress = int(i / self.amount_of_files * 100)
+                self.progress_signal.emit(overall_progress)
+                
+            self.log_signal.emit(f"Successfully created {self.amount_of_files} dummy files in {self.save_path}")
+            self.finished_signal.emit()
+            
+        except Exception as e:
+            self.log_signal.emit(f"Error creating dummy files: {str(e)}")
+            self.finished_signal.emit()
@@ -0,0 +1,233 @@
+"""Handshake benchmark: TCP connect, SSH handshake and authentication without transferring data."""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats
+from .base import BenchmarkWorker
+from .connection import classify_error, connect_sftp
+from .plan import TestPlan
+from .shaping import NetworkShaper
+
+
+class HandshakeWorker(BenchmarkWorker):
+    """Worker thread for the handshake benchmark: TCP connect, SSH key exchange and auth as fast as possible, no data"""
+    TITLE = "handshake benchmark"
+    PHASES = ("tcp_connect", "ssh_handshake", "auth", "sftp_open")
+    # Categories where the server turned the connection away instead of failing it later
+    REFUSALS = ("connection_refused", "connection_reset", "banner", "channel_refused")
+
+    def __init__(self, concurrency: int, host: str, port: int, username: str, password: str, attempts: int = 1000,
+                 duration: float = None, open_sftp: bool = True, connect_timeout: float = None,
+                 success_criteria: dict = None, shaper: "NetworkShaper" = None):
+        super().__init__(success_criteria)
+        self.concurrency = concurrency
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.attempts = attempts  # Total handshakes, None or 0 runs until duration is over
+        self.duration = duration  # Seconds, None runs until all attempts are done
+        self.open_sftp = open_sftp  # Also request the SFTP subsystem after auth
+        self.connect_timeout = connect_timeout
+        self.shaper = shaper
+        self.handshake_stats = OperationStats("Handshake", self.spill)
+        self.phase_stats = {phase: OperationStats(phase) for phase in self.PHASES}
+        self.failures = {}  # Error category -> count
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        handshake = point["handshake"]
+        return cls(int(point["load"]["connections"]), target["host"], int(target["port"]), target["username"],
+                   TestPlan.resolve_password(target),
+                   attempts=int(handshake["attempts"]) if handshake.get("attempts") else None,
+                   duration=float(handshake["duration"]) if handshake.get("duration") else None,
+                   open_sftp=bool(handshake.get("open_sftp", True)),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   success_criteria=point.get("success_criteria"),
+                   shaper=NetworkShaper.from_settings(point.get("network")))
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.handshake_stats = OperationStats("Handshake", self.spill)
+        self.phase_stats = {phase: OperationStats(phase) for phase in self.PHASES}
+        self.failures = {}
+        self.verdict = None
+        self.abort_reason = None
+        self._progress = -1
+        if not self.attempts and not self.duration:
+            self.attempts = 1000
+
+        limits = " and ".join(part for part in (f"{self.attempts} handshakes" if self.attempts else "",
+                                                  f"{self.duration:g} seconds" if self.duration else "") if part)
+        self.log_signal.emit(f"Handshake benchmark: {limits} with {self.concurrency} concurrent connections, "
+                             f"{'with' if self.open_sftp else 'without'} SFTP subsystem.")
+        if self.shaper:
+            self.log_signal.emit(f"WAN emulation: {self.shaper.describe()}")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        attempt_numbers = itertools.count()
+        start_time = time.time()
+        deadline = time.perf_counter() + self.duration if self.duration else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for future in [executor.submit(self._handshake_loop, attempt_numbers, deadline) for _ in range(self.concurrency)]:
+                    future.result()
+        except Exception as e:
+            self.log_signal.emit(f"Handshake benchmark failed: {str(e)}")
+        finally:
+            run_finished.set()
+            self.network_monitor.stop()
+            self.network_monitor.wait()
+            self.total_time = time.time() - start_time
+
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary():
+                self.log_signal.emit(line)
+            self.evaluate_thresholds()
+            summary = self.handshake_stats.summary()
+            done = summary["count"] + summary["errors"]
+            self.log_signal.emit("=" * 50)
+            if self.abort_reason:
+                self.log_signal.emit(f"Handshake benchmark was aborted after {done} handshakes in {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Handshake benchmark was canceled after {done} handshakes in {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Completed {done} handshakes in {self.total_time:.2f} seconds.")
+
+    def _handshake_loop(self, attempt_numbers, deadline):
+        """Runs handshakes back to back on one worker thread until the attempts or the duration are used up."""
+        while not self.stop_event.is_set():
+            attempt = next(attempt_numbers)  # itertools.count is atomic under the GIL
+            if self.attempts and attempt >= self.attempts:
+                return
+            if deadline and time.perf_counter() >= deadline:
+                return
+            self._handshake(attempt)
+            if self.attempts:
+                progress = int((attempt + 1) / self.attempts * 100)
+            else:
+                progress = int(min(1.0, 1 - (deadline - time.perf_counter()) / self.duration) * 100)
+            if progress != self._progress:  # Refused connections fail thousands of times per second
+                self._progress = progress
+                self.progress_signal.emit(progress)
+
+    def _handshake(self, attempt):
+        """Opens and immediately closes one authenticated connection, recording its latency or failure category."""
+        transport = None
+        sftp = None
+        start = time.perf_counter()
+        try:
+            if self.shaper:
+                self.shaper.inject_delay(round_trips=4 if self.open_sftp else 3)
+            transport, sftp = connect_sftp(self.host, self.port, self.username, self.password,
+                                           connect_timeout=self.connect_timeout, phase_timer=self._record_phase,
+                                           open_sftp=self.open_sftp, connector=self.connector)
+            end = time.perf_counter()
+            self.handshake_stats.record(start, end)
+            LIVE_METRICS.recent_latencies.append(end - start)
+        except Exception as e:
+            category = classify_error(e)
+            self.handshake_stats.record_error()
+            LIVE_METRICS.errors.inc(label_value=category)
+            with self._lock:
+                first = category not in self.failures
+                self.failures[category] = self.failures.get(category, 0) + 1
+            if first:  # Only the first error of each kind, a storm would flood the log otherwise
+                self.log_signal.emit(f"Handshake {attempt}: first {category} error - {str(e) or type(e).__name__}")
+        finally:
+            if sftp:
+                sftp.close()
+            if transport:
+                transport.close()
+
+    def _record_phase(self, phase, start, end):
+        self.phase_stats[phase].record(start, end)
+        LIVE_METRICS.phase_latency.observe(end - start, phase)
+
+    def _rates(self, summary):
+        """Returns handshakes per second over the wall clock time and the refusal rate of a handshake summary."""
+        attempts = summary["count"] + summary["errors"]
+        with self._lock:
+            refused = sum(count for category, count in self.failures.items() if category in self.REFUSALS)
+        elapsed = self.total_time or summary["elapsed"]
+        return (summary["count"] / elapsed if elapsed > 0 else 0.0), (refused / attempts if attempts else 0.0)
+
+    def format_summary(self):
+        """Returns the log lines of the handshake summary, phase breakdown and failures by category."""
+        summary = self.handshake_stats.summary()
+        per_second, refusal_rate = self._rates(summary)
+        attempts = summary["count"] + summary["errors"]
+        lines = [f"Handshakes: {summary['count']} ok, {summary['errors']} failed of {attempts} | {per_second:.1f} handshakes/s | "
+                 f"refusal rate {refusal_rate * 100:.2f}%",
+                 f"Handshake latency: mean {summary['latency_mean'] * 1000:.1f} ms, p50 {summary['latency_p50'] * 1000:.1f} ms, "
+                 f"p95 {summary['latency_p95'] * 1000:.1f} ms, p99 {summary['latency_p99'] * 1000:.1f} ms, max {summary['latency_max'] * 1000:.1f} ms"]
+        for phase, stats in self.phase_stats.items():
+            phase_summary = stats.summary()
+            if phase_summary["count"]:
+                lines.append(f"  {phase}: mean {phase_summary['latency_mean'] * 1000:.1f} ms, p50 {phase_summary['latency_p50'] * 1000:.1f} ms, "
+                             f"p99 {phase_summary['latency_p99'] * 1000:.1f} ms")
+        if self.failures:
+            lines.append("Failures by category: " + ", ".join(f"{category} {count}" for category, count in sorted(self.failures.items())))
+        return lines
+
+    def slo_metrics(self):
+        summary = self.handshake_stats.summary()
+        per_second, refusal_rate = self._rates(summary)
+        attempts = summary["count"] + summary["errors"]
+        return {
+            "handshake_latency_p50": summary["latency_p50"],
+            "handshake_latency_p99": summary["latency_p99"],
+            "handshakes_per_sec": per_second,
+            "refusal_rate": refusal_rate,
+            "error_rate": summary["errors"] / attempts if attempts else 0.0,
+            "samples": attempts,
+        }
+
+    def result(self):
+        summary = self.handshake_stats.summary()
+        per_second, refusal_rate = self._rates(summary)
+        return {
+            "mode": "handshake",
+            "connections": self.concurrency,
+            "open_sftp": self.open_sftp,
+            "total_time": self.total_time,
+            "handshakes_per_sec": per_second,
+            "refusal_rate": refusal_rate,
+            "failures": dict(self.failures),
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "handshake": summary,
+            "series": self.handshake_stats.per_second(),
+            "phases": {phase: stats.summary() for phase, stats in self.phase_stats.items()},
+        }
+
+    @staticmethod
+    def describe_result(result):
+        handshake = result["handshake"]
+        return (f"{result['label']}: {handshake['count']} handshakes, {handshake['errors']} errors, "
+                f"{result['handshakes_per_sec']:.1f} handshakes/s, refusal rate {result['refusal_rate'] * 100:.2f}%, "
+                f"p99 {handshake['latency_p99'] * 1000:.1f} ms")
+
+    @staticmethod
+    def report_row(result):
+        handshake = result["handshake"]
+        return {
+            "label": result["label"],
+            "connections": result["connections"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "handshakes": handshake["count"],
+            "handshake_errors": handshake["errors"],
+            "handshakes_per_sec": f"{result['handshakes_per_sec']:.1f}",
+            "refusal_rate": f"{result['refusal_rate']:.4f}",
+            "latency_p50_ms": f"{handshake['latency_p50'] * 1000:.1f}",
+            "latency_p99_ms": f"{handshake['latency_p99'] * 1000:.1f}",
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
@@ -0,0 +1,150 @@
+"""Test modes and the sweep worker that runs every point of a test plan."""
+import threading
+import time
+
+from PySide6.QtCore import QThread, Signal
+
+from ..metrics.timeline import TimelineRecorder
+from .autotune import AutoTuneWorker
+from .dirscale import DirScaleWorker
+from .handshake import HandshakeWorker
+from .plan import parse_thresholds, write_run_report
+from .smallfile import SmallFileWorker
+from .soak import SoakWorker
+from .sockets import SocketConnector
+from .replay import ReplayWorker
+from .upload import SFTPWorker
+from .workload import TraceRecorder
+
+
+# Test plan "mode" -> worker class, every class provides from_plan, result, describe_result and report_row
+WORKER_MODES = {"upload": SFTPWorker, "handshake": HandshakeWorker, "smallfile": SmallFileWorker, "soak": SoakWorker,
+                "replay": ReplayWorker, "autotune": AutoTuneWorker, "dirscale": DirScaleWorker}
+
+
+def validate_points(points):
+    """Checks the mode and success criteria of every (label, point) of an expanded plan before anything runs, raises
+    ValueError naming the first broken point. A plan whose gates can not be evaluated must not start at all."""
+    for label, point in points:
+        try:
+            mode = point.get("mode", "upload")
+            if mode not in WORKER_MODES:
+                raise ValueError(f"Unknown test mode '{mode}', expected one of: {', '.join(WORKER_MODES)}")
+            parse_thresholds(point.get("success_criteria"))
+        except ValueError as e:
+            raise ValueError(f"Sweep point '{label}': {str(e)}") from e
+
+
+def create_worker(point):
+    """Creates the worker of the test mode of one resolved test plan point."""
+    mode = point.get("mode", "upload")
+    if mode not in WORKER_MODES:
+        raise ValueError(f"Unknown test mode '{mode}', expected one of: {', '.join(WORKER_MODES)}")
+    worker = WORKER_MODES[mode].from_plan(point)
+    worker.run_name = point.get("label") or worker.TITLE
+    profiling = point.get("profiling") or {}
+    if profiling.get("enabled"):
+        worker.profiling = float(profiling.get("interval_ms") or 10) / 1000
+    if profiling.get("timeline") and mode in ("upload", "replay"):
+        worker.timeline = TimelineRecorder(worker.run_name)
+    worker.record_operations = bool(profiling.get("operations"))
+    worker.connector = SocketConnector.from_settings(point.get("socket"))
+    if (point.get("workload") or {}).get("record_trace") and mode == "upload":
+        worker.trace_recorder = TraceRecorder()
+    return worker
+
+
+class SweepWorker(QThread):
+    """Runs every scenario and sweep point of a test plan back to back and writes a combined report"""
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    finished_signal = Signal(float)
+    statusbar_signal = Signal(str, int)
+    statusbar_hidden_state = Signal(bool)
+    verdict_signal = Signal(bool, str)
+
+    def __init__(self, plan):
+        super().__init__()
+        self.plan = plan
+        self.results = []
+        self.report_path = None
+        self.verdict = None
+        self.errors = []  # Points that could not run, they fail the plan
+        self.current_worker = None
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        """Cancels the running sweep point and skips the remaining ones."""
+        self.stop_event.set()
+        if self.current_worker:
+            self.current_worker.cancel()
+
+    def run(self):
+        start_time = time.time()
+        self.results = []
+        self.errors = []
+        self.verdict = None
+        try:
+            self._run_points()
+        except Exception as e:  # A broken plan must end the run as failed, never look like one without criteria
+            self.errors.append(str(e) or type(e).__name__)
+            self.verdict = False
+            self.log_signal.emit(f"ERROR: Test plan failed - {self.errors[-1]}")
+            self.verdict_signal.emit(False, self.errors[-1])
+        finally:
+            self.finished_signal.emit(time.time() - start_time)
+
+    def _run_points(self):
+        points = self.plan.expand()
+        validate_points(points)
+        self.log_signal.emit(f"Running test plan '{self.plan.name}' with {len(points)} sweep points...")
+
+        failed = []  # Labels of points that failed their criteria or could not run
+        for index, (label, point) in enumerate(points):
+            if self.stop_event.is_set():
+                self.log_signal.emit("Test plan canceled, remaining sweep points skipped.")
+                break
+            self.log_signal.emit("#" * 50)
+            self.log_signal.emit(f"Sweep point {index + 1}/{len(points)}: {label}")
+
+            try:
+                worker = create_worker(point)  # Own stop event, an early abort only ends this point
+                self.current_worker = worker
+                worker.log_signal.connect(self.log_signal)
+                worker.statusbar_hidden_state.connect(self.statusbar_hidden_state)
+                worker.network_monitor.status_signal.connect(self.statusbar_signal)
+                if self.stop_event.is_set():
+                    break
+                worker.run()  # Runs synchronously inside this thread, points never overlap
+                result = worker.result()
+            except Exception as e:
+                self.errors.append(f"{label}: {str(e) or type(e).__name__}")
+                self.log_signal.emit(f"ERROR: Sweep point '{label}' failed - {str(e) or type(e).__name__}")
+                failed.append(label)
+                continue
+            finally:
+                self.current_worker = None
+                self.progress_signal.emit(int((index + 1) / len(points) * 100))
+
+            result["label"] = label
+            result["parameters"] = point["parameters"]
+            self.results.append(result)
+            if result["verdict"] is False:
+                failed.append(label)
+
+        self.log_signal.emit("#" * 50)
+        self.log_signal.emit(f"Combined report for '{self.plan.name}':")
+        for result in self.results:
+            verdict = {True: " | PASSED", False: " | FAILED", None: ""}[result["verdict"]]
+            self.log_signal.emit(WORKER_MODES[result["mode"]].describe_result(result) + verdict)
+        try:
+            self.report_path = write_run_report(self.plan.name, self.results)
+            self.log_signal.emit(f"Report written to '{self.report_path}'.")
+        except OSError as e:
+            self.log_signal.emit(f"Could not write report - {str(e)}")
+
+        verdicts = [result["verdict"] for result in self.results if result["verdict"] is not None]
+        if verdicts or self.errors:
+            self.verdict = all(verdicts) and not self.errors
+            self.log_signal.emit(f"Test plan verdict: {'PASSED' if self.verdict else 'FAILED'}")
+            self.verdict_signal.emit(self.verdict, ", ".join(failed))
@@ -0,0 +1,98 @@
+"""Upload payloads: generated in-memory files and indexed folders of test files."""
+import os
+import random
+from collections import namedtuple
+
+from PySide6.QtCore import QThread, Signal
+
+
+class GeneratedPayload:
+    """Read-only file object producing size bytes in memory, used with putfo instead of a local test file.
+
+    The content is zeros, or with a seed a pseudo-random block that is the same for the same seed, so servers that
+    compress or deduplicate see reproducible, incompressible data.
+    """
+    _CHUNK = b"\0" * 32768
+    BLOCK_SIZE = 1024 * 1024  # Seeded content repeats after this many bytes
+
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.position = 0
+        self._block = random.Random(seed).randbytes(max(1, min(size, self.BLOCK_SIZE))) if seed is not None else None
+
+    def read(self, size=-1):
+        remaining = self.size - self.position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        offset = self.position
+        self.position += size
+        if self._block is None:
+            return self._CHUNK[:size] if size <= len(self._CHUNK) else b"\0" * size
+        offset %= len(self._block)
+        data = self._block[offset:offset + size]
+        while len(data) < size:
+            data += self._block[:size - len(data)]
+        return data
+
+
+class DiscardingSink:
+    """Write-only file object that drops the data, used with getfo to download without touching the disk"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+
+FileEntry = namedtuple("FileEntry", "name path size")
+
+
+class FileIndex:
+    """Immutable snapshot of the regular files of a folder, scanned once per run and shared by all tasks"""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = tuple(entries)
+        self.total_bytes = sum(entry.size for entry in self.entries)
+
+    @classmethod
+    def scan(cls, path):
+        """Reads names and sizes in a single os.scandir pass, sorted by name for a stable upload order."""
+        with os.scandir(path) as iterator:
+            entries = [FileEntry(entry.name, entry.path, entry.stat().st_size) for entry in iterator if entry.is_file()]
+        entries.sort(key=lambda entry: entry.name)
+        return cls(path, entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def get_files(files_path):
+    """Get all files with their sizes as list of FileEntry from the specified directory"""
+    try:
+        return list(FileIndex.scan(files_path).entries)
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def count_files(files_path):
+    """Counts the regular files of a directory in one scandir pass without building a list"""
+    with os.scandir(files_path) as entries:
+        return sum(1 for entry in entries if entry.is_file())
+
+
+class FileCountWorker(QThread):
+    """Counts the files of a folder off the GUI thread, used for the test file input"""
+    result_signal = Signal(str, int)  # path, number of files (-1 if the folder can't be read)
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def run(self):
+        try:
+            self.result_signal.emit(self.path, count_files(self.path))
+        except OSError:
+            self.result_signal.emit(self.path, -1)
@@ -0,0 +1,203 @@
+"""End-to-end delivery latency: how long uploaded files wait in the inbox until a downstream consumer picks them up."""
+import posixpath
+import threading
+import time
+
+from ..metrics.stats import OperationStats
+
+
+def backlog_bucket(backlog):
+    """Groups the number of files waiting at upload time in powers of two: 0, 1, 2-3, 4-7, ..."""
+    if backlog < 2:
+        return str(backlog)
+    low = 1 << (backlog.bit_length() - 1)
+    return f"{low}-{2 * low - 1}"
+
+
+class PickupMonitor:
+    """Polls the directories of uploaded files until every file is gone (picked up) or its timeout is over.
+
+    A background thread lists every directory with waiting files once per poll interval, one listing per directory no
+    matter how many files wait in it, instead of one stat per file: listdir_attr (SSH_FXP_READDIR) for SFTP and SCP,
+    NLST for FTPS. Files are polled through the endpoint they were uploaded to, every endpoint gets its own session,
+    so nodes of a cluster that do not share their storage are watched too. A file counts as picked up at the
+    middle between the last listing that still showed it and the first one that did not, so the error is at most half
+    a poll interval. Latencies are also grouped by the backlog at upload time, the files of the run still waiting
+    then, which shows how the consumer keeps up as the load grows. With an archive directory, files that show up
+    there are counted as archived, the others as removed.
+    """
+
+    def __init__(self, open_session, poll_interval=0.5, timeout=300.0, archive=None, log=None, spill=None):
+        self.open_session = open_session  # Callable taking the endpoint passed to watch, returns a new TransferSession
+        self.poll_interval = float(poll_interval)
+        self.timeout = float(timeout)
+        self.archive = archive or None
+        self.log = log or (lambda message: None)
+        self.stats = OperationStats("Pickup", spill)  # Errors are files that were not picked up within the timeout
+        self.listing_stats = OperationStats("Pickup listing")
+        self.by_backlog = {}  # Backlog bucket -> OperationStats
+        self.archived = 0
+        self.unresolved = 0  # Files still waiting when the run was canceled
+        self.poll_errors = 0
+        self._pending = {}  # (endpoint, remote path) -> [uploaded, last seen, backlog bucket], perf_counter timestamps
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name="pickup-monitor", daemon=True)
+        self._thread.start()
+
+    def watch(self, remote_path, uploaded, endpoint=None):
+        """Starts waiting for the pickup of a file whose upload to endpoint completed at uploaded (a perf_counter value)."""
+        with self._lock:
+            bucket = backlog_bucket(len(self._pending))
+            self._pending[(endpoint, remote_path)] = [uploaded, uploaded, bucket]
+            if bucket not in self.by_backlog:
+                self.by_backlog[bucket] = OperationStats(f"Backlog {bucket}")
+
+    def finish(self, stop_event):
+        """Waits until every watched file was picked up or timed out, or stop_event is set, then stops polling."""
+        while not stop_event.is_set() and self._thread.is_alive():
+            with self._lock:
+                if not self._pending:
+                    break
+            stop_event.wait(self.poll_interval / 2)
+        self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self.unresolved += len(self._pending)
+            self._pending.clear()
+
+    def _poll_loop(self):
+        sessions = {}  # Endpoint -> its polling session
+        try:
+            while not self._stop.wait(self.poll_interval):
+                directories = {}  # Endpoint -> directories with waiting files
+                with self._lock:
+                    for endpoint, path in self._pending:
+                        directories.setdefault(endpoint, set()).add(posixpath.dirname(path))
+                for endpoint, endpoint_directories in directories.items():
+                    try:
+                        if endpoint not in sessions:
+                            sessions[endpoint] = self.open_session(endpoint)
+                        self._poll(sessions[endpoint], endpoint, endpoint_directories)
+                    except Exception as e:
+                        if not self.poll_errors:
+                            self.log(f"Pickup polling failed, retrying every poll - {str(e)}")
+                        self.poll_errors += 1
+                        session = sessions.pop(endpoint, None)
+                        if session:
+                            session.close()
+                self._expire(time.perf_counter())
+        finally:
+            for session in sessions.values():
+                session.close()
+
+    def _poll(self, session, endpoint, directories):
+        listings = {}  # Directory -> (names, time of the listing)
+        for directory in directories:
+            start = time.perf_counter()
+            names = session.listdir(directory)
+            end = time.perf_counter()
+            self.listing_stats.record(start, end)
+            listings[directory] = (names, (start + end) / 2)
+        archived = session.listdir(self.archive) if self.archive else set()
+        with self._lock:
+            for key, entry in list(self._pending.items()):
+                if key[0] != endpoint:
+                    continue
+                directory, name = posixpath.split(key[1])
+                if directory not in listings:
+                    continue
+                names, listed = listings[directory]
+                uploaded, last_seen, bucket = entry
+                if uploaded >= listed:
+                    continue  # Uploaded while this poll was running
+                if name in names:
+                    entry[1] = listed
+                    continue
+                picked_up = (last_seen + listed) / 2
+                del self._pending[key]
+                self.stats.record(uploaded, picked_up)
+                self.by_backlog[bucket].record(uploaded, picked_up)
+                if name in archived:
+                    self.archived += 1
+
+    def _expire(self, now):
+        with self._lock:
+            for key, entry in list(self._pending.items()):
+                if now - entry[0] > self.timeout:
+                    del self._pending[key]
+                    self.stats.record_error()
+                    self.by_backlog[entry[2]].record_error()
+
+    def summary(self):
+        with self._lock:
+            buckets = dict(self.by_backlog)
+        return {
+            "latency": self.stats.summary(),
+            "by_backlog": {bucket: stats.summary() for bucket, stats in buckets.items()},
+            "timeouts": self.stats.summary()["errors"],
+            "unresolved": self.unresolved,
+            "archived": self.archived if self.archive else None,
+            "listing": self.listing_stats.summary(),
+            "poll_errors": self.poll_errors,
+            "poll_interval": self.poll_interval,
+        }
+
+    def slo_metrics(self):
+        """Success criteria metrics of the pickup, see Threshold.METRICS."""
+        latency = self.stats.summary()
+        watched = latency["count"] + latency["errors"]
+        timeout_rate = latency["errors"] / watched if watched else 0.0
+
+        def bounded(value, pct):
+            # Files that were not picked up took longer than any pickup, the upper percentiles are at least the timeout
+            return max(value, self.timeout) if pct / 100 > 1 - timeout_rate else value
+
+        return {
+            "pickup_latency_p50": bounded(latency["latency_p50"], 50),
+            "pickup_latency_p95": bounded(latency["latency_p95"], 95),
+            "pickup_latency_p99": bounded(latency["latency_p99"], 99),
+            "pickup_latency_max": bounded(latency["latency_max"], 100),
+            "pickup_timeout_rate": timeout_rate,
+        }
+
+    @staticmethod
+    def report_columns(summary):
+        """CSV report columns of a pickup summary."""
+        return {
+            "picked_up": summary["latency"]["count"],
+            "pickup_timeouts": summary["timeouts"],
+            "pickup_p50_ms": f"{summary['latency']['latency_p50'] * 1000:.1f}",
+            "pickup_p99_ms": f"{summary['latency']['latency_p99'] * 1000:.1f}",
+        }
+
+    def format_summary(self):
+        """Returns log lines with the pickup latency overall and by backlog at upload time."""
+        s = self.summary()
+        lines = [self.stats.format_summary(),
+                 f"Pickup polling: one listing per directory every {self.poll_interval * 1000:.0f} ms, latencies are "
+                 f"accurate to {self.poll_interval * 500:.0f} ms, listing p50 {s['listing']['latency_p50'] * 1000:.1f} ms, "
+                 f"p99 {s['listing']['latency_p99'] * 1000:.1f} ms"]
+        if len(s["by_backlog"]) > 1:
+            lines.append("Pickup latency by files waiting at upload time:")
+            for bucket, backlog in sorted(s["by_backlog"].items(), key=lambda item: int(item[0].split("-")[0])):
+                lines.append(f"  {bucket} waiting: {backlog['count']} files, p50 {backlog['latency_p50'] * 1000:.1f} ms, "
+                             f"p99 {backlog['latency_p99'] * 1000:.1f} ms, {backlog['errors']} timeouts")
+        if s["archived"] is not None:
+            lines.append(f"Pickup: {s['archived']} of {s['latency']['count']} picked up files were found in '{self.archive}'.")
+        if s["timeouts"]:
+            lines.append(f"WARNING: {s['timeouts']} files were not picked up within {self.timeout:g} seconds.")
+        if s["unresolved"]:
+            lines.append(f"Pickup: {s['unresolved']} files were still waiting when the run ended.")
+        if s["poll_errors"]:
+            lines.append(f"WARNING: {s['poll_errors']} pickup polls failed.")
+        return lines
@@ -0,0 +1,333 @@
+"""Test plans, success criteria and the combined run report."""
+import copy
+import csv
+import itertools
+import json
+import operator
+import os
+import re
+import time
+
+from ..settings import RESULTS_DIR, SFTP_PORT
+
+
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+# Values of the plan's "mode" and workload "distribution" keys, in the order the GUI lists them
+MODES = ("upload", "handshake", "smallfile", "soak", "replay", "autotune", "dirscale")
+DISTRIBUTIONS = ("replicate", "shard", "queue")
+
+# Every file a test run uploads carries the marker in its name, the remote cleanup deletes what matches CLEANUP_PATTERN
+TEST_FILE_MARKER = "_task_id_"
+CLEANUP_PATTERN = f"*{TEST_FILE_MARKER}*"
+
+
+def test_file_name(file_name, *ids):
+    """Returns the remote name of a test file, e.g. ("data.bin", 3, 7) -> "data_task_id_3_7.bin"."""
+    base, ext = os.path.splitext(file_name)
+    return f"{base}{TEST_FILE_MARKER}{'_'.join(str(part) for part in ids)}{ext}"
+
+
+def parse_size(value):
+    """Converts sizes like 512, "1KB" or "25 MB" into a number of bytes."""
+    if value is None or isinstance(value, int):
+        return value
+    text = str(value).strip().upper().replace(" ", "")
+    for unit in ("GB", "MB", "KB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(text)
+
+
+def format_size(size):
+    """Formats a byte count with the largest fitting unit, e.g. 1048576 -> "1MB"."""
+    for unit in ("GB", "MB", "KB"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def merge_dicts(base, override):
+    """Returns a deep copy of base with the (nested) values of override applied on top."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_dicts(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_yaml_module():
+    """Imports PyYAML on first use of a YAML plan, it is optional and not needed at startup."""
+    try:
+        import yaml
+    except ImportError:
+        raise RuntimeError("YAML test plans require PyYAML, install it with 'pip install pyyaml'.") from None
+    return yaml
+
+
+class TestPlan:
+    """Declarative test description (target, workload, load, payload, timeouts, success criteria) stored as JSON or YAML.
+
+    A plan can contain a list of scenarios, each overriding parts of the base plan, and a sweep section that maps
+    dotted keys to value lists, e.g. {"load.connections": [10, 50], "payload.file_size": ["1KB", "1MB"]}.
+    Every scenario is run once per combination of sweep values.
+    """
+    DEFAULTS = {
+        "name": "SFTP stress test",
+        "mode": "upload",  # upload, handshake, smallfile, soak, replay, autotune or dirscale, see MODES
+        # endpoints (upload mode) spreads the sessions over several nodes, see engine/endpoints.py for balancing and
+        # resolve (one endpoint per A/AAAA record), host is then only used by the cleanup phase. protocol (upload mode)
+        # is sftp, scp or ftps (explicit TLS, usually port 21), see engine/protocols.py
+        "target": {"host": "", "port": SFTP_PORT, "directory": "", "username": "", "password": "", "password_env": "",
+                   "endpoints": [], "balancing": "round-robin", "resolve": False, "protocol": "sftp"},
+        # seed makes payload sizes, content and generated arrivals repeatable, None picks and reports a new one per run
+        "workload": {"multiple_files": False, "distribution": "replicate", "cleanup": False, "seed": None, "record_trace": False},
+        # rate (uploads per second) turns the upload mode into an open workload of uploads arrivals (default: connections)
+        "load": {"connections": 1, "rate": None, "uploads": None},
+        # file_size generates the payload in memory instead of reading path, a range like "1KB-4MB" draws every size from
+        # the seed, content is zeros or random (seeded)
+        "payload": {"path": "", "file_size": None, "content": "zeros"},
+        "handshake": {"attempts": 1000, "duration": None, "open_sftp": True},  # Used by the handshake mode only
+        "smallfile": {"files_per_connection": 1000, "window": 16, "confirm": False},  # Used by the smallfile mode only
+        # Used by the upload mode only: poll the uploaded files until a downstream consumer removed them (or moved them
+        # to archive), every poll_interval seconds for at most timeout seconds per file, see PickupMonitor
+        "pickup": {"enabled": False, "poll_interval": 0.5, "timeout": 300, "archive": ""},
+        # enabled samples the tool's own threads (see SamplingProfiler), timeline records the phases of every task of
+        # the upload and replay modes as a Chrome trace (see TimelineRecorder), operations writes every operation to CSV
+        "profiling": {"enabled": False, "interval_ms": 10, "timeline": False, "operations": False},
+        "soak": {"duration": 3600, "upload_interval": 10, "keepalive": 30, "rekey_bytes": None, "rekey_interval": None,
+                 "reconnect": False},  # Used by the soak mode only, durations in seconds
+        # Used by the replay mode only: a recorded trace file, or without one a seeded trace of uploads arriving at
+        # rate per second over load.connections sessions. speed compresses time, 2 replays twice as fast
+        "replay": {"trace": "", "speed": 1.0, "uploads": 1000, "rate": 10.0},
+        # Used by the autotune mode only: searches from start up to load.connections sessions, every step runs warmup
+        # plus step_duration seconds and needs min_gain more throughput with at most max_error_rate errors and a p99
+        # latency of at most max_latency_p99 seconds (None: no limit), see AutoTuneWorker
+        "autotune": {"start": 1, "step_duration": 10, "warmup": 2, "min_gain": 0.05, "max_error_rate": 0.01,
+                     "max_latency_p99": None},
+        # Used by the dirscale mode only: fills target.directory to every entry count in levels (e.g. "10k") with
+        # load.connections sessions of window files in flight, fill_size bytes each, and measures listings, stat and a
+        # put of payload.file_size samples times per level, see DirScaleWorker
+        "dirscale": {"levels": [1000, 10000, 100000], "samples": 10, "window": 16, "fill_size": 0},
+        "timeouts": {"connect": 30, "operation": 300},
+        # Sockets of every connection: host names are resolved once per run (cache_dns), buffer sizes like "4MB" (None:
+        # system default), source_addresses spreads the connections over local addresses, optionally with a port range
+        # each ("10.0.0.5:20000-29999"), see SocketConnector
+        "socket": {"nodelay": True, "send_buffer": None, "receive_buffer": None, "source_addresses": [], "cache_dns": True},
+        "network": {"bandwidth_per_connection": None, "bandwidth_total": None, "delay_ms": 0, "jitter_ms": 0, "loss_rate": 0.0},
+        "success_criteria": {"thresholds": {}, "abort_on_breach": False, "min_samples": 50, "abort_margin": 0.5},
+        "scenarios": [],
+        "sweep": {},
+    }
+
+    FREE_FORM = ("success_criteria.thresholds", "sweep")  # Sections whose keys are chosen by the user
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.check_keys(data, self.DEFAULTS)
+        for index, scenario in enumerate(data.get("scenarios") or []):
+            if not isinstance(scenario, dict):
+                raise ValueError(f"Scenario {index + 1} of the test plan must be a mapping of plan sections.")
+            sections = {key: value for key, value in self.DEFAULTS.items() if key not in ("scenarios", "sweep")}
+            self.check_keys(scenario, {**sections, "name": ""}, f"scenarios[{index}].")
+        for key in (data.get("sweep") or {}):
+            self.check_sweep_key(key)
+        self.data = merge_dicts(self.DEFAULTS, data)
+
+    @classmethod
+    def check_keys(cls, data, defaults, prefix=""):
+        """Raises ValueError for keys of data that do not exist in defaults, so a misplaced key (e.g. a threshold
+        outside success_criteria.thresholds) fails the plan instead of being ignored."""
+        for key, value in data.items():
+            path = f"{prefix}{key}"
+            if key not in defaults:
+                raise ValueError(f"Unknown test plan key '{path}', expected one of: {', '.join(defaults)}")
+            if isinstance(defaults[key], dict) and path.split("]", 1)[-1].lstrip(".") not in cls.FREE_FORM:
+                if not isinstance(value, dict):
+                    raise ValueError(f"Test plan key '{path}' must be a section with the keys: {', '.join(defaults[key])}")
+                cls.check_keys(value, defaults[key], f"{path}.")
+
+    @classmethod
+    def check_sweep_key(cls, key):
+        """Raises ValueError when a dotted sweep key does not name a setting of the plan."""
+        section = cls.DEFAULTS
+        parts = key.split(".")
+        for depth, part in enumerate(parts):
+            if ".".join(parts[:depth]) in cls.FREE_FORM:
+                return  # e.g. success_criteria.thresholds.upload_latency_p99
+            if not isinstance(section, dict) or part not in section:
+                raise ValueError(f"Unknown sweep key '{key}', '{part}' is not a setting of the test plan.")
+            section = section[part]
+
+    @classmethod
+    def load(cls, filename):
+        """Loads a plan from a .json, .yaml or .yml file."""
+        with open(filename, "r", encoding="utf-8") as f:
+            if filename.lower().endswith((".yaml", ".yml")):
+                data = load_yaml_module().safe_load(f) or {}
+            else:
+                data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{filename} does not contain a test plan object.")
+        return cls(data)
+
+    def save(self, filename):
+        """Saves the plan, the file extension decides between JSON and YAML."""
+        data = copy.deepcopy(self.data)
+        if data["target"].get("password_env"):
+            data["target"]["password"] = ""  # Never write the secret when it comes from the environment
+        with open(filename, "w", encoding="utf-8") as f:
+            if filename.lower().endswith((".yaml", ".yml")):
+                load_yaml_module().safe_dump(data, f, sort_keys=False)
+            else:
+                json.dump(data, f, indent=4)
+
+    @property
+    def name(self):
+        return self.data["name"]
+
+    def has_multiple_points(self):
+        return bool(self.data["scenarios"]) or bool(self.data["sweep"])
+
+    def expand(self):
+        """Returns a list of (label, resolved plan dictionary) for every scenario and sweep combination."""
+        base = {key: value for key, value in self.data.items() if key not in ("scenarios", "sweep")}
+        scenarios = self.data["scenarios"] or [{}]
+        sweep_keys = list(self.data["sweep"].keys())
+        sweep_values = [self.data["sweep"][key] for key in sweep_keys]
+
+        points = []
+        for scenario in scenarios:
+            scenario_name = scenario.get("name", "")
+            resolved_scenario = merge_dicts(base, {key: value for key, value in scenario.items() if key != "name"})
+            for combination in itertools.product(*sweep_values):
+                point = copy.deepcopy(resolved_scenario)
+                for key, value in zip(sweep_keys, combination):
+                    section = point
+                    *parents, leaf = key.split(".")
+                    for parent in parents:
+                        section = section.setdefault(parent, {})
+                    section[leaf] = value
+                parameters = ", ".join(f"{key.split('.')[-1]}={value}" for key, value in zip(sweep_keys, combination))
+                label = " | ".join(part for part in (scenario_name, parameters) if part) or self.name
+                point["label"] = label
+                point["parameters"] = dict(zip(sweep_keys, combination))
+                points.append((label, point))
+        return points
+
+    @staticmethod
+    def resolve_password(target):
+        """Returns the password of a target section, preferring the environment variable named in password_env."""
+        if target.get("password_env"):
+            return os.getenv(target["password_env"], target.get("password", ""))
+        return target.get("password", "")
+
+
+class Threshold:
+    """One pass/fail assertion such as "upload_latency_p99 < 2s" evaluated against the metrics of a run"""
+    OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+    UNITS = {"": 1.0, "s": 1.0, "ms": 0.001, "%": 0.01, "MB/s": 1.0, "ops/s": 1.0}
+    METRICS = ("upload_latency_mean", "upload_latency_p50", "upload_latency_p95", "upload_latency_p99", "upload_latency_max",
+               "error_rate", "throughput_mb_s", "uploads_per_sec",
+               "handshake_latency_p50", "handshake_latency_p99", "handshakes_per_sec", "refusal_rate",
+               "file_latency_p50", "file_latency_p99", "files_per_sec",
+               "session_survival_rate", "rekey_latency_p99", "memory_growth_mb_per_hour",
+               "corrected_latency_p50", "corrected_latency_p99", "corrected_latency_max", "generator_lag_p99",
+               "pickup_latency_p50", "pickup_latency_p95", "pickup_latency_p99", "pickup_latency_max", "pickup_timeout_rate",
+               "tuned_connections",
+               "listdir_latency_p50", "listdir_latency_p99", "listdir_attr_latency_p50", "listdir_attr_latency_p99",
+               "stat_latency_p50", "stat_latency_p99", "put_latency_p50", "put_latency_p99")
+    _EXPRESSION = re.compile(r"^\s*(<=|>=|<|>)\s*([0-9]*\.?[0-9]+)\s*(ms|s|%|MB/s|ops/s)?\s*$")
+
+    def __init__(self, metric, expression):
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown threshold metric '{metric}', expected one of: {', '.join(self.METRICS)}")
+        match = self._EXPRESSION.match(str(expression))
+        if not match:
+            raise ValueError(f"Invalid threshold '{metric} {expression}', expected e.g. '< 2s', '< 0.1%' or '> 200 MB/s'")
+        self.metric = metric
+        self.expression = str(expression).strip()
+        self.operator = match.group(1)
+        self.limit = float(match.group(2)) * self.UNITS[match.group(3) or ""]
+
+    def passes(self, metrics):
+        if self.metric not in metrics:
+            return False  # Metric of another test mode, never measured by this run
+        return self.OPERATORS[self.operator](metrics[self.metric], self.limit)
+
+    def clearly_breached(self, metrics, margin):
+        """True if the value misses the limit by more than the relative margin, used for early aborts."""
+        if self.metric not in metrics:
+            return False
+        value = metrics[self.metric]
+        if self.operator in ("<", "<="):
+            return value > self.limit * (1 + margin) if self.limit > 0 else value > 0
+        return value < self.limit * (1 - margin)
+
+    def describe(self, metrics):
+        """Returns a log line with the verdict and the measured value."""
+        verdict = "PASS" if self.passes(metrics) else "FAIL"
+        if self.metric not in metrics:
+            return f"{verdict}: {self.metric} {self.expression} (not measured in this test mode)"
+        value = metrics[self.metric]
+        if "_latency_" in self.metric or self.metric.endswith("_lag_p99"):
+            measured = f"{value:.3f}s"
+        elif self.metric.endswith("_rate"):
+            measured = f"{value * 100:.3f}%"
+        else:
+            measured = f"{value:.2f}"
+        return f"{verdict}: {self.metric} {self.expression} (measured {measured})"
+
+
+def parse_thresholds(criteria):
+    """Creates Threshold objects from the thresholds of a success_criteria section."""
+    return [Threshold(metric, expression) for metric, expression in ((criteria or {}).get("thresholds") or {}).items()]
+
+
+def parse_criteria_text(text):
+    """Parses "metric < value; metric > value" as typed into the GUI into a thresholds dictionary."""
+    thresholds = {}
+    for part in text.split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.match(r"^([a-z0-9_]+)\s*(.+)$", part)
+        if not match:
+            raise ValueError(f"Invalid success criterion '{part}'")
+        Threshold(match.group(1), match.group(2))  # Validates metric and expression
+        thresholds[match.group(1)] = match.group(2).strip()
+    return thresholds
+
+
+def format_criteria_text(thresholds):
+    return "; ".join(f"{metric} {expression}" for metric, expression in thresholds.items())
+
+
+def results_base_path(name):
+    """Returns RESULTS_DIR/<name>_<timestamp> without extension, creating RESULTS_DIR if needed."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    return os.path.join(RESULTS_DIR, f"{safe_name}_{time.strftime('%Y%m%d_%H%M%S')}")
+
+
+def write_run_report(name, results):
+    """Writes the combined results of one or more runs as JSON and CSV into RESULTS_DIR, returns the JSON path."""
+    base_path = results_base_path(name)
+
+    with open(f"{base_path}.json", "w", encoding="utf-8") as f:
+        json.dump({"name": name, "results": results}, f, indent=4)
+
+    from .modes import WORKER_MODES  # The workers import this module
+
+    # Every test mode has its own columns, a plan mixing modes gets the union of them
+    rows = [WORKER_MODES[result.get("mode", "upload")].report_row(result) for result in results]
+    columns = []
+    for row in rows:
+        columns.extend(column for column in row if column not in columns)
+    with open(f"{base_path}.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    return f"{base_path}.json"
@@ -0,0 +1,279 @@
+"""Transfer protocols of the upload mode: SFTP, SCP over SSH channels and FTPS (FTP with explicit TLS).
+
+Every protocol opens one session per connection that uploads file objects and deletes remote paths, so the scheduler,
+payload sources, WAN emulation and metrics of the upload mode are the same whichever protocol carries the data.
+"""
+import errno
+import ftplib
+import posixpath
+import shlex
+import ssl
+import time
+
+import paramiko
+
+from .connection import SCPError, connect_sftp, host_key_fingerprint, key_fingerprint
+
+PROTOCOLS = ("sftp", "scp", "ftps")
+CHUNK_SIZE = 32768  # Bytes read from the file object per write
+
+
+class TransferSession:
+    """One authenticated connection of a transfer protocol.
+
+    CONNECT_ROUND_TRIPS and PUT_ROUND_TRIPS are the request round trips of opening a session and of uploading one
+    file, the WAN emulation adds its delay once per round trip.
+    """
+    CONNECT_ROUND_TRIPS = 4
+    PUT_ROUND_TRIPS = 2
+
+    @classmethod
+    def connect(cls, host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None,
+                connector=None):
+        """Opens an authenticated session, phase_timer and connector are used like in connect_sftp."""
+        raise NotImplementedError
+
+    def put(self, fileobj, remote_path, size):
+        """Uploads size bytes read from fileobj to remote_path, returns the size the server confirmed."""
+        raise NotImplementedError
+
+    def remove(self, remote_path):
+        """Deletes a remote file, raises FileNotFoundError when it does not exist."""
+        raise NotImplementedError
+
+    def listdir(self, directory):
+        """Returns the set of names in a remote directory, listed with as few requests as the protocol allows."""
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Returns the fingerprint of the server's host key or certificate, tells apart the nodes behind one address."""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class SFTPSession(TransferSession):
+    """Uploads over the SFTP subsystem, every file is opened, written, closed and stat'ed to confirm its size"""
+
+    def __init__(self, transport, sftp):
+        self.transport = transport
+        self.sftp = sftp
+
+    @classmethod
+    def connect(cls, host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None,
+                connector=None):
+        return cls(*connect_sftp(host, port, username, password, connect_timeout, operation_timeout, phase_timer=phase_timer,
+                                 connector=connector))
+
+    def put(self, fileobj, remote_path, size):
+        return self.sftp.putfo(fileobj, remote_path, file_size=size).st_size or 0
+
+    def remove(self, remote_path):
+        self.sftp.remove(remote_path)
+
+    def listdir(self, directory):
+        return {attributes.filename for attributes in self.sftp.listdir_attr(directory)}
+
+    def fingerprint(self):
+        return host_key_fingerprint(self.transport)
+
+    def close(self):
+        self.sftp.close()
+        self.transport.close()
+
+
+class SCPSession(TransferSession):
+    """Uploads with the scp protocol: every file runs "scp -t" on the server in its own channel of the connection,
+    as one scp invocation per file does. scp cannot delete or list, remove and listdir use SFTP on the same connection."""
+    CONNECT_ROUND_TRIPS = 3  # TCP, key exchange and authentication, no subsystem is opened
+    PUT_ROUND_TRIPS = 4  # Channel open, exec, file header and the final acknowledgement
+
+    def __init__(self, transport, operation_timeout=None):
+        self.transport = transport
+        self.operation_timeout = operation_timeout
+        self._sftp = None
+
+    @classmethod
+    def connect(cls, host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None,
+                connector=None):
+        transport, _ = connect_sftp(host, port, username, password, connect_timeout, phase_timer=phase_timer, open_sftp=False,
+                                    connector=connector)
+        return cls(transport, operation_timeout)
+
+    def put(self, fileobj, remote_path, size):
+        channel = self.transport.open_session()
+        try:
+            channel.settimeout(self.operation_timeout)
+            try:
+                channel.exec_command(f"scp -t {shlex.quote(remote_path)}")
+            except paramiko.SSHException as e:
+                raise SCPError(f"The server refused to run scp - {str(e)}") from e
+            self._acknowledged(channel)
+            channel.sendall(f"C0644 {size} {posixpath.basename(remote_path)}\n".encode("utf-8"))
+            self._acknowledged(channel)
+            sent = 0
+            while sent < size:
+                data = fileobj.read(min(CHUNK_SIZE, size - sent))
+                if not data:
+                    raise EOFError(f"Local data ended after {sent} of {size} bytes")
+                channel.sendall(data)
+                sent += len(data)
+            channel.sendall(b"\0")
+            self._acknowledged(channel)  # The server has written and closed the file
+        finally:
+            channel.close()
+        return sent
+
+    @staticmethod
+    def _acknowledged(channel):
+        """Waits for the server's answer to the last message: 0 is OK, 1 (warning) and 2 (error) carry a message."""
+        code = channel.recv(1)
+        if code == b"\0":
+            return
+        if not code:
+            raise EOFError("The server closed the SCP channel, is scp installed on the server?")
+        message = bytearray()
+        while not message.endswith(b"\n"):
+            data = channel.recv(1)
+            if not data:
+                break
+            message += data
+        raise SCPError(f"scp: {message.decode('utf-8', 'replace').strip()}")
+
+    def _sftp_client(self):
+        if self._sftp is None:
+            self._sftp = paramiko.SFTPClient.from_transport(self.transport)
+        return self._sftp
+
+    def remove(self, remote_path):
+        self._sftp_client().remove(remote_path)
+
+    def listdir(self, directory):
+        return {attributes.filename for attributes in self._sftp_client().listdir_attr(directory)}
+
+    def fingerprint(self):
+        return host_key_fingerprint(self.transport)
+
+    def close(self):
+        if self._sftp:
+            self._sftp.close()
+        self.transport.close()
+
+
+class FTPSSession(TransferSession):
+    """Uploads over FTP with explicit TLS (AUTH TLS) and protected data connections (PROT P), one passive data
+    connection with its own TLS handshake per file, followed by SIZE to confirm the upload.
+
+    Certificates are not verified, like the SSH host keys of the other protocols: test servers mostly use self-signed ones.
+    """
+    CONNECT_ROUND_TRIPS = 6  # TCP and greeting, AUTH TLS, TLS handshake, USER, PASS, PBSZ and PROT
+    PUT_ROUND_TRIPS = 5  # PASV, data connection, its TLS handshake, STOR completion and SIZE
+
+    def __init__(self, ftp):
+        self.ftp = ftp
+
+    @classmethod
+    def connect(cls, host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None,
+                connector=None):
+        def timed(phase, start):
+            if phase_timer:
+                phase_timer(phase, start, time.perf_counter())
+
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        ftp = ftplib.FTP_TLS(context=context)
+        try:
+            start = time.perf_counter()
+            if connector:
+                cls._connect_socket(ftp, connector.connect(host, port, connect_timeout), host, port, connect_timeout)
+            else:
+                ftp.connect(host, port, timeout=connect_timeout)
+            timed("tcp_connect", start)
+            start = time.perf_counter()
+            ftp.auth()
+            timed("tls_handshake", start)
+            start = time.perf_counter()
+            ftp.login(username, password)
+            ftp.prot_p()
+            timed("auth", start)
+            ftp.timeout = operation_timeout  # Used by the data connections
+            ftp.sock.settimeout(operation_timeout)
+        except Exception:
+            ftp.close()
+            raise
+        return cls(ftp)
+
+    @staticmethod
+    def _connect_socket(ftp, sock, host, port, timeout):
+        """Does what FTP.connect does with a socket of the SocketConnector. The data connections leave from the same
+        source address, the connector's socket options apply to the control connection only."""
+        ftp.host, ftp.port, ftp.timeout = host, port, timeout
+        ftp.sock = sock
+        ftp.af = sock.family
+        ftp.source_address = (sock.getsockname()[0], 0)
+        ftp.file = sock.makefile("r", encoding=ftp.encoding)
+        ftp.welcome = ftp.getresp()
+
+    def put(self, fileobj, remote_path, size):
+        sent = 0
+
+        def count(data):
+            nonlocal sent
+            sent += len(data)
+
+        self.ftp.storbinary(f"STOR {remote_path}", fileobj, blocksize=CHUNK_SIZE, callback=count)
+        try:
+            confirmed = self.ftp.size(remote_path)
+        except ftplib.error_perm as e:
+            if not str(e).startswith("50"):
+                raise
+            confirmed = None  # SIZE is not implemented by the server
+        if confirmed is not None and confirmed != sent:
+            raise IOError(f"Size mismatch in upload of '{remote_path}': {confirmed} != {sent}")
+        return sent if confirmed is None else confirmed
+
+    def remove(self, remote_path):
+        try:
+            self.ftp.delete(remote_path)
+        except ftplib.error_perm as e:
+            if str(e).startswith("550"):
+                raise FileNotFoundError(errno.ENOENT, str(e), remote_path) from e
+            raise
+
+    def listdir(self, directory):
+        try:
+            names = self.ftp.nlst(directory)
+        except ftplib.error_perm as e:
+            if "no files" in str(e).lower():  # Some servers answer NLST of an empty directory with 550 No files found
+                return set()
+            raise
+        return {posixpath.basename(name) for name in names}
+
+    def fingerprint(self):
+        return key_fingerprint(self.ftp.sock.getpeercert(binary_form=True))
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except (OSError, EOFError, ftplib.Error):
+            self.ftp.close()
+
+
+SESSIONS = {"sftp": SFTPSession, "scp": SCPSession, "ftps": FTPSSession}
+
+
+def session_type(protocol):
+    """Returns the TransferSession class of a protocol name."""
+    try:
+        return SESSIONS[protocol]
+    except KeyError:
+        raise ValueError(f"Unknown protocol '{protocol}', expected one of: {', '.join(PROTOCOLS)}") from None
+
+
+def open_session(protocol, host, port, username, password, connect_timeout=None, operation_timeout=None, phase_timer=None,
+                 connector=None):
+    """Opens an authenticated session of the given protocol, the caller closes it."""
+    return session_type(protocol).connect(host, port, username, password, connect_timeout, operation_timeout, phase_timer,
+                                          connector)
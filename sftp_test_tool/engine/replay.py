@@ -0,0 +1,394 @@
+"""Replay mode: runs a workload trace with its original sessions and arrival times."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats, ScheduleStats
+from .base import BenchmarkWorker
+from .connection import classify_error, connect_sftp
+from .payload import DiscardingSink, GeneratedPayload
+from .plan import TestPlan
+from .shaping import NetworkShaper, ShapedFile
+from .trace_import import load_trace
+from .workload import WorkloadTrace, parse_size_range
+
+
+class ReplayWorker(BenchmarkWorker):
+    """Worker thread replaying a workload trace.
+
+    Every session of the trace gets its own connection and runs its operations at their recorded offsets divided by
+    speed, so concurrency and arrival shape stay those of the original workload. Sessions are queued by their start
+    time on as many threads as the trace had sessions open at its peak (or max_sessions, if higher), so a trace of
+    thousands of short sessions only ever opens the recorded overlap. An operation that is due while its
+    session is still busy starts late, lateness is reported so a replay that could not keep up is recognised.
+    Files the trace downloads, stats or deletes without uploading them are created untimed, before the replay starts
+    or right before the operation when they reappeared after a delete.
+    """
+    TITLE = "workload replay"
+    CONNECT_AHEAD = 2.0  # Seconds before its first operation a session without recorded connect connects
+    STAGE_SESSIONS = 8  # Connections creating the files the trace expects to exist
+
+    def __init__(self, trace: WorkloadTrace, host: str, port: int, directory: str, username: str, password: str,
+                 speed: float = 1.0, cleanup_after_run: bool = False, connect_timeout: float = None,
+                 operation_timeout: float = None, success_criteria: dict = None, shaper: "NetworkShaper" = None,
+                 max_sessions: int = None):
+        super().__init__(success_criteria)
+        if speed <= 0:
+            raise ValueError("The replay speed must be greater than 0.")
+        self.trace = trace
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.speed = speed
+        self.cleanup_after_run = cleanup_after_run
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        self.shaper = shaper
+        # Replay threads, also the session count of the cleanup phase. max_sessions adds headroom for servers whose
+        # sessions take longer than the recorded ones, more threads than sessions are never needed
+        self.connections = max(1, min(len(trace.sessions()), max(trace.peak_concurrency(), max_sessions or 0)))
+        self.created_files = []
+        self.operation_stats = self._new_operation_stats()
+        self.upload_stats = self.operation_stats["upload"]
+        self.delete_stats = None
+        self.failures = {}  # Error category -> count
+        self.schedule = ScheduleStats("Operation")
+        self.operations_done = 0
+        self._produced = set()  # Events on files that reappeared without an upload, recreated before they run
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        replay = point["replay"]
+        if replay.get("trace"):
+            trace = load_trace(replay["trace"])
+        else:
+            trace = WorkloadTrace.generate(point["workload"].get("seed"), int(point["load"]["connections"]), int(replay["uploads"]),
+                                           float(replay["rate"]), parse_size_range(point["payload"].get("file_size") or "1MB"),
+                                           content=point["payload"].get("content") or "zeros")
+        return cls(trace, target["host"], int(target["port"]), target["directory"], target["username"],
+                   TestPlan.resolve_password(target),
+                   speed=float(replay.get("speed") or 1.0),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"),
+                   shaper=NetworkShaper.from_settings(point.get("network")),
+                   max_sessions=int(point["load"]["connections"]))
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.created_files = []
+        self.operation_stats = self._new_operation_stats()
+        self.upload_stats = self.operation_stats["upload"]
+        self.delete_stats = None
+        self.failures = {}
+        self.schedule = ScheduleStats("Operation")
+        self.operations_done = 0
+        self.verdict = None
+        self.abort_reason = None
+        self._progress = -1
+
+        sessions = self.trace.sessions()
+        self.log_signal.emit(f"Replaying {self.trace.describe()}")
+        self.log_signal.emit(f"Speed {self.speed:g}x, the replay takes about {self.trace.duration / self.speed:.1f} seconds "
+                             f"with {len(sessions)} sessions, at most {self.connections} at the same time.")
+        if self.shaper:
+            self.log_signal.emit(f"WAN emulation: {self.shaper.describe()}")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        start_time = time.time()
+        try:
+            preexisting, self._produced = self.trace.missing_files()
+            if preexisting:
+                self._stage_files(preexisting)
+            replay_start = time.perf_counter()
+            # Queued in start order: a thread takes the next session when its previous one ended, so sessions that
+            # did not overlap in the trace share threads and connections are only open while sessions overlap
+            ordered = sorted(sessions.items(), key=lambda item: item[1][0].offset)
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                futures = [executor.submit(self._replay_session, session, events, replay_start) for session, events in ordered]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.log_signal.emit(f"Replay session failed: {str(e)}")
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary():
+                self.log_signal.emit(line)
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.cleanup_after_run and not self.stop_event.is_set():
+                self.created_files = list(dict.fromkeys(self.created_files))  # A trace may upload a file more than once
+                self.run_cleanup_phase()
+        finally:
+            run_finished.set()
+            self.network_monitor.stop()
+            self.network_monitor.wait()
+            self.total_time = time.time() - start_time
+            self.evaluate_thresholds()
+            self.log_signal.emit("=" * 50)
+            total = len(self.trace.events)
+            if self.abort_reason:
+                self.log_signal.emit(f"Replay was aborted after {self.operations_done} of {total} operations in {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Replay was canceled after {self.operations_done} of {total} operations in {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Replayed {self.operations_done} operations in {self.total_time:.2f} seconds.")
+
+    def _replay_session(self, session, events, replay_start):
+        """Runs the operations of one session on its own connection, each at its due time."""
+        transport = None
+        sftp = None
+        buckets = []
+        if self.timeline:
+            self.timeline.name_track(session, f"Session {session}")
+        try:
+            for event in events:
+                due = replay_start + event.offset / self.speed
+                if event.op == "disconnect":
+                    if self.stop_event.wait(max(0.0, due - time.perf_counter())):
+                        return
+                    if sftp:
+                        sftp.close()
+                        LIVE_METRICS.active_sessions.dec()
+                        transport.close()
+                        transport, sftp = None, None
+                    self._advance_progress()
+                    continue
+                if sftp is None:
+                    # A recorded connect happens on time, otherwise connect shortly before the operation is due, so the
+                    # handshake does not make it start late
+                    ahead = 0.0 if event.op == "connect" else self.CONNECT_AHEAD
+                    if self.stop_event.wait(max(0.0, due - ahead - time.perf_counter())):
+                        return
+                    try:
+                        if self.shaper:
+                            self.shaper.inject_delay(round_trips=4)
+                            buckets = self.shaper.connection_buckets()
+                        start = time.perf_counter()
+                        transport, sftp = connect_sftp(self.host, self.port, self.username, self.password, self.connect_timeout,
+                                                       self.operation_timeout,
+                                                       phase_timer=lambda phase, start, end: self._record_phase(phase, start, end, session),
+                                                       connector=self.connector)
+                        self.operation_stats["connect"].record(start, time.perf_counter(), 0)
+                        LIVE_METRICS.active_sessions.inc()
+                    except Exception as e:
+                        self._record_failure(session, "connect", e)  # The operation is lost, the next one connects again
+                        self._advance_progress()
+                        continue
+                if event.op == "connect":
+                    self._advance_progress()
+                    continue
+                start = self.schedule.wait_until(due, self.stop_event)
+                if start is None:
+                    return
+                try:
+                    if event in self._produced:  # Not timed, the original server got the file from elsewhere
+                        remote_path = f"{self.directory}/{event.path}"
+                        sftp.putfo(self._payload(event.path, event.size), remote_path, file_size=event.size)
+                        self.created_files.append(remote_path)
+                    self._run_operation(sftp, session, event, buckets)
+                    self.schedule.record(due, start, time.perf_counter())
+                except Exception as e:
+                    self.schedule.record_error()
+                    self._record_failure(session, event.op, e)
+                    if classify_error(e) != "sftp" or not transport.is_active():
+                        sftp.close()  # Reconnect for the next operation, the connection may be broken
+                        LIVE_METRICS.active_sessions.dec()
+                        transport.close()
+                        transport, sftp = None, None
+                self._advance_progress()
+        finally:
+            if sftp:
+                sftp.close()
+                LIVE_METRICS.active_sessions.dec()
+            if transport:
+                transport.close()
+
+    def _new_operation_stats(self):
+        operations = ["upload", *(op for op in self.trace.operation_counts() if op != "upload"), "connect"]
+        return {op: OperationStats(op.capitalize(), self.spill) for op in operations}
+
+    def _payload(self, path, size):
+        return GeneratedPayload(size, f"{self.trace.seed}:{path}" if self.trace.content == "random" else None)
+
+    def _stage_files(self, files):
+        """Creates the files the trace expects to exist, not timed and not part of the results."""
+        paths = sorted(files)
+        sessions = min(self.STAGE_SESSIONS, len(paths))
+        self.log_signal.emit(f"Creating {len(paths)} files the trace reads or deletes before uploading them "
+                             f"({sum(files.values()) / (1024 * 1024):.2f} MB, {sessions} sessions)...")
+
+        def stage(chunk):
+            transport, sftp = connect_sftp(self.host, self.port, self.username, self.password, self.connect_timeout,
+                                           self.operation_timeout, connector=self.connector)
+            try:
+                for path in chunk:
+                    if self.stop_event.is_set():
+                        return
+                    remote_path = f"{self.directory}/{path}"
+                    sftp.putfo(self._payload(path, files[path]), remote_path, file_size=files[path])
+                    self.created_files.append(remote_path)
+            finally:
+                sftp.close()
+                transport.close()
+
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [executor.submit(stage, paths[number::sessions]) for number in range(sessions)]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.log_signal.emit(f"Creating files failed: {str(e) or type(e).__name__}, operations on them will fail")
+
+    def _run_operation(self, sftp, session, event, buckets):
+        if event.op == "upload":
+            self._upload(sftp, session, event, buckets)
+            return
+        remote_path = f"{self.directory}/{event.path}"
+        start = time.perf_counter()
+        size = 0
+        if self.shaper:
+            self.shaper.inject_delay(round_trips=2 if event.op == "download" else 1)
+        if event.op == "download":
+            sink = DiscardingSink()
+            sftp.getfo(remote_path, sink)
+            size = sink.size
+        elif event.op == "list":
+            sftp.listdir_attr(self.directory)  # Paths are flattened into the target directory, which is listed instead
+        elif event.op == "stat":
+            sftp.stat(remote_path)
+        elif event.op == "delete":
+            sftp.remove(remote_path)
+        elif event.op == "mkdir":
+            sftp.mkdir(remote_path)
+        end = time.perf_counter()
+        self.operation_stats[event.op].record(start, end, size)
+        self._record_phase(event.op, start, end, session, {"file": event.path, "bytes": size} if event.path else None)
+
+    def _upload(self, sftp, session, event, buckets):
+        remote_path = f"{self.directory}/{event.path}"
+        payload = self._payload(event.path, event.size)
+        self.created_files.append(remote_path)
+        LIVE_METRICS.uploads_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            if self.shaper:
+                self.shaper.inject_delay(round_trips=2)
+                attributes = sftp.putfo(ShapedFile(payload, buckets, self.shaper), remote_path, file_size=event.size)
+            else:
+                attributes = sftp.putfo(payload, remote_path, file_size=event.size)
+        finally:
+            LIVE_METRICS.uploads_in_flight.dec()
+        end = time.perf_counter()
+        size = attributes.st_size or 0
+        self.upload_stats.record(start, end, size)
+        self._record_phase("upload", start, end, session, {"file": event.path, "bytes": size})
+        LIVE_METRICS.uploads.inc()
+        LIVE_METRICS.bytes_uploaded.inc(size)
+        LIVE_METRICS.recent_latencies.append(end - start)
+
+    def _record_failure(self, session, op, error):
+        category = classify_error(error)
+        self.operation_stats[op].record_error()
+        LIVE_METRICS.errors.inc(label_value=category)
+        if self.timeline:
+            self.timeline.mark(f"error: {category}", time.perf_counter(), session, {"op": op, "message": str(error)})
+        with self._lock:
+            first = category not in self.failures
+            self.failures[category] = self.failures.get(category, 0) + 1
+        if first:  # Only the first error of each kind, a replay against a failing server would flood the log
+            self.log_signal.emit(f"Session {session}: first {category} error - {str(error) or type(error).__name__}")
+
+    def _advance_progress(self):
+        with self._lock:
+            self.operations_done += 1
+            progress = int(self.operations_done / max(1, len(self.trace.events)) * 100)
+        if progress != self._progress:
+            self._progress = progress
+            self.progress_signal.emit(progress)
+
+    def _record_phase(self, phase, start, end, session, args=None):
+        LIVE_METRICS.phase_latency.observe(end - start, phase)
+        if self.timeline:
+            self.timeline.record(phase, start, end, session, args)
+
+    def format_summary(self):
+        lines = [stats.format_summary() for op, stats in self.operation_stats.items()
+                 if op == "upload" or stats.count or stats.errors]
+        lines += self.schedule.format_summary()
+        if self.failures:
+            lines.append("Failures by category: " + ", ".join(f"{category} {count}" for category, count in sorted(self.failures.items())))
+        return lines
+
+    def slo_metrics(self):
+        upload = self.upload_stats.summary()
+        attempts = upload["count"] + upload["errors"]
+        return {
+            "upload_latency_mean": upload["latency_mean"],
+            "upload_latency_p50": upload["latency_p50"],
+            "upload_latency_p95": upload["latency_p95"],
+            "upload_latency_p99": upload["latency_p99"],
+            "upload_latency_max": upload["latency_max"],
+            "error_rate": upload["errors"] / attempts if attempts else 0.0,
+            "throughput_mb_s": upload["bytes_per_sec"] / (1024 * 1024),
+            "uploads_per_sec": upload["ops_per_sec"],
+            "samples": attempts,
+            **self.schedule.slo_metrics(),
+        }
+
+    def result(self):
+        schedule = self.schedule.summary()
+        return {
+            "mode": "replay",
+            "connections": self.connections,
+            "trace_source": self.trace.source,
+            "seed": self.trace.seed,
+            "speed": self.speed,
+            "operations": len(self.trace.events),
+            "operations_done": self.operations_done,
+            "late_starts": schedule["late_starts"],
+            "max_lag": schedule["max_lag"],
+            "schedule": schedule,
+            "total_time": self.total_time,
+            "failures": dict(self.failures),
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "upload": self.upload_stats.summary(),
+            "series": self.upload_stats.per_second(),
+            "operations_by_type": {op: stats.summary() for op, stats in self.operation_stats.items() if op != "upload"},
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+        }
+
+    @staticmethod
+    def describe_result(result):
+        upload = result["upload"]
+        return (f"{result['label']}: {upload['count']} uploads, {upload['errors']} errors, "
+                f"{upload['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, p99 {upload['latency_p99'] * 1000:.1f} ms, "
+                f"{result['late_starts']} late starts")
+
+    @staticmethod
+    def report_row(result):
+        upload = result["upload"]
+        return {
+            "label": result["label"],
+            "connections": result["connections"],
+            "seed": result["seed"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "uploads": upload["count"],
+            "upload_errors": upload["errors"],
+            "throughput_mb_s": f"{upload['bytes_per_sec'] / (1024 * 1024):.3f}",
+            "latency_p50_ms": f"{upload['latency_p50'] * 1000:.1f}",
+            "latency_p99_ms": f"{upload['latency_p99'] * 1000:.1f}",
+            "speed": f"{result['speed']:g}",
+            **ScheduleStats.report_columns(result["schedule"]),
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
@@ -0,0 +1,119 @@
+"""Client side network shaping: bandwidth limits, added latency and packet loss."""
+import random
+import threading
+import time
+
+
+RATE_UNITS = {"BIT": 1 / 8, "KBIT": 1000 / 8, "MBIT": 1000 ** 2 / 8, "GBIT": 1000 ** 3 / 8,
+              "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_rate(value):
+    """Converts bandwidths like "2Mbit", "2 Mbit/s" or "512KB/s" into bytes per second, plain numbers are bytes per second."""
+    if value in (None, "", 0):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().upper().replace(" ", "")
+    if text.endswith("/S"):
+        text = text[:-2]
+    elif text.endswith("BPS"):
+        text = text[:-3] + "BIT"  # e.g. "2Mbps"
+    for unit in ("GBIT", "MBIT", "KBIT", "BIT", "GB", "MB", "KB", "B"):
+        if text.endswith(unit):
+            return float(text[:-len(unit)]) * RATE_UNITS[unit]
+    return float(text)
+
+
+class TokenBucket:
+    """Thread-safe token bucket, consumers go into debt and sleep it off, which keeps many sessions fair"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)  # Bytes per second
+        self.capacity = burst or max(32768.0, self.rate / 10)
+        self.tokens = self.capacity
+        self.timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp = now
+            self.tokens -= amount
+            debt = -self.tokens
+        if debt > 0:
+            time.sleep(debt / self.rate)
+
+
+class ShapedFile:
+    """File object wrapper for putfo that meters every chunk through token buckets and emulates packet loss stalls"""
+
+    def __init__(self, fileobj, buckets, shaper):
+        self.fileobj = fileobj
+        self.buckets = buckets
+        self.shaper = shaper
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        if data:
+            for bucket in self.buckets:
+                bucket.consume(len(data))
+            self.shaper.maybe_lose_chunk()
+        return data
+
+
+class NetworkShaper:
+    """Client-side WAN emulation in user space: bandwidth caps, added delay with jitter and loss stalls.
+
+    The global bucket is shared by every session of a run, each session gets its own per-connection bucket.
+    Delay is added once per request round trip (connection setup and each upload), a lost chunk stalls the
+    sender for loss_penalty seconds like a TCP retransmission timeout would.
+    """
+
+    def __init__(self, bandwidth_per_connection=None, bandwidth_total=None, delay_ms=0, jitter_ms=0, loss_rate=0.0, loss_penalty_ms=200):
+        self.bandwidth_per_connection = parse_rate(bandwidth_per_connection)
+        self.bandwidth_total = parse_rate(bandwidth_total)
+        self.delay = float(delay_ms or 0) / 1000
+        self.jitter = float(jitter_ms or 0) / 1000
+        self.loss_rate = float(loss_rate or 0)
+        self.loss_penalty = float(loss_penalty_ms or 0) / 1000
+        self.global_bucket = TokenBucket(self.bandwidth_total) if self.bandwidth_total else None
+        self._random = random.Random()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates a shaper from the network section of a test plan, returns None when nothing is emulated."""
+        shaper = cls(**(settings or {}))
+        return shaper if shaper.is_active() else None
+
+    def is_active(self):
+        return bool(self.bandwidth_per_connection or self.bandwidth_total or self.delay or self.jitter or self.loss_rate)
+
+    def connection_buckets(self):
+        """Returns the buckets a new session has to pass, its own one first and then the shared one."""
+        buckets = [TokenBucket(self.bandwidth_per_connection)] if self.bandwidth_per_connection else []
+        if self.global_bucket:
+            buckets.append(self.global_bucket)
+        return buckets
+
+    def inject_delay(self, round_trips=1):
+        if self.delay or self.jitter:
+            delay = sum(max(0.0, self._random.gauss(self.delay, self.jitter)) for _ in range(round_trips))
+            time.sleep(delay)
+
+    def maybe_lose_chunk(self):
+        if self.loss_rate and self._random.random() < self.loss_rate:
+            time.sleep(self.loss_penalty)
+
+    def describe(self):
+        parts = []
+        if self.bandwidth_per_connection:
+            parts.append(f"{self.bandwidth_per_connection * 8 / 1000 ** 2:.2f} Mbit/s per connection")
+        if self.bandwidth_total:
+            parts.append(f"{self.bandwidth_total * 8 / 1000 ** 2:.2f} Mbit/s total")
+        if self.delay or self.jitter:
+            parts.append(f"{self.delay * 1000:.0f} ms delay ± {self.jitter * 1000:.0f} ms jitter")
+        if self.loss_rate:
+            parts.append(f"{self.loss_rate * 100:.2f}% loss")
+        return ", ".join(parts)
@@ -0,0 +1,428 @@
+"""Loopback SFTP sink server: a paramiko SFTP server that keeps files in memory or only their names and sizes.
+
+Uploads with the scp protocol ("scp -t" exec requests) land in the same namespace.
+
+Used to measure the ceiling of the client (see calibration.py) and to exercise the engine without a real server.
+Optional per-request latency and bandwidth limits make it behave like a slower server.
+"""
+import errno
+import os
+import posixpath
+import shlex
+import socket
+import stat
+import threading
+import time
+
+import paramiko
+
+from .shaping import TokenBucket, parse_rate
+
+
+class SinkFile:
+    """One file of the sink, data is only kept when the server stores uploads"""
+    __slots__ = ("size", "data", "mtime")
+
+    def __init__(self, store):
+        self.size = 0
+        self.data = bytearray() if store else None
+        self.mtime = int(time.time())
+
+    def attributes(self, name):
+        attributes = paramiko.SFTPAttributes()
+        attributes.filename = name
+        attributes.st_size = self.size
+        attributes.st_mode = stat.S_IFREG | 0o644
+        attributes.st_atime = attributes.st_mtime = self.mtime
+        attributes.st_uid = attributes.st_gid = 0
+        return attributes
+
+
+class SinkHandle(paramiko.SFTPHandle):
+    def __init__(self, sink, path, entry, flags):
+        super().__init__(flags)
+        self.sink = sink
+        self.path = path
+        self.entry = entry
+        self.writable = bool(flags & (os.O_WRONLY | os.O_RDWR))
+
+    def write(self, offset, data):
+        self.sink.delay()
+        return self.store(offset, data)
+
+    def store(self, offset, data):
+        """Writes data without the request latency, scp streams its data instead of sending requests."""
+        self.sink.throttle(len(data))
+        entry = self.entry
+        if entry.data is not None:
+            if offset > len(entry.data):
+                entry.data.extend(bytes(offset - len(entry.data)))
+            entry.data[offset:offset + len(data)] = data
+        entry.size = max(entry.size, offset + len(data))
+        entry.mtime = int(time.time())
+        self.sink.count_bytes(len(data))
+        return paramiko.SFTP_OK
+
+    def read(self, offset, length):
+        self.sink.delay()
+        entry = self.entry
+        length = max(0, min(length, entry.size - offset))
+        self.sink.throttle(length)
+        if length == 0:
+            return b""
+        if entry.data is not None:
+            return bytes(entry.data[offset:offset + length])
+        return bytes(length)  # Discarded uploads read back as zeros
+
+    def stat(self):
+        self.sink.delay()
+        return self.entry.attributes(posixpath.basename(self.path))
+
+    def close(self):
+        self.sink.delay()
+        if self.writable:  # Downloads do not count as written files
+            self.sink.count_file()
+
+
+class SinkFileSystem(paramiko.SFTPServerInterface):
+    """SFTP requests of one session, served from the shared namespace of the SinkServer"""
+
+    def __init__(self, server, sink, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.sink = sink
+
+    def session_started(self):
+        self.sink.count_session()
+
+    def canonicalize(self, path):
+        return self.sink.normalize(path)
+
+    def open(self, path, flags, attr):
+        self.sink.delay()
+        return self.sink.open(self.sink.normalize(path), flags)
+
+    def list_folder(self, path):
+        self.sink.delay()
+        return self.sink.list_folder(self.sink.normalize(path))
+
+    def stat(self, path):
+        self.sink.delay()
+        return self.sink.stat(self.sink.normalize(path))
+
+    lstat = stat
+
+    def remove(self, path):
+        self.sink.delay()
+        return self.sink.remove(self.sink.normalize(path))
+
+    def rename(self, oldpath, newpath):
+        self.sink.delay()
+        return self.sink.rename(self.sink.normalize(oldpath), self.sink.normalize(newpath))
+
+    posix_rename = rename
+
+    def mkdir(self, path, attr):
+        self.sink.delay()
+        return self.sink.mkdir(self.sink.normalize(path))
+
+    def rmdir(self, path):
+        self.sink.delay()
+        return self.sink.rmdir(self.sink.normalize(path))
+
+    def chattr(self, path, attr):
+        self.sink.delay()
+        return paramiko.SFTP_OK
+
+
+class SinkAuthentication(paramiko.ServerInterface):
+    """Accepts every password, or only the configured user and password, and hands exec requests to exec_handler"""
+
+    def __init__(self, username=None, password=None, exec_handler=None):
+        self.username = username
+        self.password = password
+        self.exec_handler = exec_handler  # Callable (channel, command) returning whether the command runs
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if self.username is None or (username == self.username and password == self.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        return bool(self.exec_handler and self.exec_handler(channel, command))
+
+
+class SinkServer:
+    """SFTP server on a local port that accepts every upload as fast as the machine allows.
+
+    With store=False only names and sizes are kept, so uploads of any size cost no memory and downloads read zeros.
+    latency (seconds) is added to every request, requests of one session are served one after the other like by
+    OpenSSH's sftp-server. bandwidth_total and bandwidth_per_session (e.g. "1Gbit") limit reads and writes.
+    Directories exist once created or once a file was written into them, the root always exists.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, store=False, latency=0.0, bandwidth_total=None,
+                 bandwidth_per_session=None, username=None, password=None, reuse_port=False):
+        self.host = host
+        self.port = port
+        self.store = store
+        self.latency = float(latency or 0.0)
+        self.bandwidth_total = parse_rate(bandwidth_total)
+        self.bandwidth_per_session = parse_rate(bandwidth_per_session)
+        self.reuse_port = reuse_port
+        self.authentication = SinkAuthentication(username, password, self.exec_command)
+        self.files = {}  # Normalized path -> SinkFile
+        self.directories = {"/"}
+        self.sessions = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        self._total_bucket = TokenBucket(self.bandwidth_total) if self.bandwidth_total else None
+        self._session_buckets = threading.local()
+        self._lock = threading.Lock()
+        self._host_key = None
+        self._socket = None
+        self._transports = []
+        self._running = threading.Event()
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def start(self):
+        """Binds the port (port 0 picks a free one, see address) and accepts connections in a background thread."""
+        self._host_key = paramiko.ECDSAKey.generate()  # Generated per start, much faster than an RSA key
+        self._socket = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            # Several sink processes share one port, the kernel spreads the connections over them (Linux, BSD)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(1024)
+        self.port = self._socket.getsockname()[1]
+        self._running.set()
+        threading.Thread(target=self._accept_loop, name="sink-accept", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running.clear()
+        if self._socket:
+            self._socket.close()
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+
+    def _accept_loop(self):
+        while self._running.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return  # Socket closed by stop()
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(connection)
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, SinkFileSystem, self)
+            with self._lock:
+                self._transports = [active for active in self._transports if active.is_active()]
+                self._transports.append(transport)
+            try:
+                # Negotiates in the transport's own thread, every session is served by its transport thread
+                transport.start_server(event=threading.Event(), server=self.authentication)
+            except (paramiko.SSHException, EOFError, OSError):
+                transport.close()
+
+    def describe(self):
+        limits = []
+        if self.latency:
+            limits.append(f"{self.latency * 1000:g} ms per request")
+        if self.bandwidth_total:
+            limits.append(f"{self.bandwidth_total * 8 / 1000 ** 2:g} Mbit/s total")
+        if self.bandwidth_per_session:
+            limits.append(f"{self.bandwidth_per_session * 8 / 1000 ** 2:g} Mbit/s per session")
+        return (f"SFTP/SCP sink on {self.host}:{self.port}, {'keeps uploads in memory' if self.store else 'discards uploads'}"
+                f"{', ' + ', '.join(limits) if limits else ''}")
+
+    def format_summary(self):
+        return (f"Sink: {self.sessions} sessions, {self.files_written} files closed, "
+                f"{self.bytes_written / (1024 * 1024):.2f} MB written")
+
+    def exec_command(self, channel, command):
+        """Accepts "scp -t <path>", the receiving side of an scp upload, and serves it in a thread of its own."""
+        try:
+            args = shlex.split(command.decode("utf-8"))
+        except ValueError:
+            return False
+        if len(args) < 3 or args[0] != "scp" or "-t" not in args[1:-1]:
+            return False
+        threading.Thread(target=self._receive_scp, args=(channel, self.normalize(args[-1])), name="sink-scp",
+                         daemon=True).start()
+        return True
+
+    def _receive_scp(self, channel, target):
+        """Receives the files of an scp upload into target, or into the directory target, acknowledging every step."""
+        self.count_session()
+        status = 0
+        try:
+            stream = channel.makefile("rb")
+            channel.sendall(b"\0")
+            while True:
+                header = stream.readline()
+                if not header:
+                    break  # The client is done
+                if header.startswith(b"T"):  # Modification times of scp -p
+                    channel.sendall(b"\0")
+                    continue
+                if not header.startswith(b"C"):
+                    channel.sendall(b"\x02scp: only regular files are supported\n")
+                    status = 1
+                    break
+                _, size, name = header[1:].decode("utf-8").rstrip("\n").split(" ", 2)
+                with self._lock:
+                    is_directory = target in self.directories
+                path = posixpath.join(target, name) if is_directory else target
+                self.delay()
+                handle = self.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+                if not isinstance(handle, SinkHandle):
+                    channel.sendall(f"\x01scp: {path}: Is a directory\n".encode("utf-8"))
+                    status = 1
+                    break
+                channel.sendall(b"\0")
+                offset, size = 0, int(size)
+                while offset < size:
+                    data = stream.read(min(32768, size - offset))
+                    if not data:
+                        raise EOFError("scp upload ended early")
+                    handle.store(offset, data)
+                    offset += len(data)
+                if stream.read(1) != b"\0":
+                    raise EOFError("scp upload ended early")
+                handle.close()
+                channel.sendall(b"\0")
+        except (OSError, EOFError, ValueError, paramiko.SSHException):
+            status = 1
+        finally:
+            try:
+                channel.send_exit_status(status)
+            except (OSError, EOFError, paramiko.SSHException):
+                pass
+            channel.close()
+
+    # Shared namespace, called by the SinkFileSystem of every session
+
+    @staticmethod
+    def normalize(path):
+        return posixpath.normpath("/" + (path or ".")).replace("//", "/")
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def throttle(self, nbytes):
+        if self.bandwidth_per_session:
+            bucket = getattr(self._session_buckets, "bucket", None)
+            if bucket is None:  # paramiko serves every session in its own thread
+                bucket = self._session_buckets.bucket = TokenBucket(self.bandwidth_per_session)
+            bucket.consume(nbytes)
+        if self._total_bucket:
+            self._total_bucket.consume(nbytes)
+
+    def count_session(self):
+        with self._lock:
+            self.sessions += 1
+
+    def count_file(self):
+        with self._lock:
+            self.files_written += 1
+
+    def count_bytes(self, nbytes):
+        with self._lock:
+            self.bytes_written += nbytes
+
+    def open(self, path, flags):
+        with self._lock:
+            entry = self.files.get(path)
+            if entry is None:
+                if not flags & os.O_CREAT:
+                    return paramiko.SFTP_NO_SUCH_FILE
+                if path in self.directories:
+                    return paramiko.SFTPServer.convert_errno(errno.EISDIR)
+                entry = self.files[path] = SinkFile(self.store)
+                self._add_parents(path)
+            elif flags & os.O_CREAT and flags & os.O_EXCL:
+                return paramiko.SFTPServer.convert_errno(errno.EEXIST)
+            elif flags & os.O_TRUNC:
+                entry.size = 0
+                if entry.data is not None:
+                    entry.data = bytearray()
+        return SinkHandle(self, path, entry, flags)
+
+    def list_folder(self, path):
+        with self._lock:
+            if path not in self.directories:
+                return paramiko.SFTP_NO_SUCH_FILE
+            entries = [entry.attributes(posixpath.basename(name)) for name, entry in self.files.items()
+                       if posixpath.dirname(name) == path]
+            entries += [self._directory_attributes(posixpath.basename(name)) for name in self.directories
+                        if name != path and posixpath.dirname(name) == path]
+        return entries
+
+    def stat(self, path):
+        with self._lock:
+            entry = self.files.get(path)
+            if entry is not None:
+                return entry.attributes(posixpath.basename(path))
+            if path in self.directories:
+                return self._directory_attributes(posixpath.basename(path))
+        return paramiko.SFTP_NO_SUCH_FILE
+
+    def remove(self, path):
+        with self._lock:
+            if self.files.pop(path, None) is None:
+                return paramiko.SFTP_NO_SUCH_FILE
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        with self._lock:
+            entry = self.files.pop(oldpath, None)
+            if entry is None:
+                return paramiko.SFTP_NO_SUCH_FILE
+            self.files[newpath] = entry
+            self._add_parents(newpath)
+        return paramiko.SFTP_OK
+
+    def mkdir(self, path):
+        with self._lock:
+            if path in self.directories or path in self.files:
+                return paramiko.SFTPServer.convert_errno(errno.EEXIST)
+            self.directories.add(path)
+        return paramiko.SFTP_OK
+
+    def rmdir(self, path):
+        with self._lock:
+            if path not in self.directories or path == "/":
+                return paramiko.SFTP_NO_SUCH_FILE
+            if any(posixpath.dirname(name) == path for name in (*self.files, *self.directories)):
+                return paramiko.SFTPServer.convert_errno(errno.ENOTEMPTY)
+            self.directories.discard(path)
+        return paramiko.SFTP_OK
+
+    def _add_parents(self, path):
+        parent = posixpath.dirname(path)
+        while parent not in self.directories:
+            self.directories.add(parent)
+            parent = posixpath.dirname(parent)
+
+    @staticmethod
+    def _directory_attributes(name):
+        attributes = paramiko.SFTPAttributes()
+        attributes.filename = name
+        attributes.st_size = 0
+        attributes.st_mode = stat.S_IFDIR | 0o755
+        attributes.st_atime = attributes.st_mtime = int(time.time())
+        attributes.st_uid = attributes.st_gid = 0
+        return attributes
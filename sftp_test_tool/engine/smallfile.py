@@ -0,0 +1,396 @@
+"""Small-file benchmark: many tiny files per session, pipelined over the SFTP channel."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import paramiko
+from paramiko.sftp import (CMD_ATTRS, CMD_CLOSE, CMD_OPEN, CMD_STAT, CMD_STATUS, CMD_WRITE, SFTP_FLAG_CREATE, SFTP_FLAG_TRUNC,
+                           SFTP_FLAG_WRITE, int64)
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats
+from .base import BenchmarkWorker
+from .connection import classify_error, connect_sftp
+from .payload import FileIndex
+from .plan import TestPlan, format_size, parse_size, test_file_name
+
+
+class PipelinedUploader:
+    """Uploads many small files over one SFTP session with up to window files in flight.
+
+    put/putfo wait for the open, the close and the confirming stat of every file before the next one starts, so tiny
+    files measure round trips instead of the server's capacity. This sends the requests of several files without
+    waiting and reacts to the responses as they arrive, using paramiko's request/response primitives because paramiko
+    has no public API for overlapping requests of different files. A close is only sent once all writes of its file
+    are acknowledged.
+    """
+    CHUNK_SIZE = 32768
+
+    def __init__(self, sftp, window=16, confirm=False):
+        self.sftp = sftp
+        self.window = max(1, window)
+        self.confirm = confirm  # Stat every file after closing it and compare the size, like put(confirm=True)
+        self.requests_sent = 0
+        self._requests = {}  # Request number -> (step, transfer state)
+        self._active = 0
+
+    def upload(self, files, on_done, stop_event=None):
+        """Uploads an iterable of (remote_path, data) pairs, calls on_done(remote_path, start, end, nbytes, error) per file."""
+        self._files = iter(files)
+        self._on_done = on_done
+        self._stop_event = stop_event
+        self._requests = {}
+        self._active = 0
+        try:
+            while self._active < self.window and self._start_next():
+                pass
+            while self._active:
+                self.sftp._read_response()  # Reads one response and hands it to _async_response
+        except Exception as e:
+            # The session failed, every file still in flight failed with it
+            for transfer in {id(transfer): transfer for _, transfer in self._requests.values()}.values():
+                on_done(transfer["path"], transfer["start"], time.perf_counter(), len(transfer["data"]), e)
+            raise
+
+    def _start_next(self):
+        if self._stop_event and self._stop_event.is_set():
+            return False
+        item = next(self._files, None)
+        if item is None:
+            return False
+        remote_path, data = item
+        transfer = {"path": remote_path, "data": data, "start": time.perf_counter(), "handle": None, "writes": 0, "error": None}
+        self._active += 1
+        self._send(transfer, "open", CMD_OPEN, self.sftp._adjust_cwd(remote_path),
+                   SFTP_FLAG_WRITE | SFTP_FLAG_CREATE | SFTP_FLAG_TRUNC, paramiko.SFTPAttributes())
+        return True
+
+    def _send(self, transfer, step, command, *args):
+        num = self.sftp._async_request(self, command, *args)
+        self._requests[num] = (step, transfer)
+        self.requests_sent += 1
+
+    def _async_response(self, t, msg, num):
+        """Called by paramiko for every response to a request of this uploader."""
+        step, transfer = self._requests.pop(num)
+        if t == CMD_STATUS:
+            try:
+                self.sftp._convert_status(msg)  # Raises IOError or EOFError for error codes
+            except (IOError, EOFError) as e:
+                transfer["error"] = transfer["error"] or e
+
+        if step == "open":
+            if transfer["error"]:
+                self._finish(transfer)
+                return
+            transfer["handle"] = msg.get_binary()
+            data = transfer["data"]
+            for offset in range(0, len(data), self.CHUNK_SIZE):
+                self._send(transfer, "write", CMD_WRITE, transfer["handle"], int64(offset), data[offset:offset + self.CHUNK_SIZE])
+                transfer["writes"] += 1
+            if not transfer["writes"]:
+                self._send(transfer, "close", CMD_CLOSE, transfer["handle"])
+        elif step == "write":
+            transfer["writes"] -= 1
+            if not transfer["writes"]:
+                self._send(transfer, "close", CMD_CLOSE, transfer["handle"])
+        elif step == "close":
+            if self.confirm and not transfer["error"]:
+                self._send(transfer, "stat", CMD_STAT, self.sftp._adjust_cwd(transfer["path"]))
+            else:
+                self._finish(transfer)
+        elif step == "stat":
+            if t == CMD_ATTRS:
+                size = paramiko.SFTPAttributes._from_msg(msg).st_size
+                if size != len(transfer["data"]):
+                    transfer["error"] = IOError(f"size mismatch in put!  {size} != {len(transfer['data'])}")
+            self._finish(transfer)
+
+    def _finish(self, transfer):
+        self._active -= 1
+        self._on_done(transfer["path"], transfer["start"], time.perf_counter(), len(transfer["data"]), transfer["error"])
+        self._start_next()
+
+
+class SmallFileWorker(BenchmarkWorker):
+    """Worker thread for the small-file benchmark: many tiny files per session with several files in flight, reported as files/s"""
+    TITLE = "small-file benchmark"
+    DEFAULT_FILE_SIZE = 1024
+
+    def __init__(self, connections: int, host: str, port: int, directory: str, username: str, password: str,
+                 files_per_connection: int = 1000, window: int = 16, confirm: bool = False, payload_path: str = "",
+                 file_size: int = None, cleanup_after_run: bool = False, connect_timeout: float = None,
+                 operation_timeout: float = None, success_criteria: dict = None):
+        super().__init__(success_criteria)
+        self.connections = connections
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.files_per_connection = files_per_connection
+        self.window = window  # Files in flight per session
+        self.confirm = confirm
+        self.payload_path = payload_path  # A file or folder whose contents are uploaded, generated payload otherwise
+        self.file_size = file_size
+        self.cleanup_after_run = cleanup_after_run
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        self.files_done = 0
+        self.requests_sent = 0
+        self.created_files = []
+        self.file_stats = OperationStats("Small file", self.spill)
+        self.delete_stats = None
+        self.failures = {}  # Error category -> count
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        smallfile = point["smallfile"]
+        return cls(int(point["load"]["connections"]), target["host"], int(target["port"]), target["directory"],
+                   target["username"], TestPlan.resolve_password(target),
+                   files_per_connection=int(smallfile["files_per_connection"]),
+                   window=int(smallfile["window"]),
+                   confirm=bool(smallfile.get("confirm")),
+                   payload_path=point["payload"].get("path") or "",
+                   file_size=parse_size(point["payload"].get("file_size")),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"))
+
+    def load_payloads(self):
+        """Returns the (file name, content) pairs uploaded in turns, kept in memory since the files are small."""
+        if self.file_size is None and self.payload_path and os.path.isdir(self.payload_path):
+            payloads = []
+            for entry in FileIndex.scan(self.payload_path).entries:
+                with open(entry.path, "rb") as f:
+                    payloads.append((entry.name, f.read()))
+            if payloads:
+                return payloads
+        if self.file_size is None and self.payload_path and os.path.isfile(self.payload_path):
+            with open(self.payload_path, "rb") as f:
+                return [(os.path.basename(self.payload_path), f.read())]
+        size = self.file_size if self.file_size is not None else self.DEFAULT_FILE_SIZE
+        return [("smallfile.dat", b"\0" * size)]
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.file_stats = OperationStats("Small file", self.spill)
+        self.delete_stats = None
+        self.failures = {}
+        self.created_files = []
+        self.files_done = 0
+        self.requests_sent = 0
+        self.verdict = None
+        self.abort_reason = None
+        start_time = time.time()
+        end_time = None
+
+        try:
+            payloads = self.load_payloads()
+        except OSError as e:
+            self.log_signal.emit(f"Could not read small-file payload '{self.payload_path}' - {str(e)}")
+            payloads = []
+        total = self.connections * self.files_per_connection
+        if payloads:
+            average = sum(len(data) for _, data in payloads) / len(payloads)
+            self.log_signal.emit(f"Small-file benchmark: {total} files ({len(payloads)} distinct, {format_size(int(average))} on average) "
+                                 f"over {self.connections} sessions, {self.window} files in flight per session, "
+                                 f"{'with' if self.confirm else 'without'} stat confirm.")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        try:
+            if payloads:
+                with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                    futures = [executor.submit(self._session_task, task_id, payloads) for task_id in range(self.connections)]
+                    for future in as_completed(futures):
+                        future.result()
+            end_time = time.time()
+            if not self.file_stats.count and not self.stop_event.is_set() and not self.abort_reason:
+                self.abort_reason = "no file was uploaded"
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary(end_time - start_time):
+                self.log_signal.emit(line)
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.cleanup_after_run and self.created_files and not self.stop_event.is_set():
+                self.run_cleanup_phase()
+        finally:
+            run_finished.set()
+            self.network_monitor.stop()
+            self.network_monitor.wait()
+            if end_time is None:
+                end_time = time.time()
+            self.total_time = end_time - start_time
+            self.evaluate_thresholds()
+            if self.abort_reason and self.verdict is None:  # Fails without success criteria too
+                self.verdict = False
+                self.verdict_signal.emit(False, self.abort_reason)
+            self.log_signal.emit("=" * 50)
+            if self.abort_reason:
+                self.log_signal.emit(f"Small-file benchmark was aborted after {self.files_done} files in {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Small-file benchmark was canceled after {self.files_done} files in {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Completed {self.files_done} of {total} small-file uploads in {self.total_time:.2f} seconds.")
+
+    def _session_task(self, task_id, payloads):
+        """Uploads files_per_connection files over one session."""
+        if self.stop_event.is_set():
+            return
+        transport = None
+        sftp = None
+        uploader = None
+        sent = 0  # Files handed to the uploader
+        reported = 0  # Files reported through _file_done
+
+        def file_done(*args):
+            nonlocal reported
+            reported += 1
+            self._file_done(*args)
+
+        try:
+            transport, sftp = connect_sftp(self.host, self.port, self.username, self.password,
+                                           connect_timeout=self.connect_timeout, operation_timeout=self.operation_timeout,
+                                           connector=self.connector)
+            LIVE_METRICS.active_sessions.inc()
+
+            def files():
+                nonlocal sent
+                for number in range(self.files_per_connection):
+                    name, data = payloads[(task_id + number) % len(payloads)]
+                    remote_path = f"{self.directory}/{test_file_name(name, task_id, number)}"
+                    self.created_files.append(remote_path)
+                    LIVE_METRICS.uploads_in_flight.inc()
+                    sent += 1
+                    yield remote_path, data
+
+            uploader = PipelinedUploader(sftp, self.window, self.confirm)
+            uploader.upload(files(), file_done, self.stop_event)
+        except Exception as e:
+            LIVE_METRICS.errors.inc(label_value=classify_error(e))
+            LIVE_METRICS.uploads_in_flight.dec(sent - reported)
+            self.log_signal.emit(f"Task {task_id}: Session failed - {str(e) or type(e).__name__}")
+            self._files_lost(e, self.files_per_connection - reported)
+        finally:
+            if uploader:
+                with self._lock:
+                    self.requests_sent += uploader.requests_sent
+            if sftp:
+                sftp.close()
+                LIVE_METRICS.active_sessions.dec()
+            if transport:
+                transport.close()
+
+    def _file_done(self, remote_path, start, end, nbytes, error):
+        LIVE_METRICS.uploads_in_flight.dec()
+        if error:
+            category = classify_error(error)
+            self.file_stats.record_error()
+            LIVE_METRICS.errors.inc(label_value=category)
+            with self._lock:
+                first = category not in self.failures
+                self.failures[category] = self.failures.get(category, 0) + 1
+            if first:  # Only the first error of each kind, thousands of files would flood the log otherwise
+                self.log_signal.emit(f"First {category} error on '{remote_path}' - {str(error) or type(error).__name__}")
+        else:
+            self.file_stats.record(start, end, nbytes)
+            LIVE_METRICS.phase_latency.observe(end - start, "upload")
+            LIVE_METRICS.uploads.inc()
+            LIVE_METRICS.bytes_uploaded.inc(nbytes)
+            LIVE_METRICS.recent_latencies.append(end - start)
+        with self._lock:
+            self.files_done += 1
+            done = self.files_done
+        total = self.connections * self.files_per_connection
+        if done * 100 // total != (done - 1) * 100 // total:
+            self.progress_signal.emit(done * 100 // total)
+
+    def _files_lost(self, error, count):
+        """Counts the files of a failed session that were never reported as failed uploads, so a dead server fails the
+        error rate instead of leaving no samples."""
+        if count <= 0:
+            return
+        category = classify_error(error)
+        for _ in range(count):
+            self.file_stats.record_error()
+        with self._lock:
+            self.failures[category] = self.failures.get(category, 0) + count
+            self.files_done += count
+            done = self.files_done
+        self.progress_signal.emit(min(100, done * 100 // (self.connections * self.files_per_connection)))
+
+    def _rates(self, elapsed):
+        summary = self.file_stats.summary()
+        if elapsed <= 0:
+            return summary, 0.0, 0.0
+        return summary, summary["count"] / elapsed, self.requests_sent / elapsed
+
+    def format_summary(self, elapsed):
+        summary, files_per_sec, requests_per_sec = self._rates(elapsed)
+        lines = [f"Small files: {summary['count']} ok, {summary['errors']} failed in {elapsed:.2f}s | {files_per_sec:.1f} files/s | "
+                f"{requests_per_sec:.1f} SFTP requests/s",
+                f"File latency (open to close{' and stat' if self.confirm else ''}): mean {summary['latency_mean'] * 1000:.1f} ms, "
+                f"p50 {summary['latency_p50'] * 1000:.1f} ms, p95 {summary['latency_p95'] * 1000:.1f} ms, "
+                f"p99 {summary['latency_p99'] * 1000:.1f} ms, max {summary['latency_max'] * 1000:.1f} ms"]
+        if self.failures:
+            lines.append("Failures by category: " + ", ".join(f"{category} {count}" for category, count in sorted(self.failures.items())))
+        return lines
+
+    def slo_metrics(self):
+        summary = self.file_stats.summary()
+        attempts = summary["count"] + summary["errors"]
+        elapsed = self.total_time or summary["elapsed"]  # Wall clock time once the run is over
+        return {
+            "file_latency_p50": summary["latency_p50"],
+            "file_latency_p99": summary["latency_p99"],
+            "files_per_sec": summary["count"] / elapsed if elapsed > 0 else 0.0,
+            "error_rate": summary["errors"] / attempts if attempts else 0.0,
+            "samples": attempts,
+        }
+
+    def result(self):
+        summary, files_per_sec, requests_per_sec = self._rates(self.total_time)
+        return {
+            "mode": "smallfile",
+            "connections": self.connections,
+            "window": self.window,
+            "confirm": self.confirm,
+            "total_time": self.total_time,
+            "files_per_sec": files_per_sec,
+            "requests_per_sec": requests_per_sec,
+            "failures": dict(self.failures),
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "files": summary,
+            "series": self.file_stats.per_second(),
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+        }
+
+    @staticmethod
+    def describe_result(result):
+        files = result["files"]
+        return (f"{result['label']}: {files['count']} files, {files['errors']} errors, {result['files_per_sec']:.1f} files/s, "
+                f"p99 {files['latency_p99'] * 1000:.1f} ms")
+
+    @staticmethod
+    def report_row(result):
+        files = result["files"]
+        return {
+            "label": result["label"],
+            "connections": result["connections"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "files": files["count"],
+            "file_errors": files["errors"],
+            "files_per_sec": f"{result['files_per_sec']:.1f}",
+            "requests_per_sec": f"{result['requests_per_sec']:.1f}",
+            "latency_p50_ms": f"{files['latency_p50'] * 1000:.1f}",
+            "latency_p99_ms": f"{files['latency_p99'] * 1000:.1f}",
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
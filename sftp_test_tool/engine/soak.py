@@ -0,0 +1,332 @@
+"""Soak test: long-lived sessions with keepalives, periodic uploads and forced rekeying."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats, percentile
+from .base import BenchmarkWorker
+from .connection import classify_error, connect_sftp
+from .payload import GeneratedPayload
+from .plan import TestPlan, format_size, parse_size, test_file_name
+
+
+class SoakWorker(BenchmarkWorker):
+    """Worker thread for the soak test: sessions stay open for the whole run, upload on an interval, send keepalives
+    and are forced to rekey, tracking session survival, rekey latency and the memory of this process over time"""
+    TITLE = "soak test"
+    DEFAULT_FILE_SIZE = 1024 ** 2
+    MEMORY_WARMUP = 0.1  # Share of the run left out of the memory growth fit (imports, session setup)
+
+    def __init__(self, connections: int, host: str, port: int, directory: str, username: str, password: str,
+                 duration: float = 3600, upload_interval: float = 10, keepalive: int = 30, rekey_bytes: int = None,
+                 rekey_interval: float = None, reconnect: bool = False, payload_path: str = "", file_size: int = None,
+                 cleanup_after_run: bool = False, connect_timeout: float = None, operation_timeout: float = None,
+                 success_criteria: dict = None):
+        super().__init__(success_criteria)
+        self.connections = connections
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.duration = duration  # Seconds
+        self.upload_interval = upload_interval  # Seconds between the uploads of one session
+        self.keepalive = keepalive  # Seconds between SSH keepalives, 0 disables them
+        self.rekey_bytes = rekey_bytes  # Force a key renegotiation after this many uploaded bytes per session
+        self.rekey_interval = rekey_interval  # Force a key renegotiation after this many seconds per session
+        self.reconnect = reconnect  # Replace dropped sessions instead of ending them
+        self.payload_path = payload_path
+        self.file_size = file_size
+        self.cleanup_after_run = cleanup_after_run
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        self.created_files = []
+        self.upload_stats = OperationStats("Upload", self.spill)
+        self.rekey_stats = OperationStats("Rekey", self.spill)
+        self.delete_stats = None
+        self.sessions_started = 0
+        self.sessions_dropped = 0
+        self.drops = {}  # "phase/category" -> count
+        self.lifetimes = []  # Seconds every dropped session stayed alive
+        self.memory = None  # Memory summary, taken once when the soak phase ends
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        soak = point["soak"]
+        return cls(int(point["load"]["connections"]), target["host"], int(target["port"]), target["directory"],
+                   target["username"], TestPlan.resolve_password(target),
+                   duration=float(soak["duration"]),
+                   upload_interval=float(soak["upload_interval"]),
+                   keepalive=int(soak.get("keepalive") or 0),
+                   rekey_bytes=parse_size(soak.get("rekey_bytes")),
+                   rekey_interval=float(soak["rekey_interval"]) if soak.get("rekey_interval") else None,
+                   reconnect=bool(soak.get("reconnect")),
+                   payload_path=point["payload"].get("path") or "",
+                   file_size=parse_size(point["payload"].get("file_size")),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"))
+
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        self.created_files = []
+        self.upload_stats = OperationStats("Upload", self.spill)
+        self.rekey_stats = OperationStats("Rekey", self.spill)
+        self.delete_stats = None
+        self.sessions_started = 0
+        self.sessions_dropped = 0
+        self.drops = {}
+        self.lifetimes = []
+        self.memory = None
+        self.verdict = None
+        self.abort_reason = None
+        start_time = self._started = time.time()
+        end_time = None
+
+        if self.file_size is None and not os.path.isfile(self.payload_path):
+            self.file_size = self.DEFAULT_FILE_SIZE
+        rekey = " and ".join(part for part in (f"every {format_size(self.rekey_bytes)}" if self.rekey_bytes else "",
+                                                 f"every {self.rekey_interval:g} seconds" if self.rekey_interval else "") if part)
+        self.log_signal.emit(f"Soak test: {self.connections} sessions for {self.duration:g} seconds, one upload of "
+                             f"{format_size(self.file_size) if self.file_size is not None else os.path.basename(self.payload_path)} "
+                             f"every {self.upload_interval:g} seconds per session, keepalive "
+                             f"{f'every {self.keepalive} seconds' if self.keepalive else 'off'}, rekey {rekey or 'off'}, "
+                             f"{'reconnecting' if self.reconnect else 'not reconnecting'} dropped sessions.")
+
+        self.network_monitor.start()
+        run_finished = self.start_threshold_watch()
+        deadline = time.monotonic() + self.duration
+        status_interval = min(60.0, max(5.0, self.duration / 10))
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                futures = [executor.submit(self._session_task, task_id, deadline) for task_id in range(self.connections)]
+                while True:
+                    _, pending = wait(futures, timeout=status_interval)
+                    if not pending:
+                        break
+                    self.log_signal.emit(self.format_status(time.time() - start_time))
+            end_time = time.time()
+            self._finish_memory(end_time - start_time)  # Before the cleanup phase, its sessions are not part of the soak
+            self.log_signal.emit("=" * 50)
+            for line in self.format_summary():
+                self.log_signal.emit(line)
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.cleanup_after_run and self.created_files and not self.stop_event.is_set():
+                self.run_cleanup_phase()
+        finally:
+            run_finished.set()
+            if end_time is None:
+                end_time = time.time()
+            if self.memory is None:
+                self._finish_memory(end_time - start_time)
+            self.total_time = end_time - start_time
+            self.evaluate_thresholds()
+            self.log_signal.emit("=" * 50)
+            if self.abort_reason:
+                self.log_signal.emit(f"Soak test was aborted after {self.total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit(f"Soak test was canceled after {self.total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit(f"Completed soak test of {self.total_time:.2f} seconds.")
+
+    def _session_task(self, task_id, deadline):
+        """Keeps one session alive until the deadline, reconnecting after drops if enabled."""
+        name = os.path.basename(self.payload_path) if self.file_size is None else "soak.dat"
+        remote_path = f"{self.directory}/{test_file_name(name, task_id)}"  # Overwritten by every upload of this session
+        self.created_files.append(remote_path)
+        connect_failed = False  # Only the first of consecutive connect failures is logged
+        while not self.stop_event.is_set() and time.monotonic() < deadline:
+            transport = None
+            sftp = None
+            phase = "connect"
+            opened_at = time.monotonic()
+            try:
+                transport, sftp = connect_sftp(self.host, self.port, self.username, self.password,
+                                               connect_timeout=self.connect_timeout, operation_timeout=self.operation_timeout,
+                                               connector=self.connector)
+                if self.keepalive:
+                    transport.set_keepalive(self.keepalive)
+                with self._lock:
+                    self.sessions_started += 1
+                LIVE_METRICS.active_sessions.inc()
+                if connect_failed:
+                    self.log_signal.emit(f"Task {task_id}: Session reopened.")
+                    connect_failed = False
+                opened_at = time.monotonic()
+                last_rekey = opened_at
+                bytes_since_rekey = 0
+                next_upload = opened_at
+                while not self.stop_event.is_set() and time.monotonic() < deadline:
+                    phase = "idle"
+                    if self.stop_event.wait(max(0.0, min(next_upload, deadline) - time.monotonic())) or time.monotonic() >= deadline:
+                        break
+                    if not transport.is_active():
+                        raise transport.get_exception() or EOFError("Session closed by the server")
+                    phase = "upload"
+                    bytes_since_rekey += self._upload(transport, sftp, remote_path)
+                    next_upload += self.upload_interval
+
+                    if (self.rekey_bytes and bytes_since_rekey >= self.rekey_bytes) or \
+                            (self.rekey_interval and time.monotonic() - last_rekey >= self.rekey_interval):
+                        phase = "rekey"
+                        start = time.perf_counter()
+                        transport.renegotiate_keys()
+                        end = time.perf_counter()
+                        self.rekey_stats.record(start, end)
+                        LIVE_METRICS.phase_latency.observe(end - start, "rekey")
+                        last_rekey = time.monotonic()
+                        bytes_since_rekey = 0
+                return  # Survived until the end of the run
+            except Exception as e:
+                category = f"{phase}/{classify_error(e)}"  # e.g. idle/connection_reset for idle timeouts
+                LIVE_METRICS.errors.inc(label_value=classify_error(e))
+                lifetime = time.monotonic() - opened_at
+                with self._lock:
+                    self.drops[category] = self.drops.get(category, 0) + 1
+                    if phase != "connect":
+                        self.sessions_dropped += 1
+                        self.lifetimes.append(lifetime)
+                if phase == "connect":
+                    if not connect_failed:
+                        self.log_signal.emit(f"Task {task_id}: Could not open session - {str(e) or type(e).__name__}")
+                    connect_failed = True
+                else:
+                    self.log_signal.emit(f"Task {task_id}: Session dropped during {phase} after {lifetime:.1f} seconds - {str(e) or type(e).__name__}")
+                if not self.reconnect:
+                    return
+                self.stop_event.wait(self.upload_interval)  # Do not hammer a server that just dropped us
+            finally:
+                if sftp:
+                    sftp.close()
+                    LIVE_METRICS.active_sessions.dec()
+                if transport:
+                    transport.close()
+
+    def _upload(self, transport, sftp, remote_path):
+        """Uploads the payload once, returns its size. Failures of a still active session only count as errors."""
+        LIVE_METRICS.uploads_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            if self.file_size is not None:
+                attributes = sftp.putfo(GeneratedPayload(self.file_size), remote_path, file_size=self.file_size)
+            else:
+                attributes = sftp.put(self.payload_path, remote_path)
+        except Exception as e:
+            if not transport.is_active():
+                raise
+            self.upload_stats.record_error()
+            LIVE_METRICS.errors.inc(label_value=classify_error(e))
+            return 0
+        finally:
+            LIVE_METRICS.uploads_in_flight.dec()
+        end = time.perf_counter()
+        size = attributes.st_size or 0
+        self.upload_stats.record(start, end, size)
+        LIVE_METRICS.phase_latency.observe(end - start, "upload")
+        LIVE_METRICS.uploads.inc()
+        LIVE_METRICS.bytes_uploaded.inc(size)
+        LIVE_METRICS.recent_latencies.append(end - start)
+        return size
+
+    def _finish_memory(self, elapsed):
+        """Stops the monitor and takes the memory summary once, the log, thresholds and report all use this one."""
+        self.network_monitor.stop()
+        self.network_monitor.wait()
+        self.memory = self.network_monitor.memory_summary(warmup=elapsed * self.MEMORY_WARMUP)
+
+    def memory_summary(self):
+        """The memory summary of the finished run, a live one while the run goes on (for early aborts)."""
+        if self.memory is not None:
+            return self.memory
+        return self.network_monitor.memory_summary(warmup=(time.time() - self._started) * self.MEMORY_WARMUP)
+
+    def survival_rate(self):
+        with self._lock:
+            return 1 - self.sessions_dropped / self.sessions_started if self.sessions_started else 0.0
+
+    def format_status(self, elapsed):
+        upload = self.upload_stats.summary()
+        memory = self.network_monitor.memory_summary()  # Only end_mb is used, the growth is not final yet
+        return (f"Soak {elapsed:.0f}s: {self.sessions_started - self.sessions_dropped} of {self.sessions_started} sessions alive, "
+                f"{upload['count']} uploads, {upload['errors']} errors, {self.rekey_stats.summary()['count']} rekeys, "
+                f"RSS {memory['end_mb']:.1f} MB")
+
+    def format_summary(self):
+        rekey = self.rekey_stats.summary()
+        memory = self.memory_summary()
+        lines = [self.upload_stats.format_summary(),
+                 f"Sessions: {self.sessions_started} opened, {self.sessions_dropped} dropped, survival rate {self.survival_rate() * 100:.1f}%"]
+        if self.lifetimes:
+            lifetimes = sorted(self.lifetimes)
+            lines.append(f"Dropped session lifetime: min {lifetimes[0]:.1f}s, p50 {percentile(lifetimes, 50):.1f}s, max {lifetimes[-1]:.1f}s")
+        if self.drops:
+            lines.append("Drops by phase/category: " + ", ".join(f"{category} {count}" for category, count in sorted(self.drops.items())))
+        if rekey["count"]:
+            lines.append(f"Rekeys: {rekey['count']} | latency mean {rekey['latency_mean'] * 1000:.1f} ms, "
+                         f"p50 {rekey['latency_p50'] * 1000:.1f} ms, p99 {rekey['latency_p99'] * 1000:.1f} ms, max {rekey['latency_max'] * 1000:.1f} ms")
+        lines.append(f"Process memory: start {memory['start_mb']:.1f} MB, end {memory['end_mb']:.1f} MB, peak {memory['peak_mb']:.1f} MB, "
+                     f"growth {memory['growth_mb_per_hour']:.1f} MB/h (least-squares fit after the first {memory['warmup']:.0f}s)")
+        return lines
+
+    def slo_metrics(self):
+        upload = self.upload_stats.summary()
+        attempts = upload["count"] + upload["errors"]
+        return {
+            "upload_latency_p99": upload["latency_p99"],
+            "error_rate": upload["errors"] / attempts if attempts else 0.0,
+            "session_survival_rate": self.survival_rate(),
+            "rekey_latency_p99": self.rekey_stats.summary()["latency_p99"],
+            "memory_growth_mb_per_hour": self.memory_summary()["growth_mb_per_hour"],
+            "samples": attempts,
+        }
+
+    def result(self):
+        return {
+            "mode": "soak",
+            "connections": self.connections,
+            "total_time": self.total_time,
+            "sessions_started": self.sessions_started,
+            "sessions_dropped": self.sessions_dropped,
+            "session_survival_rate": self.survival_rate(),
+            "drops": dict(self.drops),
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "upload": self.upload_stats.summary(),
+            "rekey": self.rekey_stats.summary(),
+            "series": self.upload_stats.per_second(),
+            "memory": self.memory_summary(),
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+        }
+
+    @staticmethod
+    def describe_result(result):
+        return (f"{result['label']}: {result['sessions_dropped']} of {result['sessions_started']} sessions dropped, "
+                f"{result['upload']['count']} uploads, {result['rekey']['count']} rekeys (p99 {result['rekey']['latency_p99'] * 1000:.1f} ms), "
+                f"memory growth {result['memory']['growth_mb_per_hour']:.1f} MB/h")
+
+    @staticmethod
+    def report_row(result):
+        return {
+            "label": result["label"],
+            "connections": result["connections"],
+            "total_time_s": f"{result['total_time']:.3f}",
+            "uploads": result["upload"]["count"],
+            "upload_errors": result["upload"]["errors"],
+            "latency_p99_ms": f"{result['upload']['latency_p99'] * 1000:.1f}",
+            "sessions_started": result["sessions_started"],
+            "sessions_dropped": result["sessions_dropped"],
+            "rekeys": result["rekey"]["count"],
+            "rekey_p99_ms": f"{result['rekey']['latency_p99'] * 1000:.1f}",
+            "memory_peak_mb": f"{result['memory']['peak_mb']:.1f}",
+            "memory_growth_mb_per_hour": f"{result['memory']['growth_mb_per_hour']:.1f}",
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
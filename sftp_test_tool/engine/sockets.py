@@ -0,0 +1,192 @@
+"""Client sockets of all test modes: cached name resolution, socket options and spreading over local source addresses."""
+import errno
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from .plan import format_size, parse_size
+
+# Local address new connections are bound to, high is None when the kernel picks the port
+SourceAddress = namedtuple("SourceAddress", "host low high", defaults=(0, None))
+
+
+def parse_source_addresses(value):
+    """Parses source addresses: a list of "ip", "ip:low-high" or "[ipv6]:low-high", or one comma separated string of them."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [part for part in value.split(",") if part.strip()]
+    sources = []
+    for item in value:
+        text = str(item).strip()
+        host, ports = text, ""
+        if text.startswith("["):  # [IPv6]:low-high
+            host, _, rest = text[1:].partition("]")
+            ports = rest[1:] if rest.startswith(":") else ""
+        elif text.count(":") == 1:
+            host, ports = text.split(":")
+        if not ports:
+            sources.append(SourceAddress(host))
+            continue
+        low, _, high = ports.partition("-")
+        low, high = int(low), int(high or low)
+        if not 0 < low <= high <= 65535:
+            raise ValueError(f"Invalid port range '{ports}' of source address {host}.")
+        sources.append(SourceAddress(host, low, high))
+    return sources
+
+
+def format_source(source):
+    host = f"[{source.host}]" if ":" in source.host else source.host
+    return f"{host}:{source.low}-{source.high}" if source.high else host
+
+
+class SocketConnector:
+    """Opens the TCP connections of one run, thread-safe.
+
+    Names are resolved once per run and then served from a cache, so connection churn neither waits for the resolver
+    nor measures it. Every socket gets TCP_NODELAY and the configured buffer sizes before it connects (buffers set
+    after the connect do not change the negotiated TCP window scaling).
+
+    With source addresses, new connections take them in turn. Without a port range the socket is bound with
+    IP_BIND_ADDRESS_NO_PORT where available, the kernel then picks the port at connect time and every source address
+    has the whole ephemeral port range for every server address. With a port range, ports are handed out in turn and
+    ports still in use are skipped. Connections that find no free local port fail with EADDRNOTAVAIL and are counted.
+    """
+
+    def __init__(self, nodelay=True, send_buffer=None, receive_buffer=None, source_addresses=None, cache_dns=True):
+        self.nodelay = bool(nodelay)
+        self.send_buffer = parse_size(send_buffer) or None
+        self.receive_buffer = parse_size(receive_buffer) or None
+        self.sources = parse_source_addresses(source_addresses)
+        self.cache_dns = bool(cache_dns)
+        self.lookups = 0
+        self.lookup_time = 0.0
+        self.cache_hits = 0
+        self.port_exhausted = 0  # Connections that failed for lack of a free local port
+        self.connections = {source: 0 for source in self.sources}
+        self._cache = {}  # (host, port) -> [(family, sockaddr)]
+        self._next_source = 0
+        self._next_port = {source: source.low for source in self.sources}
+        self._lock = threading.Lock()
+        self._resolve_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates a connector from the socket section of a test plan."""
+        return cls(**(settings or {}))
+
+    def resolve(self, host, port):
+        """Returns the (family, address) pairs of a host in resolver order, from the cache after the first lookup."""
+        key = (host, port)
+        with self._resolve_lock:  # Concurrent first connections wait for one lookup instead of all resolving
+            addresses = self._cache.get(key) if self.cache_dns else None
+            if addresses is not None:
+                self.cache_hits += 1
+                return addresses
+            start = time.perf_counter()
+            infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            self.lookup_time += time.perf_counter() - start
+            self.lookups += 1
+            addresses = [(family, sockaddr) for family, _, _, _, sockaddr in infos]
+            if self.cache_dns:
+                self._cache[key] = addresses
+            return addresses
+
+    def connect(self, host, port, timeout=None):
+        """Returns a connected socket, tries every address of the host in turn like socket.create_connection."""
+        error = None
+        for family, sockaddr in self.resolve(host, port):
+            sock = None
+            try:
+                sock = socket.socket(family, socket.SOCK_STREAM)
+                self._configure(sock)
+                self._bind(sock, family)
+                sock.settimeout(timeout)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                if sock:
+                    sock.close()
+                error = e
+        if error is None:
+            raise OSError(f"No address found for {host}")
+        if error.errno == errno.EADDRNOTAVAIL:
+            with self._lock:
+                self.port_exhausted += 1
+        raise error
+
+    def _configure(self, sock):
+        if self.nodelay:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.send_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        if self.receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+
+    def _bind(self, sock, family):
+        """Binds the socket to the next source address of its address family, if any are configured."""
+        if not self.sources:
+            return
+        with self._lock:
+            candidates = [source for source in self.sources if (":" in source.host) == (family == socket.AF_INET6)]
+            if not candidates:
+                raise OSError(errno.EAFNOSUPPORT, f"No {'IPv6' if family == socket.AF_INET6 else 'IPv4'} source address configured")
+            source = candidates[self._next_source % len(candidates)]
+            self._next_source += 1
+            self.connections[source] += 1
+        if not source.high:
+            if hasattr(socket, "IP_BIND_ADDRESS_NO_PORT"):
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_BIND_ADDRESS_NO_PORT, 1)
+            sock.bind((source.host, 0))
+            return
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # Reuse ports of closed connections in TIME_WAIT
+        for _ in range(source.high - source.low + 1):
+            with self._lock:
+                port = self._next_port[source]
+                self._next_port[source] = port + 1 if port < source.high else source.low
+            try:
+                sock.bind((source.host, port))
+                return
+            except OSError as e:
+                if e.errno != errno.EADDRINUSE:
+                    raise
+        raise OSError(errno.EADDRNOTAVAIL, f"All ports of source address {format_source(source)} are in use")
+
+    def describe(self):
+        parts = ["TCP_NODELAY" if self.nodelay else "Nagle enabled"]
+        if self.send_buffer:
+            parts.append(f"send buffer {format_size(self.send_buffer)}")
+        if self.receive_buffer:
+            parts.append(f"receive buffer {format_size(self.receive_buffer)}")
+        if self.sources:
+            parts.append("source addresses " + ", ".join(format_source(source) for source in self.sources))
+        parts.append("DNS cached per run" if self.cache_dns else "DNS resolved per connection")
+        return ", ".join(parts)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "dns_lookups": self.lookups,
+                "dns_cache_hits": self.cache_hits,
+                "dns_time": self.lookup_time,
+                "connections_by_source": {format_source(source): count for source, count in self.connections.items()},
+                "port_exhausted": self.port_exhausted,
+            }
+
+    def format_summary(self):
+        """Returns log lines with the socket setup, the name resolution and the connections per source address."""
+        s = self.summary()
+        if not s["dns_lookups"]:
+            return []
+        lines = [f"Sockets: {self.describe()}",
+                 f"DNS: {s['dns_lookups']} lookups ({s['dns_time'] / s['dns_lookups'] * 1000:.1f} ms mean), "
+                 f"{s['dns_cache_hits']} connections resolved from the cache"]
+        if len(s["connections_by_source"]) > 1:
+            lines.append("Connections by source address: " + ", ".join(
+                f"{source} {count}" for source, count in s["connections_by_source"].items()))
+        if s["port_exhausted"]:
+            lines.append(f"WARNING: {s['port_exhausted']} connections found no free local port, add source addresses or "
+                         f"widen their port ranges.")
+        return lines
@@ -0,0 +1,166 @@
+"""Importers turning production server logs into workload traces, so the real daily pattern can be replayed.
+
+Two inputs are understood:
+
+- OpenSSH sftp-server logs (``Subsystem sftp internal-sftp -l INFO`` or ``sftp-server -l VERBOSE``), as written to
+  syslog or the journal. Every sftp-server process (pid) is one session, its user comes from the
+  ``session opened for local user`` line. An ``open`` with write flags followed by its ``close ... written N`` becomes an
+  upload of N bytes, a read ``open`` a download, ``opendir`` a listing, ``stat``/``lstat`` a stat, ``remove`` a delete and
+  ``mkdir`` a mkdir. Everything else (rename, setstat, realpath, ...) is counted as skipped.
+- CSV files with a header and the columns ``time,user,op,path`` and optionally ``size`` and ``session``. ``time`` is
+  ISO 8601 or Unix seconds, ``session`` defaults to the user.
+
+Remote paths are flattened into single file names ("/home/alice/in/a.csv" -> "home__alice__in__a.csv"), the replay
+creates every file directly in its target directory.
+"""
+import csv
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from .workload import TraceEvent, WorkloadTrace
+
+# "Oct 19 08:00:01 host sftp-server[4711]: message" (syslog) or "2026-10-19T08:00:01.123+02:00 host sshd[4711]: message"
+LOG_LINE = re.compile(r"^(?P<time>\d{4}-\d\d-\d\dT\S+|[A-Z][a-z]{2} +\d{1,2} \d\d:\d\d:\d\d)\s+\S+\s+"
+                      r"(?P<process>[\w.-]+)\[(?P<pid>\d+)\]:\s+(?P<message>.*)$")
+SESSION_OPENED = re.compile(r'^session opened for local user (?P<user>\S+) from')
+SESSION_CLOSED = re.compile(r'^session closed for local user (?P<user>\S+) from')
+OPEN = re.compile(r'^open "(?P<path>.*)" flags (?P<flags>\S+)')
+CLOSE = re.compile(r'^(?:.* )?close "(?P<path>.*)" bytes read (?P<read>\d+) written (?P<written>\d+)')
+SIMPLE_OPERATIONS = (
+    (re.compile(r'^opendir "(?P<path>.*)"'), "list"),
+    (re.compile(r'^l?stat name "(?P<path>.*)"'), "stat"),
+    (re.compile(r'^remove name "(?P<path>.*)"'), "delete"),
+    (re.compile(r'^mkdir name "(?P<path>.*)"'), "mkdir"),
+)
+# Messages of sftp-server that are no operation of their own or not replayed
+IGNORED = re.compile(r'^(closedir|sent status|debug|received client version)')
+
+CSV_OPERATIONS = {"upload": "upload", "put": "upload", "write": "upload",
+                  "download": "download", "get": "download", "read": "download",
+                  "list": "list", "ls": "list", "opendir": "list", "readdir": "list",
+                  "stat": "stat", "lstat": "stat",
+                  "delete": "delete", "remove": "delete", "rm": "delete",
+                  "mkdir": "mkdir"}
+
+
+def flatten_path(path):
+    """Maps a production path to a file name in the replay directory."""
+    return "__".join(part for part in path.replace("\\", "/").split("/") if part) or "root"
+
+
+def load_trace(filename, log_format=None, year=None):
+    """Loads a workload trace, importing sftp-server logs (.log and other files) and CSV files (.csv) on the fly."""
+    log_format = log_format or detect_format(filename)
+    if log_format == "trace":
+        return WorkloadTrace.load(filename)
+    if log_format == "csv":
+        return import_csv(filename)
+    if log_format == "sftp-server":
+        return import_sftp_server_log(filename, year)
+    raise ValueError(f"Unknown trace format '{log_format}', expected trace, csv or sftp-server")
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".jsonl", ".json"):
+        return "trace"
+    if extension == ".csv":
+        return "csv"
+    return "sftp-server"
+
+
+def parse_log_time(value, year):
+    """Parses an RFC 3339 or classic syslog time stamp, the latter has no year and gets the given one."""
+    if value[0].isdigit():
+        parsed = datetime.fromisoformat(value)
+        return parsed.replace(tzinfo=None) - (parsed.utcoffset() or timedelta())
+    return datetime.strptime(f"{year} {' '.join(value.split())}", "%Y %b %d %H:%M:%S")
+
+
+def import_sftp_server_log(filename, year=None):
+    """Reads an sftp-server log into a WorkloadTrace, one session per sftp-server process."""
+    year = year or datetime.now().year
+    users = {}  # pid -> user
+    open_files = {}  # (pid, path) -> [(time, flags)], a file may be open more than once
+    records = []  # (time, pid, op, path, size)
+    skipped = Counter()
+    last_time = None
+    with open(filename, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            match = LOG_LINE.match(line.strip())
+            if not match:
+                continue  # Other programs in the same log
+            when = parse_log_time(match["time"], year)
+            if last_time and when < last_time - timedelta(days=180):  # Syslog time stamps wrapped into the next year
+                year += 1
+                when = when.replace(year=year)
+            last_time = when
+            pid, message = match["pid"], match["message"]
+            if opened := SESSION_OPENED.match(message):
+                users[pid] = opened["user"]
+                records.append((when, pid, "connect", "", 0))
+            elif SESSION_CLOSED.match(message):
+                records.append((when, pid, "disconnect", "", 0))
+            elif opened := OPEN.match(message):
+                open_files.setdefault((pid, opened["path"]), []).append((when, opened["flags"]))
+            elif closed := CLOSE.match(message):
+                pending = open_files.get((pid, closed["path"]))
+                opened_at, flags = pending.pop(0) if pending else (when, "")  # Opened before the log starts
+                written, read = int(closed["written"]), int(closed["read"])
+                if written or "WRITE" in flags or "CREATE" in flags:
+                    records.append((opened_at, pid, "upload", closed["path"], written))
+                else:
+                    records.append((opened_at, pid, "download", closed["path"], read))
+            elif not IGNORED.match(message):
+                for pattern, op in SIMPLE_OPERATIONS:
+                    if operation := pattern.match(message):
+                        records.append((when, pid, op, operation["path"], 0))
+                        break
+                else:
+                    if message[:1].islower() and (match["process"] in ("sftp-server", "internal-sftp") or pid in users):
+                        skipped[message.split(" ", 1)[0]] += 1
+    unclosed = sum(len(pending) for pending in open_files.values())
+    if unclosed:
+        skipped["open without close"] = unclosed
+    if not records:
+        raise ValueError(f"{filename} contains no sftp-server operations, is the server logging at INFO or VERBOSE level?")
+    return _build_trace(records, lambda pid: f"{users.get(pid, 'unknown')}/{pid}", users.get,
+                        f"imported from {os.path.basename(filename)}", skipped)
+
+
+def import_csv(filename):
+    """Reads a CSV trace with the columns time, user, op, path and optionally size and session."""
+    records = []
+    users = {}
+    with open(filename, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = {"time", "user", "op", "path"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{filename} misses the CSV columns {', '.join(sorted(missing))}")
+        for number, row in enumerate(reader, start=2):
+            op = CSV_OPERATIONS.get(row["op"].strip().lower())
+            if op is None:
+                raise ValueError(f"{filename} line {number}: unknown operation '{row['op']}'")
+            value = row["time"].strip()
+            try:
+                when = datetime.fromtimestamp(float(value), timezone.utc).replace(tzinfo=None)
+            except ValueError:
+                when = parse_log_time(value, None)
+            session = (row.get("session") or "").strip() or row["user"].strip()
+            users[session] = row["user"].strip()
+            records.append((when, session, op, row["path"].strip(), int(row.get("size") or 0)))
+    if not records:
+        raise ValueError(f"{filename} contains no operations")
+    return _build_trace(records, str, users.get, f"imported from {os.path.basename(filename)}", Counter())
+
+
+def _build_trace(records, session_name, user_of, source, skipped):
+    start = min(record[0] for record in records)
+    events = [TraceEvent(round((when - start).total_seconds(), 6), session_name(session), op, flatten_path(path) if path else "",
+                         size, user_of(session))
+              for when, session, op, path, size in sorted(records, key=lambda record: record[0])]
+    if skipped:
+        source += ", skipped " + ", ".join(f"{name} {count}" for name, count in skipped.most_common())
+    return WorkloadTrace(events, source=source)
@@ -0,0 +1,541 @@
+"""Upload stress test: concurrent sessions uploading a file, a folder or generated payloads over SFTP, SCP or FTPS."""
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import Signal
+
+from ..metrics.live import LIVE_METRICS
+from ..metrics.stats import OperationStats, ScheduleStats
+from .base import BenchmarkWorker
+from .connection import classify_error
+from .endpoints import BackendStats, Endpoint, EndpointSelector, format_endpoint, parse_endpoints, resolve_endpoints
+from .payload import FileIndex, GeneratedPayload
+from .pickup import PickupMonitor
+from .plan import DISTRIBUTIONS, TestPlan, test_file_name
+from .protocols import open_session, session_type
+from .shaping import NetworkShaper, ShapedFile
+from .workload import draw_size, format_size_range, new_seed, parse_size_range, workload_random
+
+
+class SFTPWorker(BenchmarkWorker):
+    """Worker thread for SFTP uploads"""
+    # replicate: every connection uploads the whole folder, shard: the folder is partitioned over the connections,
+    # queue: idle connections pull the next file from a shared queue
+    DISTRIBUTIONS = DISTRIBUTIONS
+    TITLE = "SFTP stress test"
+    multi_file_progress_signal = Signal(int)  # For multiple files
+    task_progress_bars_signal = Signal(int, int) # For multiple tasks - task_id, progress_percentage
+    task_progress_signal = Signal(int, bool)  # task_id, success
+    
+    def __init__(self, connections:int, test_file: str, multiple_files_state: bool, host: str, port: str, directory: str, username: str, password: str, cleanup_after_run: bool = False,
+                 payload_size: int = None, connect_timeout: float = None, operation_timeout: float = None, success_criteria: dict = None,
+                 shaper: "NetworkShaper" = None, distribution: str = "replicate", seed: int = None, content: str = "zeros",
+                 rate: float = None, uploads: int = None, endpoints: list = None, balancing: str = "round-robin",
+                 resolve: bool = False, protocol: str = "sftp", pickup: dict = None):
+        super().__init__(success_criteria)
+        self.connections = connections
+        self.test_file = test_file
+        self.transfer_multiple_files = multiple_files_state
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.username = username
+        self.password = password
+        self.cleanup_after_run = cleanup_after_run
+        # Upload a generated payload of this size instead of test_file, a (low, high) range draws every size from the seed
+        self.payload_size = (payload_size, payload_size) if isinstance(payload_size, int) else payload_size
+        self.seed = seed if seed is not None else new_seed()
+        if content not in ("zeros", "random"):
+            raise ValueError(f"Unknown payload content '{content}', expected zeros or random")
+        self.content = content
+        self.connect_timeout = connect_timeout
+        self.operation_timeout = operation_timeout
+        # With a rate the run is an open workload: uploads are due at fixed intervals no matter how fast the server answers,
+        # at most connections of them at the same time, and latency is also measured from the due time
+        if rate is not None and rate <= 0:
+            raise ValueError("The upload rate must be greater than 0.")
+        if rate and multiple_files_state:
+            raise ValueError("A rate-based run uploads one file per arrival, multiple files are not supported.")
+        self.rate = rate
+        self.schedule = None  # ScheduleStats of a rate-based run
+        self._schedule_start = None
+        self.tasks_completed = 0
+        self.tasks_succeeded = 0
+        self.tasks_total = (uploads or connections) if rate else connections
+        self.total_time = 0.0
+        self.created_files = []  # Every remote path this run wrote to, used by the cleanup phase
+        self.upload_stats = OperationStats("Upload")
+        self.delete_stats = None
+        self.shaper = shaper  # Optional WAN emulation, None uploads at full speed
+        self.file_index = None  # Scanned once per run in multiple files mode
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown file distribution '{distribution}', expected one of: {', '.join(self.DISTRIBUTIONS)}")
+        self.distribution = distribution  # How multiple files are spread over the connections
+        self.file_queue = None
+        # Sessions go to these endpoints (default: host), resolve replaces each by all addresses of its name
+        self.endpoints = endpoints or [Endpoint(host, int(port))]
+        if not host:  # Only endpoints given, the cleanup phase connects to the first one
+            self.host, self.port = self.endpoints[0].host, self.endpoints[0].port
+        self.balancing = balancing
+        self.resolve = resolve
+        self.selector = None
+        self.backends = BackendStats()
+        self.files_by_endpoint = {}  # Endpoint label -> remote paths written through it, cleaned up through it
+        self.session_type = session_type(protocol)  # Raises for unknown protocols
+        self.protocol = protocol
+        # Poll every uploaded file until a downstream consumer picked it up: {"poll_interval", "timeout", "archive"}
+        self.pickup = pickup
+        self.pickup_monitor = None
+    
+    @classmethod
+    def from_plan(cls, point):
+        """Creates a worker for one resolved test plan point (see TestPlan.expand)."""
+        target = point["target"]
+        return cls(int(point["load"]["connections"]), point["payload"]["path"], bool(point["workload"]["multiple_files"]),
+                   target["host"], int(target["port"]), target["directory"], target["username"], TestPlan.resolve_password(target),
+                   cleanup_after_run=bool(point["workload"]["cleanup"]),
+                   payload_size=parse_size_range(point["payload"].get("file_size")),
+                   connect_timeout=point["timeouts"].get("connect"),
+                   operation_timeout=point["timeouts"].get("operation"),
+                   success_criteria=point.get("success_criteria"),
+                   shaper=NetworkShaper.from_settings(point.get("network")),
+                   distribution=point["workload"].get("distribution", "replicate"),
+                   seed=point["workload"].get("seed"),
+                   content=point["payload"].get("content") or "zeros",
+                   rate=float(point["load"]["rate"]) if point["load"].get("rate") else None,
+                   uploads=int(point["load"]["uploads"]) if point["load"].get("uploads") else None,
+                   endpoints=parse_endpoints(target.get("endpoints"), int(target["port"])),
+                   balancing=target.get("balancing") or "round-robin",
+                   resolve=bool(target.get("resolve")),
+                   protocol=target.get("protocol") or "sftp",
+                   pickup=point["pickup"] if point.get("pickup", {}).get("enabled") else None)
+        
+    def execute(self):
+        self.statusbar_hidden_state.emit(True)
+        start_time = time.time()
+        end_time = None
+        self.tasks_completed = 0
+        self.tasks_succeeded = 0
+        self.created_files = []
+        self.upload_stats = OperationStats("Upload", self.spill)
+        self.delete_stats = None
+        self.schedule = ScheduleStats("Delivery") if self.rate else None
+        self.backends = BackendStats()
+        self.files_by_endpoint = {}
+        self.verdict = None
+        self.abort_reason = None
+        self.selector = self._endpoint_selector()
+        self.pickup_monitor = self._pickup_monitor()
+
+        if self.protocol != "sftp":
+            self.log_signal.emit(f"Protocol: {self.protocol.upper()}")
+        if self.rate:
+            self.log_signal.emit(f"Open workload: {self.tasks_total} uploads due every {1000 / self.rate:.1f} ms ({self.rate:g}/s) "
+                                 f"on at most {self.connections} sessions, each connects, uploads and disconnects.")
+        if self.shaper:
+            self.log_signal.emit(f"WAN emulation: {self.shaper.describe()}")
+        if self.payload_size is not None:
+            self.log_signal.emit(f"Workload seed: {self.seed} (payload sizes and {self.content} content are derived from it, "
+                                 f"set workload.seed to repeat this workload)")
+        if self.trace_recorder:
+            self.trace_recorder.begin()
+        if self.transfer_multiple_files:
+            try:
+                self.file_index = FileIndex.scan(self.test_file)
+                self.log_signal.emit(f"Indexed {len(self.file_index)} files ({self.file_index.total_bytes / (1024 * 1024):.2f} MB) in '{self.test_file}'.")
+            except OSError as e:
+                self.file_index = FileIndex(self.test_file, [])
+                self.log_signal.emit(f"Could not read test file folder '{self.test_file}' - {str(e)}")
+            self.log_signal.emit(f"File distribution: {self.distribution}")
+            if self.distribution == "queue":
+                self.file_queue = queue.SimpleQueue()
+                for entry in self.file_index.entries:
+                    self.file_queue.put(entry)
+
+        # Start network monitor
+        self.network_monitor.start()
+        
+        # Watch thresholds in the background so a clearly failing soak stops early
+        run_finished = self.start_threshold_watch()
+        if self.pickup_monitor:
+            self.pickup_monitor.start()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                self._schedule_start = time.perf_counter()
+                futures = {executor.submit(self.sftp_upload_task, i): i for i in range(self.tasks_total)}
+
+                for future in as_completed(futures):
+                    if self.stop_event.is_set():
+                        executor.shutdown(wait=False)
+                        self.log_signal.emit("SFTP stress test canceled during execution.")
+                        break
+                    
+                    task_id = futures[future]
+                    try:
+                        success = future.result()
+                        self.task_progress_signal.emit(task_id, success)
+                        self.tasks_completed += 1
+                        self.tasks_succeeded += 1 if success else 0
+                        progress = int((self.tasks_completed / self.tasks_total) * 100)
+                        self.progress_signal.emit(progress)
+                    except Exception as e:
+                        self.log_signal.emit(f"Task {task_id} generated an exception: {str(e)}")
+                        self.tasks_completed += 1
+                        progress = int((self.tasks_completed / self.tasks_total) * 100)
+                        self.progress_signal.emit(progress)
+
+            end_time = time.time()
+            if self.pickup_monitor and not self.stop_event.is_set():
+                self.log_signal.emit(f"Waiting up to {self.pickup_monitor.timeout:g} seconds for the pickup of the uploaded files...")
+                self.pickup_monitor.finish(self.stop_event)
+            self.log_signal.emit("=" * 50)
+            self.log_signal.emit(self.upload_stats.format_summary())
+            expected = None
+            if len(self.selector.endpoints) > 1:
+                expected = {format_endpoint(endpoint): share for endpoint, share in self.selector.expected_shares().items()}
+            for line in self.backends.format_summary(expected):
+                self.log_signal.emit(line)
+            if self.schedule:
+                for line in self.schedule.format_summary():
+                    self.log_signal.emit(line)
+            if self.pickup_monitor:
+                self.pickup_monitor.stop()
+                for line in self.pickup_monitor.format_summary():
+                    self.log_signal.emit(line)
+            if self.transfer_multiple_files and self.distribution != "replicate":
+                delivered = self.upload_stats.summary()
+                batch_time = end_time - start_time
+                self.log_signal.emit(f"Batch delivery: {delivered['count']} of {len(self.file_index)} files "
+                                     f"({delivered['bytes'] / (1024 * 1024):.2f} MB) in {batch_time:.2f} seconds, "
+                                     f"{delivered['count'] / batch_time:.1f} files/s, {delivered['bytes'] / (1024 * 1024) / batch_time:.2f} MB/s")
+            if self.abort_reason:
+                self.stop_event.clear()  # An early abort still cleans up, only a user cancel skips it
+            if self.trace_recorder:
+                self.write_trace(self.seed, self.content if self.payload_size is not None else "zeros")
+            if self.cleanup_after_run and self.created_files and not self.stop_event.is_set():
+                self.run_cleanup_phase()
+        finally:
+            run_finished.set()
+            if self.pickup_monitor:
+                self.pickup_monitor.stop()
+            self.network_monitor.stop()
+            self.network_monitor.wait()  # Thread stops cleanly
+
+            if end_time is None:
+                end_time = time.time()
+            total_time = end_time - start_time
+            self.total_time = total_time
+            self.evaluate_thresholds()
+            # Dynamic message based on how the task ended
+            if self.abort_reason:
+                self.log_signal.emit("=" * 50)
+                self.log_signal.emit(f"Task was aborted after {self.tasks_completed} uploads in {total_time:.2f} seconds: {self.abort_reason}")
+            elif self.stop_event.is_set():
+                self.log_signal.emit("=" * 50)
+                self.log_signal.emit(f"Task was canceled after {self.tasks_completed} uploads in {total_time:.2f} seconds.")
+            elif self.tasks_completed == self.tasks_total:
+                self.log_signal.emit("=" * 50)
+                self.log_signal.emit(f"Completed all {self.tasks_completed} {self.protocol.upper()} uploads in {total_time:.2f} seconds.")
+            else:
+                self.log_signal.emit("=" * 50)
+                self.log_signal.emit(f"Task ended early with {self.tasks_completed} of {self.tasks_total} uploads completed in {total_time:.2f} seconds.")
+
+    
+    def slo_metrics(self):
+        upload = self.upload_stats.summary()
+        attempts = upload["count"] + upload["errors"]
+        return {
+            "upload_latency_mean": upload["latency_mean"],
+            "upload_latency_p50": upload["latency_p50"],
+            "upload_latency_p95": upload["latency_p95"],
+            "upload_latency_p99": upload["latency_p99"],
+            "upload_latency_max": upload["latency_max"],
+            "error_rate": upload["errors"] / attempts if attempts else 0.0,
+            "throughput_mb_s": upload["bytes_per_sec"] / (1024 * 1024),
+            "uploads_per_sec": upload["ops_per_sec"],
+            "samples": attempts,
+            **(self.schedule.slo_metrics() if self.schedule else {}),
+            **(self.pickup_monitor.slo_metrics() if self.pickup_monitor else {}),
+        }
+
+    def result(self):
+        return {
+            "mode": "upload",
+            "protocol": self.protocol,
+            "connections": self.connections,
+            "file_size": format_size_range(self.payload_size) if self.payload_size is not None else None,
+            "seed": self.seed if self.payload_size is not None else None,
+            "rate": self.rate,
+            "total_time": self.total_time,
+            "tasks_total": self.tasks_total,
+            "tasks_completed": self.tasks_completed,
+            "tasks_succeeded": self.tasks_succeeded,
+            "canceled": self.stop_event.is_set(),
+            "abort_reason": self.abort_reason,
+            "verdict": self.verdict,
+            "upload": self.upload_stats.summary(),
+            "series": self.upload_stats.per_second(),
+            "schedule": self.schedule.summary() if self.schedule else None,
+            "pickup": self.pickup_monitor.summary() if self.pickup_monitor else None,
+            "delete": self.delete_stats.summary() if self.delete_stats else None,
+            "backends": self.backends.summary(),
+        }
+
+    @staticmethod
+    def describe_result(result):
+        upload = result["upload"]
+        corrected = f", corrected p99 {result['schedule']['corrected']['latency_p99'] * 1000:.1f} ms" if result.get("schedule") else ""
+        pickup = f", pickup p99 {result['pickup']['latency']['latency_p99'] * 1000:.1f} ms" if result.get("pickup") else ""
+        return (f"{result['label']}: {upload['count']} uploads, {upload['errors']} errors, "
+                f"{upload['bytes_per_sec'] / (1024 * 1024):.2f} MB/s, p99 {upload['latency_p99'] * 1000:.1f} ms{corrected}{pickup}")
+
+    @staticmethod
+    def report_row(result):
+        upload = result["upload"]
+        return {
+            "label": result["label"],
+            **({"protocol": result["protocol"]} if result.get("protocol", "sftp") != "sftp" else {}),
+            "connections": result["connections"],
+            "file_size": result["file_size"] or "",
+            "seed": result.get("seed") if result.get("seed") is not None else "",
+            "total_time_s": f"{result['total_time']:.3f}",
+            "tasks_succeeded": result["tasks_succeeded"],
+            "tasks_total": result["tasks_total"],
+            "uploads": upload["count"],
+            "upload_errors": upload["errors"],
+            "throughput_mb_s": f"{upload['bytes_per_sec'] / (1024 * 1024):.3f}",
+            "latency_p50_ms": f"{upload['latency_p50'] * 1000:.1f}",
+            "latency_p99_ms": f"{upload['latency_p99'] * 1000:.1f}",
+            **(ScheduleStats.report_columns(result["schedule"], result["rate"]) if result.get("schedule") else {}),
+            **(PickupMonitor.report_columns(result["pickup"]) if result.get("pickup") else {}),
+            **({"backends": len(result["backends"])} if len(result.get("backends") or {}) > 1 else {}),
+            "verdict": {True: "pass", False: "fail", None: ""}[result.get("verdict")],
+        }
+
+    def sftp_upload_task(self, task_id):
+        """Individual upload task, one session of the run's protocol"""
+        if self.stop_event.is_set():
+            self.log_signal.emit(f"Task {task_id}: Canceled before starting.")
+            return False
+        
+        session = None
+        endpoint = self.selector.next()
+        backend = (format_endpoint(endpoint), None)  # Until the host key is known
+        total_files = 0
+        if self.schedule:
+            due = self._schedule_start + task_id / self.rate
+            task_start = self.schedule.wait_until(due, self.stop_event)
+            if task_start is None:
+                return False
+            if self.timeline and task_start - due > 0.001:
+                self.timeline.record("queued", due, task_start, task_id)  # Due, but every connection was busy
+    
+        try:
+            self.log_signal.emit(f"Task {task_id}: Starting upload...")
+    
+            # Establish the connection once
+            buckets = []
+            if self.shaper:
+                self.shaper.inject_delay(round_trips=self.session_type.CONNECT_ROUND_TRIPS)
+                buckets = self.shaper.connection_buckets()
+            session = open_session(self.protocol, endpoint.host, endpoint.port, self.username, self.password,
+                                   self.connect_timeout, self.operation_timeout,
+                                   phase_timer=lambda phase, start, end: self._record_phase(phase, start, end, task_id),
+                                   connector=self.connector)
+            LIVE_METRICS.active_sessions.inc()
+            backend = (backend[0], session.fingerprint())
+            self.backends.session_opened(backend)
+
+            # If multiple files are selected and conccurent connections is 1
+            if self.transfer_multiple_files and self.connections > 1:
+                
+                files, expected_files = self._files_for_task(task_id)
+                if self.distribution == "queue":
+                    self.log_signal.emit(f"Task {task_id}: Pulling files from the shared queue of {expected_files} files...")
+                else:
+                    self.log_signal.emit(f"Task {task_id}: Uploading {expected_files} files...")
+    
+                for file in files:
+                    if self.stop_event.is_set():
+                        self.log_signal.emit(f"Task {task_id}: Canceled during file uploads.")
+                        return False
+                    
+                    remote_path = self._get_remote_path(file.name, task_id)
+
+                    self._upload(session, file.path, remote_path, task_id, buckets, file.size, backend=backend)
+                    self.log_signal.emit(f"Task {task_id}: Upload successful to: '{remote_path}'.")
+
+                    total_files += 1
+                    progress = int((total_files / expected_files) * 100)
+                    self.task_progress_bars_signal.emit(task_id, progress)
+                    
+            elif self.transfer_multiple_files and self.connections == 1:
+                
+                files, expected_files = self._files_for_task(task_id)
+                if self.distribution == "queue":
+                    self.log_signal.emit(f"Task {task_id}: Pulling files from the shared queue of {expected_files} files...")
+                else:
+                    self.log_signal.emit(f"Task {task_id}: Uploading {expected_files} files...")
+    
+                for file in files:
+                    if self.stop_event.is_set():
+                        self.log_signal.emit(f"Task {task_id}: Canceled during file uploads.")
+                        return False
+                    
+                    remote_path = self._get_remote_path(file.name, task_id)
+
+                    self._upload(session, file.path, remote_path, task_id, buckets, file.size, backend=backend)
+                    self.log_signal.emit(f"Task {task_id}: Upload successful to: '{remote_path}'.")
+                    total_files += 1
+                    progress = int((total_files / expected_files) * 100)
+                    self.multi_file_progress_signal.emit(progress)
+            else:
+                if self.stop_event.is_set():
+                    self.log_signal.emit(f"Task {task_id}: Canceled during file uploads.")
+                    return False
+                
+                payload = None
+                if self.payload_size is not None:
+                    file_name = f"payload_{format_size_range(self.payload_size)}.bin"
+                else:
+                    file_name = os.path.basename(self.test_file)
+                remote_path = self._get_remote_path(file_name, task_id)
+                if self.payload_size is not None:
+                    # Size and content depend only on seed and task, not on the order the tasks run in. Content is keyed
+                    # by the remote name like in ReplayWorker, so replaying a recorded trace sends the same bytes
+                    size = draw_size(self.payload_size, workload_random(self.seed, task_id))
+                    content_seed = f"{self.seed}:{remote_path.rsplit('/', 1)[-1]}" if self.content == "random" else None
+                    payload = GeneratedPayload(size, content_seed)
+    
+                self._upload(session, self.test_file, remote_path, task_id, buckets, payload=payload, backend=backend)
+                if self.schedule:
+                    self.schedule.record(due, task_start, time.perf_counter())
+                self.log_signal.emit(f"Task {task_id}: Upload successful to: '{remote_path}'.")
+    
+            return True
+    
+        except Exception as e:
+            self.upload_stats.record_error()  # One error per failed task, whether connecting or uploading failed
+            self.backends.record_error(backend)
+            if self.schedule:
+                self.schedule.record_error()
+            LIVE_METRICS.errors.inc(label_value=classify_error(e))
+            if self.timeline:
+                self.timeline.mark(f"error: {classify_error(e)}", time.perf_counter(), task_id, {"message": str(e)})
+            self.log_signal.emit(f"Task {task_id}: Upload failed - {str(e)}")
+            return False
+    
+        finally:
+            # Ensure clean-up happens no matter what
+            if session:
+                start = time.perf_counter()
+                session.close()
+                LIVE_METRICS.active_sessions.dec()
+                self._record_phase("close", start, time.perf_counter(), task_id)
+    
+    def _files_for_task(self, task_id):
+        """Returns the files one task uploads and how many it expects, depending on the distribution strategy.
+
+        With the queue strategy the count is the whole folder, so the per task progress shows the task's share.
+        """
+        entries = self.file_index.entries
+        if self.distribution == "shard":
+            shard = entries[task_id::self.connections]
+            return shard, max(1, len(shard))
+        if self.distribution == "queue":
+            return self._pull_from_queue(), max(1, len(entries))
+        return entries, max(1, len(entries))
+    
+    def _pull_from_queue(self):
+        while True:
+            try:
+                yield self.file_queue.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _record_phase(self, phase, start, end, task_id, args=None):
+        """Feeds one phase duration (connect, auth, upload, close, ...) into the live metrics and the timeline."""
+        LIVE_METRICS.phase_latency.observe(end - start, phase)
+        if self.timeline:
+            self.timeline.record(phase, start, end, task_id, args)
+    
+    def _upload(self, session, local_path, remote_path, task_id, buckets=(), size=None, payload=None, backend=None):
+        """Uploads one file, or the generated payload if given, and records its latency."""
+        LIVE_METRICS.uploads_in_flight.inc()
+        start = time.perf_counter()
+        if self.trace_recorder:
+            file_size = payload.size if payload else size if size is not None else os.path.getsize(local_path)
+            self.trace_recorder.record(start, task_id, "upload", remote_path.rsplit("/", 1)[-1], file_size)
+        try:
+            if self.shaper:
+                self.shaper.inject_delay(round_trips=self.session_type.PUT_ROUND_TRIPS)
+            if payload is not None:
+                size = session.put(self._shaped(payload, buckets), remote_path, payload.size)
+            else:
+                with open(local_path, "rb") as local_file:
+                    size = session.put(self._shaped(local_file, buckets), remote_path, os.fstat(local_file.fileno()).st_size)
+        finally:
+            LIVE_METRICS.uploads_in_flight.dec()
+        end = time.perf_counter()
+        # Only files that arrived, the cleanup would report failed uploads as missing
+        self.created_files.append(remote_path)  # list.append is atomic, safe across tasks
+        if backend:
+            self.files_by_endpoint.setdefault(backend[0], []).append(remote_path)
+        self.upload_stats.record(start, end, size)
+        if backend:
+            self.backends.record(backend, start, end, size)
+        self._record_phase("upload", start, end, task_id, {"file": remote_path.rsplit("/", 1)[-1], "bytes": size})
+        LIVE_METRICS.uploads.inc()
+        LIVE_METRICS.bytes_uploaded.inc(size)
+        LIVE_METRICS.recent_latencies.append(end - start)
+        if self.pickup_monitor:
+            self.pickup_monitor.watch(remote_path, end, backend[0] if backend else None)
+    
+    def _shaped(self, fileobj, buckets):
+        return ShapedFile(fileobj, buckets, self.shaper) if self.shaper else fileobj
+
+    def cleanup_targets(self):
+        if len(self.selector.endpoints) < 2:
+            return super().cleanup_targets()
+        # Nodes may not share their storage, every file is deleted through the endpoint it was uploaded to
+        endpoints = {format_endpoint(endpoint): endpoint for endpoint in self.selector.endpoints}
+        return [(endpoints[label].host, endpoints[label].port, list(paths)) for label, paths in self.files_by_endpoint.items()]
+
+    def _pickup_monitor(self):
+        if not self.pickup:
+            return None
+        # Every file is polled through the endpoint it was uploaded to, nodes may not share their inbox
+        endpoints = {format_endpoint(endpoint): endpoint for endpoint in self.selector.endpoints}
+
+        def open_endpoint_session(label):
+            endpoint = endpoints.get(label)
+            host, port = (endpoint.host, endpoint.port) if endpoint else (self.host, self.port)
+            return open_session(self.protocol, host, port, self.username, self.password, self.connect_timeout,
+                                self.operation_timeout, connector=self.connector)
+
+        return PickupMonitor(open_endpoint_session,
+                             poll_interval=float(self.pickup.get("poll_interval") or 0.5),
+                             timeout=float(self.pickup.get("timeout") or 300),
+                             archive=self.pickup.get("archive"), log=self.log_signal.emit, spill=self.spill)
+
+    def _endpoint_selector(self):
+        endpoints = self.endpoints
+        if self.resolve:
+            try:
+                endpoints = resolve_endpoints(endpoints)
+            except OSError as e:
+                self.log_signal.emit(f"Could not resolve the endpoints, using the names as given - {str(e)}")
+        selector = EndpointSelector(endpoints, self.balancing if len(endpoints) > 1 else "vip")
+        if len(endpoints) > 1 or self.resolve:
+            self.log_signal.emit(f"Endpoints: {selector.describe()}")
+        return selector
+
+    def _get_remote_path(self, file_name, task_id):
+        """
+        Helper method to construct the remote file path.
+        Adds task_id to filename, so the remote cleanup finds every uploaded file.
+        """
+        return f"{self.directory}/{test_file_name(file_name, task_id)}"
@@ -0,0 +1,210 @@
+"""Seeded workloads and workload traces, so the same workload can be repeated against another server or version."""
+import json
+import math
+import random
+import time
+from collections import namedtuple
+
+from .plan import format_size, parse_size
+
+# One operation of a trace: seconds after the start, session (connection) running it, operation, remote file name, bytes
+# and the user of the session in an imported production trace
+TraceEvent = namedtuple("TraceEvent", "offset session op path size user", defaults=(None,))
+
+
+def new_seed():
+    """Returns a fresh seed for runs without workload.seed, it is logged and reported so the run can be repeated."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def workload_random(seed, *key):
+    """Returns a Random for one item of a run, e.g. workload_random(seed, task_id).
+
+    Every item gets its own stream derived from the run seed, so its size and content do not depend on the order in
+    which threads happen to run.
+    """
+    return random.Random(":".join(str(part) for part in (seed, *key)))
+
+
+def parse_size_range(value):
+    """Parses a payload size into (low, high) bytes, "1MB" -> (1048576, 1048576), "1KB-4MB" -> (1024, 4194304)."""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value, value
+    low, separator, high = str(value).partition("-")
+    if not separator:
+        size = parse_size(low)
+        return size, size
+    low, high = parse_size(low), parse_size(high)
+    if low < 0 or high < low:
+        raise ValueError(f"Invalid payload size range '{value}', expected e.g. '1KB-4MB'")
+    return low, high
+
+
+def format_size_range(size_range):
+    low, high = size_range
+    return format_size(low) if low == high else f"{format_size(low)}-{format_size(high)}"
+
+
+def draw_size(size_range, rng):
+    """Draws a size from a range, log-uniform so every order of magnitude is equally likely."""
+    low, high = size_range
+    if low == high:
+        return low
+    return int(round(math.exp(rng.uniform(math.log(max(low, 1)), math.log(high)))))
+
+
+class WorkloadTrace:
+    """Timed operations per session, recorded from a run or generated from a seed.
+
+    Stored as JSON lines: a header {"trace": 1, "seed": ..., "content": ..., "source": ...} followed by one
+    {"t": offset, "session": ..., "op": ..., "path": ..., "size": ...} object per operation, sorted by offset,
+    imported traces add "user". The seed and content setting make generated payloads byte for byte the same when the
+    trace is replayed. "connect" and "disconnect" hold a session open for as long as it was in the original workload.
+    """
+    FORMAT = 1
+    OPERATIONS = ("upload", "download", "list", "stat", "delete", "mkdir", "connect", "disconnect")
+    NEEDS_FILE = ("download", "stat", "delete")  # Operations on a file that must exist
+
+    def __init__(self, events, seed=None, content="zeros", source=""):
+        self.events = sorted(events, key=lambda event: event.offset)
+        self.seed = seed if seed is not None else new_seed()
+        self.content = content
+        self.source = source
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("trace") != cls.FORMAT:
+                raise ValueError(f"{filename} is not a workload trace (format {cls.FORMAT}).")
+            events = []
+            for number, line in enumerate(f, start=2):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item["op"] not in cls.OPERATIONS:
+                    raise ValueError(f"{filename} line {number}: unknown operation '{item['op']}'")
+                events.append(TraceEvent(float(item["t"]), item["session"], item["op"], item.get("path", ""),
+                                         int(item.get("size") or 0), item.get("user")))
+        return cls(events, header.get("seed"), header.get("content", "zeros"), header.get("source", filename))
+
+    def save(self, filename):
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"trace": self.FORMAT, "seed": self.seed, "content": self.content, "source": self.source,
+                                "events": len(self.events)}) + "\n")
+            for event in self.events:
+                item = {"t": event.offset, "session": event.session, "op": event.op, "path": event.path, "size": event.size}
+                if event.user is not None:
+                    item["user"] = event.user
+                f.write(json.dumps(item) + "\n")
+
+    @classmethod
+    def generate(cls, seed, sessions, uploads, rate, size_range, content="zeros"):
+        """Open workload: uploads arrive as a Poisson process of rate per second, each on a random session.
+
+        Arrival times, sessions and sizes all come from one Random seeded with seed.
+        """
+        seed = seed if seed is not None else new_seed()
+        rng = random.Random(seed)
+        offset = 0.0
+        events = []
+        for number in range(uploads):
+            offset += rng.expovariate(rate)
+            events.append(TraceEvent(round(offset, 6), rng.randrange(sessions), "upload", f"replay_{number}.bin",
+                                     draw_size(size_range, rng)))
+        return cls(events, seed, content, f"generated, {uploads} uploads of {format_size_range(size_range)} at {rate:g}/s")
+
+    @property
+    def duration(self):
+        return self.events[-1].offset if self.events else 0.0
+
+    def sessions(self):
+        """Returns the events of every session in order, as {session: [events]}."""
+        sessions = {}
+        for event in self.events:
+            sessions.setdefault(event.session, []).append(event)
+        return sessions
+
+    def peak_concurrency(self):
+        """Returns the largest number of sessions open at the same time, each open from its first to its last event."""
+        edges = []
+        for events in self.sessions().values():
+            edges += [(events[0].offset, 1), (events[-1].offset, -1)]
+        peak = open_sessions = 0
+        for _, change in sorted(edges, key=lambda edge: (edge[0], -edge[1])):
+            open_sessions += change
+            peak = max(peak, open_sessions)
+        return peak
+
+    def operation_counts(self):
+        """Returns {op: count} of the file operations, without connect and disconnect."""
+        counts = {}
+        for event in self.events:
+            if event.op not in ("connect", "disconnect"):
+                counts[event.op] = counts.get(event.op, 0) + 1
+        return counts
+
+    def missing_files(self):
+        """Returns the files the trace reads, stats or deletes without uploading them, as (preexisting, produced).
+
+        preexisting maps paths that existed before the trace started to their size (the largest download), a replay
+        creates them first. produced is the set of events on files that were deleted before and reappeared without an
+        upload, e.g. written by a local process of the original server, a replay recreates them before the event.
+        """
+        preexisting = {}
+        produced = set()
+        present = set()  # Paths on the server at this point of the trace
+        original = set()  # Preexisting paths not overwritten or deleted yet
+        seen = set()
+        for event in self.events:
+            path = event.path
+            if event.op == "upload":
+                present.add(path)
+                seen.add(path)
+                original.discard(path)
+            elif event.op in self.NEEDS_FILE:
+                size = event.size if event.op == "download" else 0
+                if path in original:
+                    preexisting[path] = max(preexisting[path], size)
+                elif path not in present:
+                    if path in seen:
+                        produced.add(event)
+                    else:
+                        preexisting[path] = size
+                        original.add(path)
+                    present.add(path)
+                    seen.add(path)
+                if event.op == "delete":
+                    present.discard(path)
+                    original.discard(path)
+        return preexisting, produced
+
+    def describe(self):
+        counts = self.operation_counts()
+        total_bytes = sum(event.size for event in self.events if event.op in ("upload", "download"))
+        operations = ", ".join(f"{op} {count}" for op, count in counts.items())
+        users = {event.user for event in self.events if event.user is not None}
+        return (f"{sum(counts.values())} operations ({operations}, {total_bytes / (1024 * 1024):.2f} MB) "
+                f"in {len(self.sessions())} sessions{f' of {len(users)} users' if users else ''} "
+                f"over {self.duration:.1f} s, seed {self.seed} ({self.source})")
+
+
+class TraceRecorder:
+    """Collects the operations of a run as they start, saved as a WorkloadTrace that replays the same workload"""
+
+    def __init__(self):
+        self.events = []
+        self.start = time.perf_counter()
+
+    def begin(self):
+        self.events = []
+        self.start = time.perf_counter()
+
+    def record(self, start, session, op, path, size):
+        """Records one operation, start is its time.perf_counter() value."""
+        self.events.append(TraceEvent(round(start - self.start, 6), session, op, path, size))  # list.append is atomic
+
+    def trace(self, seed, content, source):
+        return WorkloadTrace(self.events, seed, content, source)
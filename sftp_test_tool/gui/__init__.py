@@ -0,0 +1 @@
+"""PySide6 user interface, the live dashboard is imported when its tab is first opened."""
@@ -0,0 +1,50 @@
+"""Starting the GUI application."""
+import sys
+
+import qdarktheme
+from PySide6.QtWidgets import QApplication
+
+from .main_window import MainWindow
+
+
+def create_application():
+    """Creates the QApplication with the tool's dark theme."""
+    qdarktheme.enable_hi_dpi()
+    app = QApplication(sys.argv)
+    
+    my_custom_colors = {
+        "[dark]": {
+            "primary": "#3F69FD",
+            "input.background": "#3f4042",
+            "background>textarea": "#3f4042",
+            "primary>button.hoverBackground": "#3f4042",
+            "menubar.selectionBackground": "#3F69FD",
+            "popupItem.selectionBackground": "#3F69FD",
+            "scrollbarSlider.background": "#3F69FD"
+        },
+        
+        "[light]": {
+            "primary": "#3F69FD",
+            "background": "#fcfcfc",
+            "foreground": "#000000",
+            "input.background": "#ebebeb",
+            "background>textarea": "#ebebeb",
+            "primary>button.hoverBackground": "#ebebeb",
+            "border": "#949494",
+            "menubar.selectionBackground": "#3F69FD",
+            "popupItem.selectionBackground": "#3F69FD",
+            "scrollbarSlider.background": "#3F69FD"
+        }
+    }
+    
+    qdarktheme.setup_theme(theme="dark", custom_colors=my_custom_colors)
+    
+    return app
+
+
+def run_gui():
+    """Shows the main window and runs the event loop, returns the exit code."""
+    app = create_application()
+    window = MainWindow()
+    window.show()
+    return app.exec()
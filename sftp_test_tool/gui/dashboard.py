@@ -0,0 +1,98 @@
+"""Live dashboard tab, imported when the tab is first opened because QtCharts is slow to load."""
+import time
+
+from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
+from PySide6.QtCore import QPointF, Qt, QTimer
+from PySide6.QtGui import QPainter
+from PySide6.QtWidgets import QGridLayout, QWidget
+
+from ..metrics.live import LIVE_METRICS, TimeSeriesBuffer
+from ..metrics.stats import percentile
+
+
+class DashboardTab(QWidget):
+    """Live charts of throughput, active connections, latency and error rate, sampled from LIVE_METRICS once per second"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.start_time = None
+        self.previous = None  # (time, bytes, uploads, errors) of the previous sample
+        self.buffers = {name: TimeSeriesBuffer() for name in ("throughput", "connections", "p50", "p99", "error_rate")}
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.sample)
+
+        layout = QGridLayout()
+        self.setLayout(layout)
+        self.charts = {}
+        chart_definitions = [
+            ("Total throughput (MB/s)", ["throughput"]),
+            ("Active connections", ["connections"]),
+            ("Upload latency (ms)", ["p50", "p99"]),
+            ("Error rate (%)", ["error_rate"]),
+        ]
+        for index, (title, buffer_names) in enumerate(chart_definitions):
+            chart = QChart()
+            chart.setTitle(title)
+            axis_x = QValueAxis()
+            axis_x.setTitleText("Seconds")
+            axis_x.setLabelFormat("%d")
+            axis_y = QValueAxis()
+            chart.addAxis(axis_x, Qt.AlignBottom)
+            chart.addAxis(axis_y, Qt.AlignLeft)
+            series = {}
+            for buffer_name in buffer_names:
+                line = QLineSeries()
+                line.setName(buffer_name)
+                chart.addSeries(line)
+                line.attachAxis(axis_x)
+                line.attachAxis(axis_y)
+                series[buffer_name] = line
+            chart.legend().setVisible(len(buffer_names) > 1)
+            view = QChartView(chart)
+            view.setRenderHint(QPainter.Antialiasing)
+            layout.addWidget(view, index // 2, index % 2)
+            self.charts[title] = (axis_x, axis_y, series)
+
+    def start(self):
+        """Clears the charts and starts sampling, called when a test starts."""
+        for buffer in self.buffers.values():
+            buffer.clear()
+        LIVE_METRICS.take_recent_latencies()
+        self.start_time = time.monotonic()
+        self.previous = None
+        self.sample()
+        self.timer.start()
+
+    def stop(self):
+        if self.timer.isActive():
+            self.sample()
+            self.timer.stop()
+
+    def sample(self):
+        now = time.monotonic()
+        current = (now, LIVE_METRICS.bytes_uploaded.value(), LIVE_METRICS.uploads.value(), sum(LIVE_METRICS.errors.values.values()))
+        latencies = sorted(LIVE_METRICS.take_recent_latencies())
+        if self.previous is not None and now > self.previous[0]:
+            elapsed = now - self.previous[0]
+            uploads = current[2] - self.previous[2]
+            errors = current[3] - self.previous[3]
+            timestamp = now - self.start_time
+            self.buffers["throughput"].append(timestamp, (current[1] - self.previous[1]) / elapsed / (1024 * 1024))
+            self.buffers["connections"].append(timestamp, LIVE_METRICS.active_sessions.value())
+            self.buffers["p50"].append(timestamp, percentile(latencies, 50) * 1000)
+            self.buffers["p99"].append(timestamp, percentile(latencies, 99) * 1000)
+            self.buffers["error_rate"].append(timestamp, errors / (uploads + errors) * 100 if uploads + errors else 0.0)
+            self.redraw(timestamp)
+        self.previous = current
+
+    def redraw(self, timestamp):
+        """Replaces the series points in one call per series, the buffers never hold more than a few hundred points."""
+        for axis_x, axis_y, series in self.charts.values():
+            y_max = 0.0
+            for buffer_name, line in series.items():
+                buffer = self.buffers[buffer_name]
+                line.replace([QPointF(t, v) for t, v in buffer.points()])
+                y_max = max(y_max, buffer.max_value())
+            axis_x.setRange(0, max(timestamp, 1.0))
+            axis_y.setRange(0, y_max * 1.1 if y_max > 0 else 1.0)
@@ -0,0 +1,342 @@
+"""Dialogs and widgets shared by the main window."""
+import json
+import os
+
+from PySide6.QtCore import QSettings, QTimer
+from PySide6.QtGui import QAction, QCloseEvent, QIcon
+from PySide6.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QTextEdit,
+    QVBoxLayout
+)
+
+from ..settings import CURRENT_WORKING_DIR
+
+
+class ConfigManager:
+    def __init__(self, parent, filename):
+        """Initializes the ConfigManager with a specific JSON configuration file."""
+        self.parent = parent
+        self.filename = filename
+        self.data = self._load_config()
+
+    def _load_config(self):
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                QMessageBox.warning(self.parent, "Load config warning", f"Warning: {self.filename} contains invalid JSON. Resetting configuration file.")
+        
+        # Reset if file is missing or corrupted
+        self.reset_config()
+        return {}
+
+    def save_config(self):
+        """Saves the current configuration to the JSON file."""
+        with open(self.filename, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=4)
+
+    def set(self, key, value):
+        """Sets a configuration value and saves immediately."""
+        self.data[key] = value
+        self.save_config()
+
+    def get(self, key, default=None):
+        """Gets a configuration value, returning a default if the key doesn't exist."""
+        return self.data.get(key, default)
+
+    def delete(self, key):
+        """Deletes a key from the configuration and saves the file."""
+        if key in self.data:
+            del self.data[key]
+            self.save_config()
+
+    def reset_config(self):
+        """Resets the configuration file to an empty dictionary."""
+        self.data = {}
+        self.save_config()
+
+    def switch_config_file(self, new_filename):
+        """Switches to a different JSON configuration file and loads its data."""
+        self.filename = new_filename
+        self.data = self._load_config()
+    
+    def get_all_keys(self):
+        """Gets all keys of configuration file in a list and returns them as list."""
+        dict_keys = self.data.keys()
+        return list(dict_keys)
+
+
+class ProgressBarsWindow(QDialog):
+    def __init__(self, main_window, amount_of_progress_bars):
+        """Initializes the ProgressBarsWindow with a given number of progress bars."""
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.amount_of_progress_bars = amount_of_progress_bars
+        self.progress_bars = {}
+        # Initialize settings for window geometry
+        self.settings = QSettings("CustomAction", "Jovan") # Settings to save current location of the windows on exit
+        geometry = self.settings.value("progress_bars_geometry", bytes())
+        icon = QIcon(os.path.join(CURRENT_WORKING_DIR, "_internal", "icon", "sftp_icon.ico"))
+        self.setWindowTitle("Multiple Tasks Progress Bars")
+        self.setWindowIcon(icon)
+        self.restoreGeometry(geometry)
+        
+        # Layout for the dialog
+        layout = QVBoxLayout()
+        
+        # Create progress bars
+        for i in range(self.amount_of_progress_bars):
+            horizontal_layout = QHBoxLayout()
+            progress_bar = QProgressBar(self)
+            progress_bar.setValue(0)
+            progress_bar.setTextVisible(True)  # Show percentage text
+            task_label = QLabel(f"Task ID {i}:", self)
+            
+            horizontal_layout.addWidget(task_label)
+            horizontal_layout.addWidget(progress_bar)
+            layout.addLayout(horizontal_layout)  # Add the horizontal layout to the main layout
+            
+            self.progress_bars[i] = progress_bar
+            
+        # Set the layout for the dialog
+        self.setLayout(layout)
+        
+    def update_progress(self, task_id, progress):
+        """Update the progress bar for a specific task."""
+        if task_id in self.progress_bars:
+            self.progress_bars[task_id].setValue(progress)
+    
+    def start_auto_close_timer(self):
+        """Start a timer to close the window after 5 seconds."""
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)  # Ensure the timer only triggers once
+        self.timer.timeout.connect(self.close_window)
+        self.timer.start(5000)  # 5000 milliseconds = 5 seconds
+        
+    def closeEvent(self, event: QCloseEvent):
+        # Save geometry on close
+        geometry = self.saveGeometry()
+        self.settings.setValue("progress_bars_geometry", geometry)
+        super(ProgressBarsWindow, self).closeEvent(event)
+    
+class CustomAutoFillAction(QDialog):
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window  # Store the MainWindow instance
+        
+        # Initialize current working directory and theme file
+        
+        # Check if configuration file exists, if not create it
+        self.check_configuration_file_exists(os.path.join(CURRENT_WORKING_DIR, "_internal", "configuration"))
+        
+        # Initialize configuration file
+        CONFIGURATION_CUSTOM_ACTION_FILE = os.path.join(CURRENT_WORKING_DIR, "_internal", "configuration", "custom_actions.json")
+
+        self.custom_action_config = ConfigManager(self, CONFIGURATION_CUSTOM_ACTION_FILE)
+        
+        # Initialize settings for window geometry
+        self.settings = QSettings("CustomAction", "Jovan") # Settings to save current location of the windows on exit
+        geometry = self.settings.value("action_geometry", bytes())
+        icon = QIcon(os.path.join(CURRENT_WORKING_DIR, "_internal", "icon", "sftp_icon.ico"))
+        
+        # Set window properties
+        self.setWindowTitle("Custom Autofill Action Manager")
+        self.setWindowIcon(icon)
+        self.setFixedHeight(280)
+        self.restoreGeometry(geometry)
+        self.initUI()
+        
+        # Populate combobox with keys from the configuration file
+        self.update_combobox()
+    
+    def initUI(self):
+        main_layout = QVBoxLayout()
+        form_layout = QFormLayout()
+        hor_layout = QHBoxLayout()
+
+        # Elements
+        self.description = QLabel("Use the inputs below to define a custom autofill action for a target system:")
+        self.action_name_input = QLineEdit()
+        self.action_name_input.setPlaceholderText("Enter a name for the action")
+        self.host_action_input = QLineEdit()
+        self.host_action_input.setPlaceholderText("Enter host address")
+        self.directory_action_input = QLineEdit()
+        self.directory_action_input.setPlaceholderText("Enter directory path")
+        self.username_action_input = QLineEdit()
+        self.username_action_input.setPlaceholderText("Enter username")
+        self.password_action_input = QLineEdit()
+        self.password_action_input.setPlaceholderText("Enter password")
+        self.password_action_input.setEchoMode(QLineEdit.Password)
+        self.save_button = QPushButton("Save Action")
+        self.save_button.clicked.connect(self.save_custom_action)
+
+        # Elements for horizontal layout
+        self.combobox_label = QLabel("Select an existing action:")
+        self.custom_autofill_actions_combobox = QComboBox()
+        self.custom_autofill_actions_combobox.setDisabled(True)
+        self.load_action_button = QPushButton("Load Action")
+        self.load_action_button.clicked.connect(self.load_custom_action)
+        self.delete_action_button = QPushButton("Delete Action")
+        self.delete_action_button.clicked.connect(self.delete_custom_action)
+
+        # Add elements to horizontal layout
+        hor_layout.addWidget(self.combobox_label)
+        hor_layout.addWidget(self.custom_autofill_actions_combobox, stretch=1)
+        hor_layout.addWidget(self.load_action_button)
+        hor_layout.addWidget(self.delete_action_button)
+
+        # Add elements to form layout with labels
+        form_layout.addRow(QLabel("Description:"), self.description)
+        form_layout.addRow(QLabel("Action Name:"), self.action_name_input)
+        form_layout.addRow(QLabel("Host:"), self.host_action_input)
+        form_layout.addRow(QLabel("Directory:"), self.directory_action_input)
+        form_layout.addRow(QLabel("Username:"), self.username_action_input)
+        form_layout.addRow(QLabel("Password:"), self.password_action_input)
+
+        # Add form layout to main layout
+        main_layout.addLayout(hor_layout)
+        main_layout.addLayout(form_layout)
+        main_layout.addWidget(self.save_button)
+
+        self.setLayout(main_layout)
+    
+    def check_configuration_file_exists(self, file_path):
+        try:
+            # Initialize configuration file
+            config_file =  "custom_actions.json"
+            if not os.path.exists(file_path):
+                os.makedirs(file_path, exist_ok=True)
+                if not os.path.exists(os.path.join(file_path, config_file)):
+                    with open(os.path.join(file_path, config_file), "w") as f:
+                        f.write("{}")
+
+        except FileNotFoundError as ex:
+            QMessageBox.critical(self, "Configuration file error", f"An error occurred while trying to load the custom action configuration file: {str(ex)}")
+
+    def save_custom_action(self):
+        try:
+            action_name = self.action_name_input.text()
+            host = self.host_action_input.text()
+            directory = self.directory_action_input.text()
+            username = self.username_action_input.text()
+            password = self.password_action_input.text()
+            
+            if not action_name:
+                QMessageBox.warning(self, "Missing action name", "Please fill in the Action Name in order to save the custom action.")
+                return
+            
+            if not host and not directory and not username and not password:
+                QMessageBox.warning(self, "Missing action details", "Please fill in at least one of the other fields, other than Action Name to save the custom action.")
+                return
+            
+            # Save the custom action to the configuration file
+            self.custom_action_config.set(action_name, {
+                "host": host,
+                "directory": directory,
+                "username": username,
+                "password": password
+            })
+            
+            self.update_combobox()
+            self.parent().load_custom_actions()
+            
+            QMessageBox.information(self, "Action saved", f"Custom action '{action_name}' has been saved successfully.")
+        except Exception as ex:
+            QMessageBox.critical(self, "Error", f"An error occurred while saving the custom action: {str(ex)}")
+
+    def load_custom_action(self):
+        try:
+            custom_action_combobox_value = self.custom_autofill_actions_combobox.currentText()
+            data = self.custom_action_config.get(custom_action_combobox_value)
+            
+            if data:
+                self.action_name_input.setText(custom_action_combobox_value)
+                self.host_action_input.setText(data["host"])
+                self.directory_action_input.setText(data["directory"])
+                self.username_action_input.setText(data["username"])
+                self.password_action_input.setText(data["password"])
+            
+        except Exception as ex:
+            QMessageBox.critical(self, "Load custom action error", f"An error occurred, {str(ex)}")
+    
+    def delete_custom_action(self):
+        try:
+            custom_action_combobox_value = self.custom_autofill_actions_combobox.currentText()
+            custom_action_combobox_index = self.custom_autofill_actions_combobox.currentIndex()
+            if custom_action_combobox_value:
+                reply = QMessageBox.question(self, "Delete selected action?", f"Are you sure you want to delete the action {custom_action_combobox_value}?",QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if reply == QMessageBox.Yes:
+                    self.custom_action_config.delete(custom_action_combobox_value)
+                    self.custom_autofill_actions_combobox.removeItem(custom_action_combobox_index)
+                    self.main_window.load_custom_actions() # Removes action from fill menu
+                    self.clear_all_inputs()
+                else:
+                    return
+            else:
+                QMessageBox.information(self, "No action to delete", "Please select an action from the combobox first.")
+        except Exception as ex:
+            QMessageBox.critical(self, "Error while trying to delete action", f"An error has occurred while trying to delete the custom action. {str(ex)}")
+    
+    def update_combobox(self):
+        config_file_values = self.custom_action_config.get_all_keys()
+        if len(config_file_values) > 0:
+            self.custom_autofill_actions_combobox.setDisabled(False)
+            self.custom_autofill_actions_combobox.clear()
+            self.custom_autofill_actions_combobox.addItems(config_file_values)
+    
+    def clear_all_inputs(self):
+        inputs = [self.action_name_input, self.host_action_input , self.directory_action_input, self.username_action_input, self.password_action_input]
+        for input in inputs:
+            input.clear()
+    
+    def closeEvent(self, event: QCloseEvent):
+        # Save geometry on close
+        geometry = self.saveGeometry()
+        self.settings.setValue("action_geometry", geometry)
+        super(CustomAutoFillAction, self).closeEvent(event)
+        
+class MyTextEdit(QTextEdit):
+    def __init__(self, max_lines=0):
+        super().__init__()
+        # Keeps only the newest lines, a long run would otherwise grow the log without limit (0 keeps all)
+        self.document().setMaximumBlockCount(max_lines)
+
+    def contextMenuEvent(self, event):
+        # Get the default menu
+        menu = self.createStandardContextMenu()
+
+        # Custom action for clearing the log output
+        clear_log = QAction("Clear log", self)
+        clear_log.triggered.connect(self.clear_log_handler)
+        
+        # Custom action for sorting the log output
+        sort_log = QAction("Sort log", self)
+        sort_log.triggered.connect(self.sort_log_handler)
+
+        # Add the action to the menu (you can choose where to insert it)
+        menu.addSeparator()
+        menu.addAction(clear_log)
+        menu.addAction(sort_log)
+
+        # Show the menu at the cursor position
+        menu.exec(event.globalPos())
+
+    def clear_log_handler(self):
+        self.clear()
+    
+    def sort_log_handler(self):
+        test_log_text = self.toPlainText()
+        test_log_lines = test_log_text.splitlines()
+        sorted_lines = sorted(test_log_lines, key=lambda x: x.lower())  # Sort case-insensitive
+        sorted_text = '\n'.join(sorted_lines)
+        self.setPlainText(sorted_text)
@@ -0,0 +1,1227 @@
+"""Main window of the GUI.
+
+The test engine pulls in paramiko and psutil, its workers are imported when a test is started and not at startup.
+"""
+import copy
+import json
+import os
+
+from PySide6.QtCore import QSettings, QTimer, Slot
+from PySide6.QtGui import QAction, QCloseEvent, QIcon
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QDoubleSpinBox,
+    QFileDialog,
+    QFormLayout,
+    QGroupBox,
+    QHBoxLayout,
+    QInputDialog,
+    QLabel,
+    QLineEdit,
+    QMainWindow,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QSpinBox,
+    QTabWidget,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+    QStatusBar
+)
+
+from ..engine.generator import DummyFileWorker
+from ..engine.payload import FileCountWorker, get_files
+from ..engine.plan import (CLEANUP_PATTERN, DISTRIBUTIONS, MODES, TestPlan, Threshold, format_criteria_text, parse_criteria_text,
+                           parse_size, parse_thresholds)
+from ..engine.shaping import parse_rate
+from ..metrics.live import MetricsHTTPServer
+from ..settings import CURRENT_WORKING_DIR, SFTP_DIRECTORY, SFTP_HOST, SFTP_PASS, SFTP_PORT, SFTP_USER
+from .dialogs import CustomAutoFillAction, MyTextEdit, ProgressBarsWindow
+
+
+class MainWindow(QMainWindow):
+    LOG_MAX_LINES = 20000  # Lines kept in the test log, the report files keep the results of longer runs
+
+    def __init__(self):
+        super().__init__()
+        
+        icon_file_path = os.path.join(CURRENT_WORKING_DIR,"_internal","icon")
+        app_icon = QIcon(os.path.join(icon_file_path,"sftp_icon.ico"))
+        # Config file for custom autofill actions
+        self.custom_actions_config = os.path.join(CURRENT_WORKING_DIR, "_internal", "configuration", "custom_actions.json")
+        # Initialize settings for window geometry
+        self.settings = QSettings("SFTP_Main", "Jovan") # Settings to save current location of the windows on exit
+        geometry = self.settings.value("main_window_geometry", bytes())
+        # Test plan loaded from file, its scenarios, sweep and success criteria are kept when running from the GUI
+        self.current_plan = None
+        self.metrics_server = None
+
+        self.setWindowTitle("SFTP Stress Test Tool v1.1.2")
+        self.setWindowIcon(app_icon)
+        self.setMinimumSize(800, 600)
+        self.restoreGeometry(geometry)
+        
+        # Main layout
+        main_widget = QWidget()
+        main_layout = QVBoxLayout()
+        main_widget.setLayout(main_layout)
+        self.setCentralWidget(main_widget)
+        
+        # Create tab widget
+        self.tabs = QTabWidget()
+        main_layout.addWidget(self.tabs)
+        
+        # Create tabs, the dashboard and the file generator are built the first time they are used
+        self.stress_test_tab = QWidget()
+        self.dashboard_container = QWidget()
+        self.dashboard_tab = None
+        self.file_generator_tab = QWidget()
+        
+        self.tabs.addTab(self.stress_test_tab, "SFTP Stress Test")
+        self.tabs.addTab(self.dashboard_container, "Live Dashboard")
+        self.tabs.addTab(self.file_generator_tab, "Test File Generator")
+        self.tabs.currentChanged.connect(self.build_tab_on_first_use)
+        
+        # Setup each tab
+        self.setup_stress_test_tab()
+        
+        self.setup_menu_bar()
+    
+    def setup_menu_bar(self):
+        menu_bar = self.menuBar()
+        
+        # Open Menu
+        open_menu = menu_bar.addMenu("&Open")
+        open_test_file_folder_action = QAction("Open test file folder", self)
+        open_test_file_folder_action.triggered.connect(lambda: self.open_folder_helper(self.test_file_input.text(), "Test File"))
+        open_generated_file_folder_action = QAction("Open generated files folder", self)
+        open_generated_file_folder_action.triggered.connect(self.open_generated_file_folder)
+        open_menu.addAction(open_test_file_folder_action)
+        open_menu.addAction(open_generated_file_folder_action)
+        
+        # Plan Menu
+        plan_menu = menu_bar.addMenu("&Plan")
+        load_plan_action = QAction("Load test plan...", self)
+        load_plan_action.triggered.connect(self.load_test_plan)
+        save_plan_action = QAction("Save test plan...", self)
+        save_plan_action.triggered.connect(self.save_test_plan)
+        clear_plan_action = QAction("Clear loaded test plan", self)
+        clear_plan_action.triggered.connect(self.clear_test_plan)
+        plan_menu.addAction(load_plan_action)
+        plan_menu.addAction(save_plan_action)
+        plan_menu.addAction(clear_plan_action)
+        
+        # Tools Menu
+        tools_menu = menu_bar.addMenu("&Tools")
+        cleanup_action = QAction("Clean up remote directory...", self)
+        cleanup_action.triggered.connect(self.run_remote_cleanup)
+        tools_menu.addAction(cleanup_action)
+        calibrate_action = QAction("Calibrate client ceiling against a local sink server", self)
+        calibrate_action.setToolTip("Runs the current upload settings against a loopback SFTP server that discards the data")
+        calibrate_action.triggered.connect(self.run_calibration)
+        tools_menu.addAction(calibrate_action)
+        self.metrics_endpoint_action = QAction("Serve Prometheus metrics endpoint", self)
+        self.metrics_endpoint_action.setCheckable(True)
+        self.metrics_endpoint_action.toggled.connect(self.toggle_metrics_endpoint)
+        tools_menu.addAction(self.metrics_endpoint_action)
+        self.profiling_action = QAction("Profile the load generator during runs", self)
+        self.profiling_action.setCheckable(True)
+        self.profiling_action.setToolTip("Samples the tool's own threads and writes CPU flamegraph profiles to the results folder")
+        tools_menu.addAction(self.profiling_action)
+        self.timeline_action = QAction("Record a timeline of every connection", self)
+        self.timeline_action.setCheckable(True)
+        self.timeline_action.setToolTip("Writes the phases of every upload and replay session as a Chrome trace to the results "
+                                        "folder, open it in ui.perfetto.dev")
+        tools_menu.addAction(self.timeline_action)
+        
+        # Settings Menu
+        settings_menu = menu_bar.addMenu("&Settings")
+        settings_action = QAction("Custom Autofill Manager", self)
+        settings_action.triggered.connect(self.open_custom_action_dialog)
+        settings_menu.addAction(settings_action)
+        
+        # Autofill menu
+        self.autofill_menu = menu_bar.addMenu("&Autofill")
+        autofill_action = QAction("Geis NCT01", self)
+        autofill_action.triggered.connect(self.autofill_geis_nct01)
+        self.autofill_menu.addAction(autofill_action)
+        
+        self.load_custom_actions()
+
+    def open_folder_helper(self, path, element):
+        try:
+            if os.path.isdir(path):
+                os.startfile(path)
+            elif os.path.isfile(path):
+                head, tail = os.path.split(path)
+                os.startfile(head)
+            elif path == "" and element == "Test File":
+                QMessageBox.warning(self, "Path not found", "Cannot open path, test file input is empty in test parameters.")
+            elif path == "" and element == "Generated File":
+                QMessageBox.warning(self, "Path not found", "Cannot open path, save path input is empty in file generation parameters.")
+        except OSError as os_error:
+            QMessageBox.critical(self, "OSError occurred", f"An exception has occurred: {str(os_error)}.")
+        
+    def open_generated_file_folder(self):
+        self.ensure_file_generator_tab()
+        self.open_folder_helper(self.save_path_input.text(), "Generated File")
+    
+    def load_custom_actions(self):
+        try:
+            with open(self.custom_actions_config, "r") as jf:
+                data = json.load(jf)
+            if data or data == {}:
+                # Clear existing custom actions
+                for action in self.autofill_menu.actions():
+                    if action.text() not in "Geis NCT01":
+                        self.autofill_menu.removeAction(action)
+                # Add new custom actions
+                for key, value in data.items():
+                    action = QAction(key, self)
+                    action.triggered.connect(lambda checked, k=key, v=value: self.execute_custom_action(k, v))
+                    self.autofill_menu.insertAction(self.autofill_menu.actions()[0], action)
+
+        except json.JSONDecodeError:
+            QMessageBox.critical(self, "Error occurred", "The JSON file contains invalid JSON.")
+        except FileNotFoundError:
+            QMessageBox.critical(self, "Error occurred", "The JSON file was not found.")
+        except Exception as ex:
+            QMessageBox.critical(self, "Error occurred", f"An error occurred while loading custom actions: {str(ex)}")
+    
+    def execute_custom_action(self, action_name, config_data):
+        try:
+            if config_data:
+                self.host_input.setText(config_data["host"])
+                self.directory_input.setText(config_data["directory"])
+                self.username_input.setText(config_data["username"])
+                self.password_input.setText(config_data["password"])
+            else:
+                QMessageBox.warning(self, "Action not found", f"No data found for action '{action_name}'.")
+        except Exception as ex:
+            QMessageBox.critical(self, "Error", f"An error occurred while executing the custom action: {str(ex)}")
+    
+    def open_custom_action_dialog(self):
+        self.w = CustomAutoFillAction(self)
+        # Use show() instead of exec() to make it non-modal
+        self.w.show()
+    
+    def build_tab_on_first_use(self, index):
+        widget = self.tabs.widget(index)
+        if widget is self.dashboard_container:
+            self.ensure_dashboard_tab()
+        elif widget is self.file_generator_tab:
+            self.ensure_file_generator_tab()
+    
+    def ensure_dashboard_tab(self):
+        """Builds the live dashboard on first use, QtCharts is only loaded then."""
+        if self.dashboard_tab is None:
+            from .dashboard import DashboardTab
+            self.dashboard_tab = DashboardTab()
+            layout = QVBoxLayout(self.dashboard_container)
+            layout.setContentsMargins(0, 0, 0, 0)
+            layout.addWidget(self.dashboard_tab)
+        return self.dashboard_tab
+    
+    def ensure_file_generator_tab(self):
+        """Builds the file generator tab on first use, it scans the save path for its file list."""
+        if self.file_generator_tab.layout() is None:
+            self.setup_file_generator_tab()
+    
+    def setup_stress_test_tab(self):
+        layout = QVBoxLayout()
+        self.stress_test_tab.setLayout(layout)
+        
+        # SFTP Configuration Group
+        config_group = QGroupBox("SFTP Configuration")
+        config_layout = QFormLayout()
+        config_group.setLayout(config_layout)
+        
+        self.host_input = QLineEdit()
+        self.host_input.setPlaceholderText("Enter SFTP host address")
+        self.port_input = QSpinBox()
+        self.port_input.setRange(1, 65535)
+        self.port_input.setValue(SFTP_PORT)
+        self.directory_input = QLineEdit()
+        self.directory_input.setPlaceholderText("Enter SFTP directory")
+        self.username_input = QLineEdit()
+        self.username_input.setPlaceholderText("Enter SFTP username")
+        
+        password_layout = QHBoxLayout()
+        
+        self.password_input = QLineEdit()
+        self.password_input.setEchoMode(QLineEdit.Password)
+        self.password_input.setPlaceholderText("Enter SFTP password")
+        self.show_password_check = QPushButton("Show Password")
+        self.show_password_check.setCheckable(True)
+        self.show_password_check.toggled.connect(lambda state: self.password_input.setEchoMode(QLineEdit.Normal) or self.show_password_check.setText("Hide Password") if state else self.password_input.setEchoMode(QLineEdit.Password) or self.show_password_check.setText("Show Password"))
+        
+        password_layout.addWidget(self.password_input)
+        password_layout.addWidget(self.show_password_check)
+        
+        config_layout.addRow("Host:", self.host_input)
+        config_layout.addRow("Port:", self.port_input)
+        config_layout.addRow("Directory:", self.directory_input)
+        config_layout.addRow("Username:", self.username_input)
+        config_layout.addRow("Password:", password_layout)
+        
+        # Test File Selection
+        file_layout = QHBoxLayout()
+        self.multi_file_checkbox = QCheckBox("Multiple files transfer")
+        self.multi_file_progressbar = QProgressBar()
+        self.multi_file_progressbar.setHidden(True)
+        self.multi_file_checkbox.setChecked(False)
+        self.multi_file_checkbox.stateChanged.connect(self.multi_select_state_changed)
+        
+        self.cleanup_checkbox = QCheckBox("Delete uploaded files after test")
+        self.cleanup_checkbox.setToolTip("Runs a parallel cleanup phase that removes exactly the files this test uploaded")
+        
+        self.distribution_combo = QComboBox()
+        self.distribution_combo.addItems(["Replicate: every connection uploads all files", "Shard: split files across connections", "Queue: idle connections pull the next file"])
+        self.distribution_combo.setEnabled(False)
+        
+        # Horizontal layout for multifile and progress bar
+        multi_file_layout = QHBoxLayout()
+        multi_file_layout.addWidget(self.multi_file_checkbox, 1)
+        multi_file_layout.addWidget(self.distribution_combo, 1)
+        multi_file_layout.addWidget(self.cleanup_checkbox, 1)
+        multi_file_layout.addWidget(self.multi_file_progressbar, 2)
+        
+        self.test_file_input = QLineEdit()
+        self.test_file_input.setPlaceholderText("Select a single test file to upload...")
+        # Count files of a selected folder in the background once typing paused
+        self.file_count_timer = QTimer(self)
+        self.file_count_timer.setSingleShot(True)
+        self.file_count_timer.setInterval(300)
+        self.file_count_timer.timeout.connect(self.start_file_count)
+        self.file_count_workers = []
+        self.test_file_input.textChanged.connect(self.file_count_timer.start)
+        self.browse_test_file_button = QPushButton("Browse")
+        self.browse_test_file_button.clicked.connect(self.browse_test_file)
+        file_layout.addWidget(self.test_file_input, 1)
+        file_layout.addWidget(self.browse_test_file_button)
+        
+        # Test Parameters
+        test_group = QGroupBox("Test Parameters")
+        test_layout = QFormLayout()
+        test_group.setLayout(test_layout)
+        
+        self.connections_input = QSpinBox()
+        self.connections_input.setRange(1, 100)
+        self.connections_input.setValue(1)
+        
+        # Test mode, the handshake benchmark only connects and authenticates without uploading
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(["Upload stress test", "Handshake benchmark: connect and authenticate only",
+                                  "Small-file benchmark: many tiny files per session, reported as files/s",
+                                  "Soak test: long-lived sessions with keepalives and forced rekeying",
+                                  "Replay: a recorded trace, sftp-server log or CSV, or seeded arrivals, keeping sessions and timing",
+                                  "Auto-tune: find the session count with the best sustainable throughput, up to the parallel connections",
+                                  "Directory scaling: fill the target directory level by level, listing, stat and upload latency per level"])
+        self.mode_combo.currentIndexChanged.connect(self.test_mode_changed)
+        handshake_layout = QHBoxLayout()
+        self.handshake_attempts_input = QSpinBox()
+        self.handshake_attempts_input.setRange(1, 1000000)
+        self.handshake_attempts_input.setValue(1000)
+        self.handshake_attempts_input.setSuffix(" handshakes")
+        self.handshake_sftp_checkbox = QCheckBox("Open SFTP subsystem")
+        self.handshake_sftp_checkbox.setChecked(True)
+        self.handshake_attempts_input.setEnabled(False)
+        self.handshake_sftp_checkbox.setEnabled(False)
+        handshake_layout.addWidget(self.handshake_attempts_input, 1)
+        handshake_layout.addWidget(self.handshake_sftp_checkbox, 1)
+        smallfile_layout = QHBoxLayout()
+        self.smallfile_count_input = QSpinBox()
+        self.smallfile_count_input.setRange(1, 1000000)
+        self.smallfile_count_input.setValue(1000)
+        self.smallfile_count_input.setSuffix(" files per connection")
+        self.smallfile_window_input = QSpinBox()
+        self.smallfile_window_input.setRange(1, 256)
+        self.smallfile_window_input.setValue(16)
+        self.smallfile_window_input.setSuffix(" files in flight")
+        self.smallfile_window_input.setToolTip("Files uploaded concurrently over each session, 1 waits for every file like a plain put")
+        self.smallfile_confirm_checkbox = QCheckBox("Confirm every file with stat")
+        for widget in (self.smallfile_count_input, self.smallfile_window_input, self.smallfile_confirm_checkbox):
+            widget.setEnabled(False)
+            smallfile_layout.addWidget(widget, 1)
+        soak_layout = QHBoxLayout()
+        self.soak_duration_input = QSpinBox()
+        self.soak_duration_input.setRange(1, 10080)
+        self.soak_duration_input.setValue(60)
+        self.soak_duration_input.setSuffix(" min")
+        self.soak_interval_input = QSpinBox()
+        self.soak_interval_input.setRange(1, 3600)
+        self.soak_interval_input.setValue(10)
+        self.soak_interval_input.setPrefix("upload every ")
+        self.soak_interval_input.setSuffix(" s")
+        self.soak_keepalive_input = QSpinBox()
+        self.soak_keepalive_input.setRange(0, 3600)
+        self.soak_keepalive_input.setValue(30)
+        self.soak_keepalive_input.setPrefix("keepalive ")
+        self.soak_keepalive_input.setSuffix(" s")
+        self.soak_keepalive_input.setSpecialValueText("No keepalive")
+        self.soak_rekey_interval_input = QSpinBox()
+        self.soak_rekey_interval_input.setRange(0, 1440)
+        self.soak_rekey_interval_input.setPrefix("rekey every ")
+        self.soak_rekey_interval_input.setSuffix(" min")
+        self.soak_rekey_interval_input.setSpecialValueText("No timed rekey")
+        self.soak_rekey_bytes_input = QSpinBox()
+        self.soak_rekey_bytes_input.setRange(0, 1000000)
+        self.soak_rekey_bytes_input.setPrefix("rekey after ")
+        self.soak_rekey_bytes_input.setSuffix(" MB")
+        self.soak_rekey_bytes_input.setSpecialValueText("No byte rekey")
+        self.soak_reconnect_checkbox = QCheckBox("Reconnect dropped sessions")
+        for widget in (self.soak_duration_input, self.soak_interval_input, self.soak_keepalive_input,
+                       self.soak_rekey_interval_input, self.soak_rekey_bytes_input, self.soak_reconnect_checkbox):
+            widget.setEnabled(False)
+            soak_layout.addWidget(widget, 1)
+        replay_layout = QHBoxLayout()
+        self.replay_speed_input = QDoubleSpinBox()
+        self.replay_speed_input.setRange(0.01, 10000)
+        self.replay_speed_input.setValue(1.0)
+        self.replay_speed_input.setSuffix("x speed")
+        self.replay_speed_input.setToolTip("Time compression, 24 replays a day of traffic in one hour")
+        self.replay_uploads_input = QSpinBox()
+        self.replay_uploads_input.setRange(1, 10000000)
+        self.replay_uploads_input.setValue(1000)
+        self.replay_uploads_input.setSuffix(" generated uploads")
+        self.replay_rate_input = QDoubleSpinBox()
+        self.replay_rate_input.setRange(0.01, 100000)
+        self.replay_rate_input.setValue(10.0)
+        self.replay_rate_input.setSuffix(" uploads/s arriving")
+        for widget in (self.replay_speed_input, self.replay_uploads_input, self.replay_rate_input):
+            widget.setEnabled(False)
+            replay_layout.addWidget(widget, 1)
+        autotune_layout = QHBoxLayout()
+        self.autotune_step_input = QSpinBox()
+        self.autotune_step_input.setRange(1, 3600)
+        self.autotune_step_input.setValue(10)
+        self.autotune_step_input.setPrefix("measure ")
+        self.autotune_step_input.setSuffix(" s per step")
+        self.autotune_gain_input = QDoubleSpinBox()
+        self.autotune_gain_input.setRange(0, 100)
+        self.autotune_gain_input.setValue(5.0)
+        self.autotune_gain_input.setSuffix(" % gain to keep climbing")
+        self.autotune_latency_input = QSpinBox()
+        self.autotune_latency_input.setRange(0, 600000)
+        self.autotune_latency_input.setPrefix("p99 up to ")
+        self.autotune_latency_input.setSuffix(" ms")
+        self.autotune_latency_input.setSpecialValueText("No latency limit")
+        for widget in (self.autotune_step_input, self.autotune_gain_input, self.autotune_latency_input):
+            widget.setEnabled(False)
+            autotune_layout.addWidget(widget, 1)
+        
+        # Directory scaling benchmark, entry counts the target directory is filled to
+        dirscale_layout = QHBoxLayout()
+        self.dirscale_levels_input = QLineEdit("1000, 10000, 100000")
+        self.dirscale_levels_input.setToolTip("Entry counts the target directory is filled to, e.g. 1k, 10k, 100k")
+        self.dirscale_samples_input = QSpinBox()
+        self.dirscale_samples_input.setRange(1, 1000)
+        self.dirscale_samples_input.setValue(10)
+        self.dirscale_samples_input.setSuffix(" samples per operation and level")
+        for widget in (self.dirscale_levels_input, self.dirscale_samples_input):
+            widget.setEnabled(False)
+            dirscale_layout.addWidget(widget, 1)
+        
+        # Seeded workload, the same seed repeats payload sizes, content and generated arrivals
+        workload_layout = QHBoxLayout()
+        self.seed_input = QSpinBox()
+        self.seed_input.setRange(0, 2147483647)
+        self.seed_input.setSpecialValueText("New random seed per run")
+        self.seed_input.setPrefix("seed ")
+        self.record_trace_checkbox = QCheckBox("Record workload trace for replay")
+        self.record_trace_checkbox.setToolTip("Writes the uploads of the run with their timing to results/, replay it against another server with the replay mode")
+        workload_layout.addWidget(self.seed_input, 1)
+        workload_layout.addWidget(self.record_trace_checkbox, 1)
+        
+        # Success criteria for a pass/fail verdict
+        criteria_layout = QHBoxLayout()
+        self.criteria_input = QLineEdit()
+        self.criteria_input.setPlaceholderText("Optional, e.g. upload_latency_p99 < 2s; error_rate < 0.1%; throughput_mb_s > 200")
+        self.criteria_input.setToolTip("Metrics: " + ", ".join(Threshold.METRICS))
+        self.abort_on_breach_checkbox = QCheckBox("Abort early on clear breach")
+        criteria_layout.addWidget(self.criteria_input, 1)
+        criteria_layout.addWidget(self.abort_on_breach_checkbox)
+        
+        test_layout.addRow("Test mode:", self.mode_combo)
+        test_layout.addRow("Test file(s) to upload:", file_layout)
+        test_layout.addRow("Parallel connections:", self.connections_input)
+        test_layout.addRow("Options:", multi_file_layout) # Added Horizotnal layout for multiple files and progress bar instead of only checkbox
+        test_layout.addRow("Handshake options:", handshake_layout)
+        test_layout.addRow("Small-file options:", smallfile_layout)
+        test_layout.addRow("Soak options:", soak_layout)
+        test_layout.addRow("Replay options:", replay_layout)
+        test_layout.addRow("Auto-tune options:", autotune_layout)
+        test_layout.addRow("Directory scaling:", dirscale_layout)
+        test_layout.addRow("Workload:", workload_layout)
+        test_layout.addRow("Success criteria:", criteria_layout)
+        
+        # WAN emulation, 0 disables the respective setting
+        wan_layout = QHBoxLayout()
+        self.bandwidth_per_connection_input = QDoubleSpinBox()
+        self.bandwidth_per_connection_input.setRange(0, 10000)
+        self.bandwidth_per_connection_input.setSpecialValueText("Unlimited per connection")
+        self.bandwidth_per_connection_input.setSuffix(" Mbit/s per connection")
+        self.bandwidth_total_input = QDoubleSpinBox()
+        self.bandwidth_total_input.setRange(0, 100000)
+        self.bandwidth_total_input.setSpecialValueText("Unlimited in total")
+        self.bandwidth_total_input.setSuffix(" Mbit/s total")
+        self.delay_input = QSpinBox()
+        self.delay_input.setRange(0, 10000)
+        self.delay_input.setSuffix(" ms delay")
+        self.jitter_input = QSpinBox()
+        self.jitter_input.setRange(0, 10000)
+        self.jitter_input.setSuffix(" ms jitter")
+        self.loss_input = QDoubleSpinBox()
+        self.loss_input.setRange(0, 100)
+        self.loss_input.setSuffix(" % loss")
+        for widget in (self.bandwidth_per_connection_input, self.bandwidth_total_input, self.delay_input, self.jitter_input, self.loss_input):
+            wan_layout.addWidget(widget)
+        test_layout.addRow("WAN emulation:", wan_layout)
+        
+        # Progress
+        progress_group = QGroupBox("Total progress per task")
+        progress_layout = QVBoxLayout()
+        progress_group.setLayout(progress_layout)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.verdict_label = QLabel()
+        self.verdict_label.setHidden(True)
+        
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.verdict_label)
+        
+        # Action Buttons
+        button_layout = QHBoxLayout()
+        self.run_test_button = QPushButton("Run SFTP Stress Test")
+        self.run_test_button.clicked.connect(self.run_stress_test)
+        self.cancel_test_button = QPushButton("Cancel Test")
+        self.cancel_test_button.clicked.connect(self.cancel_stress_test)
+        self.cancel_test_button.setEnabled(False)
+        button_layout.addWidget(self.run_test_button)
+        button_layout.addWidget(self.cancel_test_button)
+        
+        # Log Output
+        log_group = QGroupBox("Test Log")
+        log_layout = QVBoxLayout()
+        log_group.setLayout(log_layout)
+        
+        self.log_output = MyTextEdit(self.LOG_MAX_LINES)
+        self.log_output.setReadOnly(True)
+        self.log_output.customContextMenuRequested.connect(self.contextMenuEvent)
+        self.system_statusbar = QStatusBar() # System bar at the bottom
+        self.system_statusbar.setSizeGripEnabled(False)
+        self.system_statusbar.setHidden(True)
+        
+        log_layout.addWidget(self.log_output)
+        log_layout.addWidget(self.system_statusbar)
+        
+        # Add all to main layout
+        layout.addWidget(config_group)
+        layout.addWidget(test_group)
+        layout.addWidget(progress_group)
+        layout.addLayout(button_layout)
+        layout.addWidget(log_group)
+    
+    def setup_file_generator_tab(self):
+        layout = QVBoxLayout()
+        self.file_generator_tab.setLayout(layout)
+        
+        # File Generation Parameters
+        gen_group = QGroupBox("File Generation Parameters")
+        gen_layout = QFormLayout()
+        gen_group.setLayout(gen_layout)
+        
+        self.file_count_input = QSpinBox()
+        self.file_count_input.setRange(1, 10000)
+        self.file_count_input.setValue(1)
+        
+        self.file_name_input = QLineEdit("dummy_file")
+        self.file_name_input.setPlaceholderText("Enter a file name prefix")
+        
+        self.size_type_combo = QComboBox()
+        self.size_type_combo.addItems(["Fixed Size (MB)", "Fixed Size (KB)", "Random Size"])
+        self.size_type_combo.currentIndexChanged.connect(self.toggle_size_input)
+        
+        self.file_size_input = QSpinBox()
+        self.file_size_input.setRange(1, 10000)
+        self.file_size_input.setValue(1)
+        self.file_size_input.setSuffix(" MB")
+        
+        self.gen_seed_input = QSpinBox()
+        self.gen_seed_input.setRange(0, 2147483647)
+        self.gen_seed_input.setSpecialValueText("New random seed")
+        self.gen_seed_input.setToolTip("The same seed creates the same random file sizes again")
+        self.gen_seed_input.setEnabled(False)
+        
+        # Path Selection
+        path_layout = QHBoxLayout()
+        self.save_path_input = QLineEdit()
+        self.save_path_input.setPlaceholderText("Select a save path...")
+        browse_save_button = QPushButton("Browse")
+        browse_save_button.clicked.connect(self.browse_save_path)
+        path_layout.addWidget(self.save_path_input, 1)
+        path_layout.addWidget(browse_save_button)
+        
+        gen_layout.addRow("Number of Files:", self.file_count_input)
+        gen_layout.addRow("File Name Prefix:", self.file_name_input)
+        gen_layout.addRow("Size Type:", self.size_type_combo)
+        gen_layout.addRow("File Size:", self.file_size_input)
+        gen_layout.addRow("Random Size Seed:", self.gen_seed_input)
+        gen_layout.addRow("Save Path:", path_layout)
+        
+        # Progress
+        gen_progress_group = QGroupBox("Generation Progress")
+        gen_progress_layout = QVBoxLayout()
+        gen_progress_group.setLayout(gen_progress_layout)
+        
+        self.gen_progress_bar = QProgressBar()
+        self.gen_progress_bar.setValue(0)
+        
+        gen_progress_layout.addWidget(self.gen_progress_bar)
+        
+        # Action Buttons
+        gen_button_layout = QHBoxLayout()
+        self.generate_button = QPushButton("Generate Test Files")
+        self.generate_button.clicked.connect(self.generate_dummy_files)
+        self.cancel_generate_button = QPushButton("Cancel Generation")
+        self.cancel_generate_button.clicked.connect(self.cancel_generation)
+        self.cancel_generate_button.setEnabled(False)
+        gen_button_layout.addWidget(self.generate_button)
+        gen_button_layout.addWidget(self.cancel_generate_button)
+        
+        # File List
+        files_group = QGroupBox("Generated Files")
+        files_layout = QVBoxLayout()
+        files_group.setLayout(files_layout)
+        
+        refresh_button = QPushButton("Refresh File List")
+        refresh_button.clicked.connect(self.refresh_file_list)
+        
+        self.files_list = QTextEdit()
+        self.files_list.setReadOnly(True)
+        
+        files_layout.addWidget(refresh_button)
+        files_layout.addWidget(self.files_list)
+        
+        # Log Output
+        gen_log_group = QGroupBox("Generation Log")
+        gen_log_layout = QVBoxLayout()
+        gen_log_group.setLayout(gen_log_layout)
+        
+        self.gen_log_output = MyTextEdit()
+        self.gen_log_output.setReadOnly(True)
+        gen_log_layout.addWidget(self.gen_log_output)
+        
+        # Add all to main layout
+        layout.addWidget(gen_group)
+        layout.addWidget(gen_progress_group)
+        layout.addLayout(gen_button_layout)
+        layout.addWidget(files_group)
+        layout.addWidget(gen_log_group)
+        
+        # Initialize file list
+        self.refresh_file_list()
+    
+    def update_file_size_suffix(self):
+        if self.size_type_combo.currentIndex() == 0:
+            self.file_size_input.setSuffix(" MB")
+            self.file_count_input.setRange(1, 10000)
+        elif self.size_type_combo.currentIndex() == 1:
+            self.file_size_input.setSuffix(" KB")
+            self.file_count_input.setRange(1, 10000)
+        else:
+            self.file_size_input.setSuffix(" Random file size between 1-25 MB")
+            self.file_count_input.setRange(1, 1000)
+    
+    def browse_test_file(self):
+        if MODES[self.mode_combo.currentIndex()] == "replay":
+            file_name, _ = QFileDialog.getOpenFileName(self, "Select a workload trace", "",
+                                                       "Workload traces (*.jsonl *.log *.csv);;All files (*)")
+            if file_name:
+                self.test_file_input.setText(file_name)
+        elif not self.multi_file_checkbox.isChecked():
+            file_name, _ = QFileDialog.getOpenFileName(self, "Select a single file")
+            if file_name:
+                self.test_file_input.setText(file_name)
+        else:
+            folder = QFileDialog.getExistingDirectory(self, "Select folder that contains files")
+            if folder:
+                self.test_file_input.setText(folder)
+    
+    def start_file_count(self):
+        path = self.test_file_input.text()
+        if not os.path.isdir(path):
+            return
+        worker = FileCountWorker(path)
+        worker.result_signal.connect(self.show_file_count)
+        worker.finished.connect(lambda: self.file_count_workers.remove(worker))
+        self.file_count_workers.append(worker)  # Keep a reference until the thread is done
+        worker.start()
+    
+    @Slot(str, int)
+    def show_file_count(self, path, count):
+        if path != self.test_file_input.text() or count < 0:
+            return  # Result of a path that was edited in the meantime
+        self.log_output.setText(f"The total number of files in selected folder is {count}")
+    
+    def test_mode_changed(self):
+        """Enables the inputs that apply to the selected test mode."""
+        mode = MODES[self.mode_combo.currentIndex()]
+        for widget in (self.test_file_input, self.browse_test_file_button):
+            widget.setEnabled(mode not in ("handshake", "dirscale"))
+        self.cleanup_checkbox.setEnabled(mode != "handshake")
+        self.multi_file_checkbox.setEnabled(mode in ("upload", "smallfile"))
+        self.distribution_combo.setEnabled(mode == "upload" and self.multi_file_checkbox.isChecked())
+        for widget in (self.handshake_attempts_input, self.handshake_sftp_checkbox):
+            widget.setEnabled(mode == "handshake")
+        for widget in (self.smallfile_count_input, self.smallfile_window_input, self.smallfile_confirm_checkbox):
+            widget.setEnabled(mode == "smallfile")
+        for widget in (self.soak_duration_input, self.soak_interval_input, self.soak_keepalive_input,
+                       self.soak_rekey_interval_input, self.soak_rekey_bytes_input, self.soak_reconnect_checkbox):
+            widget.setEnabled(mode == "soak")
+        for widget in (self.replay_speed_input, self.replay_uploads_input, self.replay_rate_input):
+            widget.setEnabled(mode == "replay")
+        for widget in (self.autotune_step_input, self.autotune_gain_input, self.autotune_latency_input):
+            widget.setEnabled(mode == "autotune")
+        for widget in (self.dirscale_levels_input, self.dirscale_samples_input):
+            widget.setEnabled(mode == "dirscale")
+        self.connections_input.setToolTip({"autotune": "Upper limit of the session count search",
+                                           "dirscale": "Sessions that fill the directory"}.get(mode, ""))
+        self.record_trace_checkbox.setEnabled(mode == "upload")
+        if mode == "replay":
+            self.multi_file_checkbox.setChecked(False)
+            self.test_file_input.setPlaceholderText("Select a workload trace, sftp-server log or CSV, empty generates seeded arrivals...")
+        elif not self.multi_file_checkbox.isChecked():
+            self.test_file_input.setPlaceholderText("Select a single file to upload...")
+    
+    def multi_select_state_changed(self):
+        self.distribution_combo.setEnabled(self.multi_file_checkbox.isChecked() and self.mode_combo.currentIndex() == 0)
+        if self.multi_file_checkbox.isChecked():
+            self.test_file_input.clear()
+            self.test_file_input.setPlaceholderText("Select a folder with files to upload...")
+        else:
+            self.test_file_input.setPlaceholderText("Select a single file to upload...")
+            self.test_file_input.clear()
+    
+    def browse_save_path(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Save Directory")
+        if folder:
+            self.save_path_input.setText(folder)
+    
+    def toggle_size_input(self, index):
+        if index == 0 or index == 1:  # Fixed Size (MB) or Fixed Size (KB)
+            self.file_size_input.setEnabled(True)
+            
+        else:  # Random Size
+            self.file_size_input.setEnabled(False)
+        self.gen_seed_input.setEnabled(index == 2)
+        # Update Spinbox for file size
+        self.update_file_size_suffix()
+            
+    # Menubar action methods
+    def autofill_geis_nct01(self):
+        self.host_input.setText(SFTP_HOST)
+        self.port_input.setValue(SFTP_PORT)
+        self.directory_input.setText(SFTP_DIRECTORY)
+        self.username_input.setText(SFTP_USER)
+        self.password_input.setText(SFTP_PASS)
+    
+    def run_stress_test(self):
+        from ..engine.modes import WORKER_MODES, SweepWorker, create_worker
+        from ..engine.upload import SFTPWorker
+        
+        # Get user input
+        try:
+            plan = self.build_plan_from_inputs()
+        except ValueError as ex:
+            self.log_output.append(f"ERROR: {str(ex)}")
+            return
+        target = plan.data["target"]
+        payload = plan.data["payload"]
+        connections = plan.data["load"]["connections"]
+        test_file = payload["path"]
+        mode = plan.data["mode"]
+        upload_mode = mode == "upload"
+        
+        # Validate inputs
+        if mode not in MODES:
+            self.log_output.append(f"ERROR: Unknown test mode '{mode}'.")
+            return
+        if upload_mode and payload.get("file_size") is None and not os.path.exists(test_file) and not plan.data["sweep"].get("payload.file_size"):
+            self.log_output.append(f"ERROR: Test file(s) '{test_file}' does not exist.")
+            return
+        if mode in ("smallfile", "soak", "autotune") and test_file and not os.path.exists(test_file):
+            self.log_output.append(f"ERROR: Test file(s) '{test_file}' does not exist.")
+            return
+        if mode == "replay" and plan.data["replay"]["trace"] and not os.path.exists(plan.data["replay"]["trace"]):
+            self.log_output.append(f"ERROR: Workload trace '{plan.data['replay']['trace']}' does not exist.")
+            return
+        try:
+            points = plan.expand()
+        except Exception as ex:
+            self.log_output.append(f"ERROR: Invalid test plan - {str(ex)}")
+            return
+        
+        # Clear previous log and reset progress
+        self.log_output.clear()
+        self.progress_bar.setValue(0)
+        self.verdict_label.setHidden(True)
+        
+        # Log start information
+        if plan.has_multiple_points():
+            self.log_output.append(f"Starting test plan '{plan.name}' with {len(points)} sweep points...")
+        else:
+            self.log_output.append(f"Starting {WORKER_MODES[mode].TITLE} with {connections} concurrent connections...")
+        self.log_output.append(f"Host: {target['host']}:{target['port']}")
+        if mode != "handshake":
+            self.log_output.append(f"Directory: {target['directory']}")
+        if upload_mode and payload.get("file_size") is not None:
+            self.log_output.append(f"Payload: generated {payload['file_size']} per upload")
+        self.log_output.append("=" * 50)
+        
+        # Disable/enable buttons
+        self.run_test_button.setEnabled(False)
+        self.cancel_test_button.setEnabled(True)
+        
+        # Create and start worker thread, a plan with scenarios or a sweep runs all of its points back to back
+        if plan.has_multiple_points():
+            self.sftp_worker = SweepWorker(plan)
+        else:
+            try:
+                self.sftp_worker = create_worker(points[0][1])
+            except Exception as ex:  # e.g. a server log that can not be imported as workload trace
+                self.log_output.append(f"ERROR: {str(ex)}")
+                self.run_test_button.setEnabled(True)
+                self.cancel_test_button.setEnabled(False)
+                return
+        if isinstance(self.sftp_worker, SFTPWorker):
+            self.sftp_worker.multi_file_progress_signal.connect(self.update_multi_files_progress)
+            self.sftp_worker.task_progress_signal.connect(self.update_task_progress)
+        self.sftp_worker.progress_signal.connect(self.update_sftp_progress)
+        self.sftp_worker.log_signal.connect(self.update_log)
+        self.sftp_worker.statusbar_signal.connect(self.update_statusbar)
+        self.sftp_worker.statusbar_hidden_state.connect(self.update_statusbar_state)
+        self.sftp_worker.verdict_signal.connect(self.show_verdict)
+        self.sftp_worker.finished_signal.connect(self.test_finished)
+        
+        if isinstance(self.sftp_worker, SFTPWorker):
+            self.show_progressbars_window() # Show the progress bars window if multiple connections are used
+        
+        self.ensure_dashboard_tab().start()
+        self.sftp_worker.start()
+    
+    def build_plan_from_inputs(self):
+        """Creates a test plan from the input widgets, keeping the extra sections of a loaded plan."""
+        plan = TestPlan(copy.deepcopy(self.current_plan.data) if self.current_plan else None)
+        plan.data["target"].update({
+            "host": self.host_input.text(),
+            "port": self.port_input.value(),
+            "directory": self.directory_input.text(),
+            "username": self.username_input.text(),
+            "password": self.password_input.text(),
+        })
+        plan.data["mode"] = MODES[self.mode_combo.currentIndex()]
+        plan.data["profiling"]["enabled"] = self.profiling_action.isChecked()
+        plan.data["profiling"]["timeline"] = self.timeline_action.isChecked()
+        plan.data["handshake"]["attempts"] = self.handshake_attempts_input.value()
+        plan.data["handshake"]["open_sftp"] = self.handshake_sftp_checkbox.isChecked()
+        plan.data["smallfile"].update({
+            "files_per_connection": self.smallfile_count_input.value(),
+            "window": self.smallfile_window_input.value(),
+            "confirm": self.smallfile_confirm_checkbox.isChecked(),
+        })
+        plan.data["replay"].update({
+            "trace": self.test_file_input.text() if plan.data["mode"] == "replay" else plan.data["replay"]["trace"],
+            "speed": self.replay_speed_input.value(),
+            "uploads": self.replay_uploads_input.value(),
+            "rate": self.replay_rate_input.value(),
+        })
+        plan.data["autotune"].update({
+            "step_duration": self.autotune_step_input.value(),
+            "min_gain": self.autotune_gain_input.value() / 100,
+            "max_latency_p99": self.autotune_latency_input.value() / 1000 or None,
+        })
+        plan.data["dirscale"].update({
+            "levels": [int(level) if level.isdigit() else level
+                       for level in (part.strip() for part in self.dirscale_levels_input.text().split(",")) if level],
+            "samples": self.dirscale_samples_input.value(),
+        })
+        plan.data["soak"].update({
+            "duration": self.soak_duration_input.value() * 60,
+            "upload_interval": self.soak_interval_input.value(),
+            "keepalive": self.soak_keepalive_input.value(),
+            "rekey_interval": self.soak_rekey_interval_input.value() * 60 or None,
+            "rekey_bytes": f"{self.soak_rekey_bytes_input.value()}MB" if self.soak_rekey_bytes_input.value() else None,
+            "reconnect": self.soak_reconnect_checkbox.isChecked(),
+        })
+        plan.data["workload"]["multiple_files"] = self.multi_file_checkbox.isChecked()
+        plan.data["workload"]["cleanup"] = self.cleanup_checkbox.isChecked()
+        plan.data["workload"]["distribution"] = DISTRIBUTIONS[self.distribution_combo.currentIndex()]
+        plan.data["workload"]["seed"] = self.seed_input.value() or None
+        plan.data["workload"]["record_trace"] = self.record_trace_checkbox.isChecked()
+        plan.data["load"]["connections"] = self.connections_input.value()
+        if plan.data["mode"] != "replay":
+            plan.data["payload"]["path"] = self.test_file_input.text()
+        plan.data["success_criteria"]["thresholds"] = parse_criteria_text(self.criteria_input.text())
+        plan.data["success_criteria"]["abort_on_breach"] = self.abort_on_breach_checkbox.isChecked()
+        plan.data["network"].update({
+            "bandwidth_per_connection": f"{self.bandwidth_per_connection_input.value()}Mbit" if self.bandwidth_per_connection_input.value() else None,
+            "bandwidth_total": f"{self.bandwidth_total_input.value()}Mbit" if self.bandwidth_total_input.value() else None,
+            "delay_ms": self.delay_input.value(),
+            "jitter_ms": self.jitter_input.value(),
+            "loss_rate": self.loss_input.value() / 100,
+        })
+        return plan
+    
+    def apply_plan_to_inputs(self, plan):
+        """Fills the input widgets with the base values of a test plan."""
+        target = plan.data["target"]
+        self.host_input.setText(target["host"] or "")
+        self.port_input.setValue(int(target["port"]))
+        self.directory_input.setText(target["directory"] or "")
+        self.username_input.setText(target["username"] or "")
+        self.password_input.setText(TestPlan.resolve_password(target) or "")
+        self.multi_file_checkbox.setChecked(bool(plan.data["workload"]["multiple_files"]))  # Clears the test file input
+        self.cleanup_checkbox.setChecked(bool(plan.data["workload"]["cleanup"]))
+        distribution = plan.data["workload"].get("distribution", "replicate")
+        self.distribution_combo.setCurrentIndex(DISTRIBUTIONS.index(distribution) if distribution in DISTRIBUTIONS else 0)
+        self.connections_input.setValue(int(plan.data["load"]["connections"]))
+        self.test_file_input.setText(plan.data["payload"]["path"] or "")
+        self.profiling_action.setChecked(bool(plan.data["profiling"].get("enabled")))
+        self.timeline_action.setChecked(bool(plan.data["profiling"].get("timeline")))
+        mode = plan.data.get("mode", "upload")
+        self.mode_combo.setCurrentIndex(MODES.index(mode) if mode in MODES else 0)
+        self.handshake_attempts_input.setValue(int(plan.data["handshake"].get("attempts") or 1000))
+        self.handshake_sftp_checkbox.setChecked(bool(plan.data["handshake"].get("open_sftp", True)))
+        self.smallfile_count_input.setValue(int(plan.data["smallfile"].get("files_per_connection") or 1000))
+        self.smallfile_window_input.setValue(int(plan.data["smallfile"].get("window") or 16))
+        self.smallfile_confirm_checkbox.setChecked(bool(plan.data["smallfile"].get("confirm")))
+        soak = plan.data["soak"]
+        self.soak_duration_input.setValue(max(1, round(float(soak.get("duration") or 3600) / 60)))
+        self.soak_interval_input.setValue(max(1, round(float(soak.get("upload_interval") or 10))))
+        self.soak_keepalive_input.setValue(int(soak.get("keepalive") or 0))
+        self.soak_rekey_interval_input.setValue(round(float(soak.get("rekey_interval") or 0) / 60))
+        self.soak_rekey_bytes_input.setValue(round((parse_size(soak.get("rekey_bytes")) or 0) / 1024 ** 2))
+        self.soak_reconnect_checkbox.setChecked(bool(soak.get("reconnect")))
+        replay = plan.data["replay"]
+        self.replay_speed_input.setValue(float(replay.get("speed") or 1.0))
+        self.replay_uploads_input.setValue(int(replay.get("uploads") or 1000))
+        self.replay_rate_input.setValue(float(replay.get("rate") or 10.0))
+        if mode == "replay":
+            self.test_file_input.setText(replay.get("trace") or "")
+        autotune = plan.data["autotune"]
+        self.autotune_step_input.setValue(max(1, round(float(autotune.get("step_duration") or 10))))
+        self.autotune_gain_input.setValue(float(autotune.get("min_gain") or 0) * 100)
+        self.autotune_latency_input.setValue(round(float(autotune.get("max_latency_p99") or 0) * 1000))
+        dirscale = plan.data["dirscale"]
+        self.dirscale_levels_input.setText(", ".join(str(level) for level in dirscale.get("levels") or []))
+        self.dirscale_samples_input.setValue(int(dirscale.get("samples") or 10))
+        self.seed_input.setValue(int(plan.data["workload"].get("seed") or 0))
+        self.record_trace_checkbox.setChecked(bool(plan.data["workload"].get("record_trace")))
+        self.criteria_input.setText(format_criteria_text(plan.data["success_criteria"].get("thresholds") or {}))
+        self.abort_on_breach_checkbox.setChecked(bool(plan.data["success_criteria"].get("abort_on_breach")))
+        network = plan.data["network"]
+        self.bandwidth_per_connection_input.setValue((parse_rate(network.get("bandwidth_per_connection")) or 0) * 8 / 1000 ** 2)
+        self.bandwidth_total_input.setValue((parse_rate(network.get("bandwidth_total")) or 0) * 8 / 1000 ** 2)
+        self.delay_input.setValue(int(network.get("delay_ms") or 0))
+        self.jitter_input.setValue(int(network.get("jitter_ms") or 0))
+        self.loss_input.setValue(float(network.get("loss_rate") or 0) * 100)
+    
+    def load_test_plan(self):
+        file_name, _ = QFileDialog.getOpenFileName(self, "Load test plan", "", "Test plans (*.json *.yaml *.yml)")
+        if not file_name:
+            return
+        try:
+            plan = TestPlan.load(file_name)
+            points = plan.expand()
+            parse_thresholds(plan.data["success_criteria"])
+        except Exception as ex:
+            QMessageBox.critical(self, "Load test plan error", f"An error occurred while loading the test plan: {str(ex)}")
+            return
+        self.current_plan = plan
+        self.apply_plan_to_inputs(plan)
+        self.log_output.append(f"Loaded test plan '{plan.name}' from '{file_name}' ({len(points)} sweep points).")
+    
+    def save_test_plan(self):
+        file_name, _ = QFileDialog.getSaveFileName(self, "Save test plan", "", "JSON test plan (*.json);;YAML test plan (*.yaml *.yml)")
+        if not file_name:
+            return
+        try:
+            plan = self.build_plan_from_inputs()
+            plan.save(file_name)
+            self.current_plan = plan
+            self.log_output.append(f"Saved test plan '{plan.name}' to '{file_name}'.")
+        except Exception as ex:
+            QMessageBox.critical(self, "Save test plan error", f"An error occurred while saving the test plan: {str(ex)}")
+    
+    def clear_test_plan(self):
+        self.current_plan = None
+        self.log_output.append("Test plan cleared, the next test only uses the values of the input fields.")
+    
+    def run_remote_cleanup(self):
+        if hasattr(self, 'cleanup_worker') and self.cleanup_worker.isRunning():
+            QMessageBox.information(self, "Cleanup running", "A remote cleanup is already running.")
+            return
+        directory = self.directory_input.text()
+        if not self.host_input.text() or not directory:
+            QMessageBox.warning(self, "Missing SFTP configuration", "Please fill in at least the host and directory in the SFTP configuration.")
+            return
+        
+        pattern, ok = QInputDialog.getText(self, "Clean up remote directory", f"Delete files in '{directory}' matching pattern:", QLineEdit.Normal, CLEANUP_PATTERN)
+        if not ok or not pattern:
+            return
+        reply = QMessageBox.question(self, "Delete remote files?", f"Are you sure you want to delete all files matching '{pattern}' in '{directory}'?", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        from ..engine.cleanup import RemoteCleanupWorker
+        
+        self.log_output.append("=" * 50)
+        self.cleanup_worker = RemoteCleanupWorker(self.host_input.text(), self.port_input.value(), directory, self.username_input.text(), self.password_input.text(), self.connections_input.value(), pattern)
+        self.cleanup_worker.log_signal.connect(self.update_log)
+        self.cleanup_worker.finished_signal.connect(lambda deleted: self.log_output.append(f"Remote cleanup finished, {deleted} files deleted."))
+        self.cleanup_worker.start()
+    
+    def run_calibration(self):
+        """Runs the current connections, payload and WAN settings as upload test against local sink server processes."""
+        if hasattr(self, 'sftp_worker') and self.sftp_worker.isRunning():
+            QMessageBox.information(self, "Test running", "Wait until the running test is finished.")
+            return
+        try:
+            plan = self.build_plan_from_inputs()
+            plan.data["sweep"] = {}
+            plan.data["scenarios"] = []
+            _, point = plan.expand()[0]
+        except ValueError as ex:
+            self.log_output.append(f"ERROR: {str(ex)}")
+            return
+        if point["payload"].get("file_size") is None and not os.path.exists(point["payload"]["path"]):
+            self.log_output.append(f"ERROR: Test file(s) '{point['payload']['path']}' does not exist.")
+            return
+        
+        from ..engine.calibration import CalibrationWorker
+        
+        self.log_output.clear()
+        self.progress_bar.setValue(0)
+        self.verdict_label.setHidden(True)
+        self.log_output.append(f"Calibrating the client ceiling with {point['load']['connections']} connections against local sink servers...")
+        self.run_test_button.setEnabled(False)
+        self.cancel_test_button.setEnabled(True)
+        self.sftp_worker = CalibrationWorker(point, sink_processes=2, name=f"{plan.name}_calibration")
+        self.sftp_worker.progress_signal.connect(self.update_sftp_progress)
+        self.sftp_worker.log_signal.connect(self.update_log)
+        self.sftp_worker.statusbar_signal.connect(self.update_statusbar)
+        self.sftp_worker.statusbar_hidden_state.connect(self.update_statusbar_state)
+        self.sftp_worker.finished_signal.connect(self.test_finished)
+        self.ensure_dashboard_tab().start()
+        self.sftp_worker.start()
+    
+    def toggle_metrics_endpoint(self, enabled):
+        if not enabled:
+            if self.metrics_server:
+                self.metrics_server.stop()
+                self.metrics_server = None
+                self.log_output.append("Metrics endpoint stopped.")
+            return
+        
+        port, ok = QInputDialog.getInt(self, "Prometheus metrics endpoint", "Local port for /metrics:", self.settings.value("metrics_port", 9464, type=int), 1024, 65535)
+        if not ok:
+            self.metrics_endpoint_action.setChecked(False)
+            return
+        try:
+            self.metrics_server = MetricsHTTPServer(port)
+            self.metrics_server.start()
+            self.settings.setValue("metrics_port", port)
+            self.log_output.append(f"Serving live metrics at {self.metrics_server.url}")
+        except OSError as os_error:
+            self.metrics_server = None
+            self.metrics_endpoint_action.setChecked(False)
+            QMessageBox.critical(self, "Metrics endpoint error", f"Could not start the metrics endpoint on port {port}: {str(os_error)}")
+    
+    def show_progressbars_window(self):
+        connections = self.connections_input.value()
+        multiple_files_state = self.multi_file_checkbox.isChecked()
+        if connections > 1 and multiple_files_state:
+            self.progress_bar_window = ProgressBarsWindow(self, connections)
+            self.sftp_worker.task_progress_bars_signal.connect(self.progress_bar_window.update_progress)
+            self.progress_bar_window.show()
+    
+    def cancel_stress_test(self):
+        if hasattr(self, 'sftp_worker') and self.sftp_worker.isRunning():
+            self.sftp_worker.cancel()
+            self.log_output.append("SFTP stress test canceled by user.")
+            self.log_output.append("SFTP Upload may continue trying to upload file(s) when a connection attempt fails, but will stop shortly after.")
+            self.run_test_button.setEnabled(True)
+            self.cancel_test_button.setEnabled(False)
+            self.multi_file_progressbar.setValue(0)
+            self.multi_file_progressbar.setHidden(True)
+            self.progress_bar.setValue(0)
+    
+    @Slot(int)
+    def update_sftp_progress(self, value):
+        self.progress_bar.setValue(value)
+        
+    @Slot(int)
+    def update_multi_files_progress(self, value):
+        self.multi_file_progressbar.setHidden(False)
+        self.multi_file_progressbar.setValue(value)
+    
+    @Slot(int, bool)
+    def update_task_progress(self, task_id, success):
+        status = "succeeded." if success else "failed."
+        self.log_output.append(f"=== Task with ID {task_id} has {status} ===")
+    
+    @Slot(bool, str)
+    def show_verdict(self, passed, failed):
+        if passed:
+            self.verdict_label.setText("PASSED - all success criteria met")
+            self.verdict_label.setStyleSheet("QLabel { background-color: #2e7d32; color: white; padding: 4px; font-weight: bold; }")
+        else:
+            self.verdict_label.setText(f"FAILED - {failed}")
+            self.verdict_label.setStyleSheet("QLabel { background-color: #c62828; color: white; padding: 4px; font-weight: bold; }")
+        self.verdict_label.setHidden(False)
+    
+    @Slot(str)
+    def update_log(self, message):
+        self.log_output.append(message)
+        # Scroll to bottom
+        self.log_output.verticalScrollBar().setValue(self.log_output.verticalScrollBar().maximum())
+    
+    @Slot(str, int)
+    def update_statusbar(self, message, timeout):
+        self.system_statusbar.showMessage(message, timeout)
+        
+    @Slot(bool)
+    def update_statusbar_state(self):
+        self.system_statusbar.setHidden(False)
+    
+    @Slot(float)
+    def test_finished(self, total_time):
+        if self.dashboard_tab:
+            self.dashboard_tab.stop()
+        self.run_test_button.setEnabled(True)
+        self.cancel_test_button.setEnabled(False)
+        self.multi_file_progressbar.setValue(0)
+        self.multi_file_progressbar.setHidden(True)
+        self.progress_bar.setValue(0)
+        if hasattr(self, 'progress_bar_window'):
+            self.start_auto_close_timer()
+        
+        #self.log_output.append(f"Test completed in {total_time:.2f} seconds.")
+        self.log_output.append("=" * 50)
+        
+    # Auto close timer for progressbar window
+    def start_auto_close_timer(self):
+        """Start a timer to close the window after 5 seconds."""
+        self.countdown = 5
+        self.statusbar_progressbar_window = QStatusBar()
+        self.statusbar_progressbar_window.setSizeGripEnabled(False)
+        self.statusbar_progressbar_window.setMaximumHeight(20)
+        self.progress_bar_window.layout().addWidget(self.statusbar_progressbar_window, 1)
+        self.update_statusbar_message()
+        # Create a QTimer to close the progress bar window after 5 seconds
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(False)  # Ensure the timer only triggers once
+        self.timer.timeout.connect(self.update_countdown)
+        self.timer.start(1000)  # 5000 milliseconds = 5 seconds
+    
+    def update_countdown(self):
+        """Update the countdown and close the window when it reaches zero."""
+        self.countdown -= 1
+        if self.countdown > 0:
+            self.update_statusbar_message()
+        else:
+            self.timer.stop()  # Stop the timer
+            self.progress_bar_window.close()  # Close the progress bar window
+    
+    def update_statusbar_message(self):
+        """Update the status bar message with the remaining countdown time."""
+        self.statusbar_progressbar_window.showMessage(f"Tasks completed. Closing window in {self.countdown} seconds...")
+    
+    def generate_dummy_files(self):
+        amount = self.file_count_input.value()
+        file_name = self.file_name_input.text()
+        save_path = self.save_path_input.text()
+        file_size_suffix_index = self.size_type_combo.currentIndex() # 0 = MB, 1 = KB
+        fs_suffix = "MB" if file_size_suffix_index == 0 else "KB" if file_size_suffix_index == 1 else ""
+        
+        if file_size_suffix_index == 0 or file_size_suffix_index == 1:  # Fixed size (MB) or Fixed size (KB)
+            size_in_mb = self.file_size_input.value()
+        else:  # Random size
+            size_in_mb = "random"
+        
+        # Clear previous log and reset progress
+        self.gen_log_output.clear()
+        self.gen_progress_bar.setValue(0)
+        
+        # Log start information
+        self.gen_log_output.append(f"Starting generation of {amount} test files...")
+        self.gen_log_output.append(f"Path: {save_path}")
+        self.gen_log_output.append(f"Size: {'Random 1-25 MB' if size_in_mb == 'random' else f'{size_in_mb} {fs_suffix}'}")
+        self.gen_log_output.append("=" * 50)
+        
+        # Disable/enable buttons
+        self.generate_button.setEnabled(False)
+        self.cancel_generate_button.setEnabled(True)
+        
+        # Create and start worker thread
+        self.file_worker = DummyFileWorker(amount, file_name, save_path, file_size_suffix_index, size_in_mb, seed=self.gen_seed_input.value() or None)
+        self.file_worker.progress_signal.connect(self.update_gen_progress)
+        self.file_worker.log_signal.connect(self.update_gen_log)
+        self.file_worker.finished_signal.connect(self.generation_finished)
+        self.file_worker.start()
+    
+    def cancel_generation(self):
+        if hasattr(self, 'file_worker') and self.file_worker.isRunning():
+            self.file_worker.terminate()
+            self.file_worker.wait()
+            self.gen_log_output.append("File generation canceled by user.")
+            self.generate_button.setEnabled(True)
+            self.cancel_generate_button.setEnabled(False)
+    
+    @Slot(int)
+    def update_gen_progress(self, value):
+        self.gen_progress_bar.setValue(value)
+    
+    @Slot(str)
+    def update_gen_log(self, message):
+        self.gen_log_output.append(message)
+        # Scroll to bottom
+        self.gen_log_output.verticalScrollBar().setValue(self.gen_log_output.verticalScrollBar().maximum())
+    
+    @Slot()
+    def generation_finished(self):
+        self.generate_button.setEnabled(True)
+        self.cancel_generate_button.setEnabled(False)
+        self.gen_log_output.append("File generation completed.")
+        self.gen_log_output.append("=" * 50)
+        self.refresh_file_list()
+    
+    def refresh_file_list(self):
+        path = self.save_path_input.text()
+        files = get_files(path)
+        
+        self.files_list.clear()
+        
+        if not files:
+            self.files_list.append(f"No files found in '{path}'")
+            return
+        
+        # Sizes come from the same scan, the widget is filled once and capped for huge folders
+        max_listed_files = 1000
+        lines = [f"Files in '{path}':"]
+        lines.extend(f"- {file.name} ({file.size / (1024 * 1024):.2f} MB)" for file in files[:max_listed_files])
+        if len(files) > max_listed_files:
+            lines.append(f"... and {len(files) - max_listed_files} more files")
+        self.files_list.setPlainText("\n".join(lines))
+            
+    def closeEvent(self, event: QCloseEvent):
+        # Save geometry on close
+        geometry = self.saveGeometry()
+        self.settings.setValue("main_window_geometry", geometry)
+        if self.metrics_server:
+            self.metrics_server.stop()
+        super(MainWindow, self).closeEvent(event)
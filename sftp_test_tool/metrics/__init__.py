@@ -0,0 +1 @@
+"""Latency statistics, live metrics, host monitoring and the self-profiler."""
@@ -0,0 +1,218 @@
+"""Live metrics of the running test, served in the Prometheus text format and sampled by the dashboard."""
+import bisect
+import threading
+import time
+from array import array
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MetricCounter:
+    """Monotonic counter, optionally split by one label, rendered in Prometheus text format"""
+    kind = "counter"
+
+    def __init__(self, name, help_text, label=None):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, label_value=""):
+        with self._lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def value(self, label_value=""):
+        return self.values.get(label_value, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = dict(self.values) or ({} if self.label else {"": 0})
+        for label_value, value in sorted(values.items()):
+            labels = f'{{{self.label}="{label_value}"}}' if self.label else ""
+            lines.append(f"{self.name}{labels} {value}")
+        return lines
+
+
+class MetricGauge(MetricCounter):
+    """Value that can go up and down, e.g. uploads currently in flight"""
+    kind = "gauge"
+
+    def dec(self, amount=1, label_value=""):
+        self.inc(-amount, label_value)
+
+    def set(self, value, label_value=""):
+        with self._lock:
+            self.values[label_value] = value
+
+
+class MetricHistogram:
+    """Fixed-bucket histogram split by one label, observing costs one bisect and a few additions under a lock"""
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.series = {}  # label value -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_value=""):
+        index = bisect.bisect_left(self.BUCKETS, value)
+        with self._lock:
+            series = self.series.get(label_value)
+            if series is None:
+                series = self.series[label_value] = [0] * (len(self.BUCKETS) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((label_value, list(series)) for label_value, series in self.series.items())
+        for label_value, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {series[-1]}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {cumulative}')
+        return lines
+
+
+class LiveMetrics:
+    """Process-wide live metrics of all runs, updated by the engine and served by MetricsHTTPServer"""
+
+    def __init__(self):
+        self.uploads_in_flight = MetricGauge("sftp_uploads_in_flight", "Uploads currently being transferred.")
+        self.active_sessions = MetricGauge("sftp_active_sessions", "Open SFTP sessions.")
+        self.uploads = MetricCounter("sftp_uploads_total", "Completed uploads.")
+        self.bytes_uploaded = MetricCounter("sftp_uploaded_bytes_total", "Bytes of completed uploads.")
+        self.bytes_per_second = MetricGauge("sftp_upload_bytes_per_second", "Upload throughput over the last 5 seconds.")
+        self.errors = MetricCounter("sftp_errors_total", "Failed tasks by error category.", label="category")
+        self.phase_latency = MetricHistogram("sftp_phase_latency_seconds", "Latency of connection and transfer phases.", label="phase")
+        self.metrics = [self.uploads_in_flight, self.active_sessions, self.uploads, self.bytes_uploaded,
+                        self.bytes_per_second, self.errors, self.phase_latency]
+        self._byte_samples = deque(maxlen=6)  # (time, bytes total) once per second
+        self.recent_latencies = deque(maxlen=10000)  # Upload latencies since the dashboard last drained them
+
+    def take_recent_latencies(self):
+        """Returns and clears the upload latencies recorded since the previous call."""
+        latencies = []
+        while True:
+            try:
+                latencies.append(self.recent_latencies.popleft())
+            except IndexError:
+                return latencies
+
+    def sample_rates(self):
+        """Updates the derived throughput gauge, called once per second by the HTTP server."""
+        self._byte_samples.append((time.monotonic(), self.bytes_uploaded.value()))
+        (first_time, first_bytes), (last_time, last_bytes) = self._byte_samples[0], self._byte_samples[-1]
+        if last_time > first_time:
+            self.bytes_per_second.set((last_bytes - first_bytes) / (last_time - first_time))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+LIVE_METRICS = LiveMetrics()
+
+
+class TimeSeriesBuffer:
+    """Fixed-size time series backed by arrays that halves its resolution when full.
+
+    Every stored point averages stride raw samples, so an hour-long run keeps at most capacity points
+    and redrawing a chart stays equally cheap during the whole run.
+    """
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity - capacity % 2
+        self.times = array("d", bytes(8 * self.capacity))
+        self.values = array("d", bytes(8 * self.capacity))
+        self.count = 0
+        self.stride = 1
+        self._pending_sum = 0.0
+        self._pending_count = 0
+
+    def append(self, timestamp, value):
+        self._pending_sum += value
+        self._pending_count += 1
+        if self._pending_count < self.stride:
+            return
+        if self.count == self.capacity:
+            self._decimate()
+        self.times[self.count] = timestamp
+        self.values[self.count] = self._pending_sum / self._pending_count
+        self.count += 1
+        self._pending_sum = 0.0
+        self._pending_count = 0
+
+    def _decimate(self):
+        """Merges neighbouring points pairwise and doubles the number of raw samples per point."""
+        for i in range(self.capacity // 2):
+            self.times[i] = self.times[2 * i + 1]
+            self.values[i] = (self.values[2 * i] + self.values[2 * i + 1]) / 2
+        self.count = self.capacity // 2
+        self.stride *= 2
+
+    def points(self):
+        return zip(self.times[:self.count], self.values[:self.count])
+
+    def max_value(self):
+        return max(self.values[:self.count], default=0.0)
+
+    def clear(self):
+        self.count = 0
+        self.stride = 1
+        self._pending_sum = 0.0
+        self._pending_count = 0
+
+
+class MetricsHTTPServer:
+    """Optional local HTTP endpoint serving LIVE_METRICS at /metrics for Prometheus scraping"""
+
+    def __init__(self, port, address="127.0.0.1", metrics=LIVE_METRICS):
+        self.metrics = metrics
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of stdout
+
+        self.server = ThreadingHTTPServer((address, port), Handler)
+        self.server.daemon_threads = True
+        self._stopped = threading.Event()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+
+    def _sample_loop(self):
+        while not self._stopped.wait(1.0):
+            self.metrics.sample_rates()
+
+    def stop(self):
+        self._stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
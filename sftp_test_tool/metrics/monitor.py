@@ -0,0 +1,71 @@
+"""Host network and memory monitoring during a run."""
+import time
+
+import psutil
+from PySide6.QtCore import QThread, Signal
+
+from .live import TimeSeriesBuffer
+
+
+class NetworkMonitor(QThread):
+    status_signal = Signal(str, int)
+
+    def __init__(self, interval=1):
+        super().__init__()
+        self.interval = interval
+        self._running = True
+        self.process = psutil.Process()  # This process (your PySide6 app)
+        self.memory_history = TimeSeriesBuffer()  # (seconds since start, RSS in MB), used to spot leaks in long runs
+
+    def run(self):
+        prev_io = psutil.net_io_counters()
+        started = time.monotonic()
+        while self._running:
+            time.sleep(self.interval)
+            current_io = psutil.net_io_counters()
+            
+            # Get current process memory usage (RSS = resident set size = RAM in use)
+            process_mem_bytes = self.process.memory_info().rss
+            process_cpu_usage = self.process.cpu_percent(interval=None)
+            process_mem_mb = process_mem_bytes / (1024 * 1024)
+            self.memory_history.append(time.monotonic() - started, process_mem_mb)
+            bytes_sent = current_io.bytes_sent - prev_io.bytes_sent
+            bytes_recv = current_io.bytes_recv - prev_io.bytes_recv
+
+            sent_per_sec = bytes_sent / self.interval / 1024
+            recv_per_sec = bytes_recv / self.interval / 1024
+
+            self.status_signal.emit(f"Upload: {sent_per_sec:.2f} KB/s | Download: {recv_per_sec:.2f} KB/s | App Usage: RAM: {process_mem_mb:.2f}MB | CPU: {process_cpu_usage:.2f}%", 5000)
+
+            prev_io = current_io
+
+    def stop(self):
+        self._running = False
+
+    def memory_summary(self, warmup=0.0):
+        """Returns start, end and peak RSS in MB and the growth per hour.
+
+        The growth is the least-squares slope over every sample taken after warmup seconds (over all samples when fewer
+        than three remain), so imports and session setup at the start and a single GC spike at either end do not decide it.
+        """
+        points = list(self.memory_history.points())
+        if not points:
+            return {"start_mb": 0.0, "end_mb": 0.0, "peak_mb": 0.0, "growth_mb_per_hour": 0.0, "warmup": warmup, "samples": []}
+        fitted = [(t, mb) for t, mb in points if t >= warmup]
+        if len(fitted) < 3:
+            fitted = points
+        return {"start_mb": points[0][1], "end_mb": points[-1][1], "peak_mb": self.memory_history.max_value(),
+                "growth_mb_per_hour": least_squares_slope(fitted) * 3600, "warmup": warmup,
+                "samples": [[round(t, 1), round(mb, 2)] for t, mb in points]}
+
+
+def least_squares_slope(points):
+    """Returns the slope of the least-squares line through (x, y) points, 0 for fewer than two distinct x values."""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance <= 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
@@ -0,0 +1,180 @@
+"""Sampling profiler of the tool's own threads."""
+import linecache
+import os
+import re
+import sys
+import threading
+import time
+
+import psutil
+
+
+class SamplingProfiler:
+    """Opt-in sampling profiler of the load generator's own threads.
+
+    Every interval the Python stacks of all threads are taken with sys._current_frames(). Every CPU_INTERVAL the CPU
+    time each thread used since the last check (psutil per-thread times) is spread over the stacks sampled for it, so
+    the CPU profile shows where client CPU went and not where threads were waiting on the network. A CPU weighted and a
+    wall clock profile are written in the folded stack format read by flamegraph.pl and speedscope.
+    """
+    CPU_INTERVAL = 0.1  # Seconds between per-thread CPU time checks
+    OWN_PACKAGE = f"/{__name__.split('.')[0]}/"  # Frames of this tool, frozen builds keep only relative file names
+    # Innermost frames of a thread blocked in a lock, condition or select, they get no CPU if the thread had other samples
+    BLOCKING = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+                ("selectors.py", "select"), ("threading.py", "acquire")}
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.wall_stacks = {}  # Folded stack -> samples
+        self.cpu_stacks = {}  # Folded stack -> CPU seconds
+        self.category_cpu = {}  # Activity -> CPU seconds
+        self.thread_cpu = {}  # Thread group -> CPU seconds
+        self.samples = 0
+        self.cpu_time = 0.0
+        self.wall_time = 0.0
+        self.process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._cpu_start = self.process.cpu_times()
+        self._wall_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        cpu_end = self.process.cpu_times()
+        self.cpu_time = (cpu_end.user - self._cpu_start.user) + (cpu_end.system - self._cpu_start.system)
+        self.wall_time = time.perf_counter() - self._wall_start
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        own_native_id = threading.get_native_id()
+        pending = {}  # Native thread id -> [(group, folded stack, activity, blocked)] since the last CPU check
+        last_cpu = self._thread_times()
+        next_cpu_check = time.perf_counter() + self.CPU_INTERVAL
+        while not self._stop.wait(self.interval):
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                thread = threads.get(ident)
+                group = re.sub(r"[-_]\d+", "", thread.name) if thread else "thread"
+                stack = self._fold(group, frame)
+                self.wall_stacks[stack] = self.wall_stacks.get(stack, 0) + 1
+                if thread and thread.native_id:
+                    blocked = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in self.BLOCKING
+                    pending.setdefault(thread.native_id, []).append((group, stack, self._activity(frame), blocked))
+            self.samples += 1
+
+            if time.perf_counter() >= next_cpu_check:
+                current_cpu = self._thread_times()
+                for native_id, used in ((native_id, cpu - last_cpu.get(native_id, 0.0)) for native_id, cpu in current_cpu.items()):
+                    if used <= 0:
+                        continue
+                    stacks = pending.get(native_id)
+                    if not stacks:  # The profiler itself or threads outside of Python's threading module, e.g. Qt internals
+                        group = "profiler" if native_id == own_native_id else "other threads"
+                        self.thread_cpu[group] = self.thread_cpu.get(group, 0.0) + used
+                        continue
+                    running = [sample for sample in stacks if not sample[3]] or stacks
+                    share = used / len(running)
+                    for group, stack, activity, _ in running:
+                        self.cpu_stacks[stack] = self.cpu_stacks.get(stack, 0.0) + share
+                        self.category_cpu[activity] = self.category_cpu.get(activity, 0.0) + share
+                    self.thread_cpu[stacks[0][0]] = self.thread_cpu.get(stacks[0][0], 0.0) + used
+                pending = {}
+                last_cpu = current_cpu
+                next_cpu_check += self.CPU_INTERVAL
+
+    def _thread_times(self):
+        try:
+            return {thread.id: thread.user_time + thread.system_time for thread in self.process.threads()}
+        except psutil.Error:
+            return {}
+
+    @staticmethod
+    def _short_path(filename):
+        parts = filename.replace("\\", "/").split("/")
+        if "site-packages" in parts:
+            return "/".join(parts[parts.index("site-packages") + 1:])
+        if "sftp_test_tool" in parts:
+            return "/".join(parts[parts.index("sftp_test_tool"):])
+        return parts[-1]
+
+    def _fold(self, group, frame):
+        frames = []
+        while frame is not None:
+            frames.append(f"{frame.f_code.co_name} ({self._short_path(frame.f_code.co_filename)})")
+            frame = frame.f_back
+        return ";".join([group] + frames[::-1])
+
+    def _activity(self, frame):
+        """Maps the innermost Python frame of a stack to the activity its CPU time is reported under.
+
+        Frames of locks, queues and the thread pool are skipped, so time around a wait counts for whoever waited.
+        """
+        path = frame.f_code.co_filename.replace("\\", "/")
+        base = path.rsplit("/", 1)[-1]
+        while base in ("threading.py", "queue.py", "selectors.py") or "/concurrent/" in path:
+            frame = frame.f_back
+            if frame is None:
+                return "Thread coordination"
+            path = frame.f_code.co_filename.replace("\\", "/")
+            base = path.rsplit("/", 1)[-1]
+        if "/cryptography/" in path or "/nacl/" in path or "/bcrypt/" in path:
+            return "SSH crypto"
+        if "/paramiko/" in path:
+            if base.startswith(("kex_", "ecdsakey", "rsakey", "ed25519key", "dsskey", "pkey", "auth_handler")):
+                return "SSH key exchange and auth"
+            if base == "packet.py":
+                return "SSH packet encryption and MAC"
+            if base.startswith("sftp"):
+                return "SFTP protocol"
+            return "SSH transport"
+        if base in ("socket.py", "selectors.py", "ssl.py"):
+            return "Socket I/O"
+        if "/psutil/" in path:
+            return "Monitoring"
+        if "/PySide6/" in path or "/shiboken6/" in path:
+            return "Qt"
+        line = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+        if ".exec(" in line:
+            return "Qt event loop"  # GUI painting and delivery of queued signals on the main thread
+        if self.OWN_PACKAGE in f"/{path}":
+            return "Qt signal delivery" if ".emit(" in line else "Load generator"
+        return "Other"
+
+    def write(self, base_path):
+        """Writes <base_path>_cpu.folded (CPU microseconds) and <base_path>_wall.folded (samples), returns both paths."""
+        cpu_path = f"{base_path}_cpu.folded"
+        wall_path = f"{base_path}_wall.folded"
+        with open(cpu_path, "w", encoding="utf-8") as f:
+            for stack, seconds in sorted(self.cpu_stacks.items()):
+                if seconds >= 1e-6:
+                    f.write(f"{stack} {int(seconds * 1e6)}\n")
+        with open(wall_path, "w", encoding="utf-8") as f:
+            for stack, samples in sorted(self.wall_stacks.items()):
+                f.write(f"{stack} {samples}\n")
+        return cpu_path, wall_path
+
+    def format_summary(self):
+        """Returns the log lines of the client CPU breakdown."""
+        cores = psutil.cpu_count() or 1
+        usage = self.cpu_time / self.wall_time if self.wall_time > 0 else 0.0
+        attributed = sum(self.category_cpu.values())
+        # Threads that end between two CPU checks, like short-lived transport threads, only show up in the total
+        lines = [f"Client CPU: {self.cpu_time:.2f}s in {self.wall_time:.2f}s ({usage * 100:.0f}% of one core, {cores} cores), "
+                 f"{attributed:.2f}s attributed to {self.samples} stack samples"]
+        if attributed:
+            lines.append("CPU by activity: " + ", ".join(f"{activity} {seconds / attributed * 100:.1f}%" for activity, seconds
+                                                         in sorted(self.category_cpu.items(), key=lambda item: -item[1])))
+        if self.thread_cpu:
+            lines.append("CPU by thread: " + ", ".join(f"{group} {seconds:.2f}s" for group, seconds
+                                                       in sorted(self.thread_cpu.items(), key=lambda item: -item[1])))
+        if usage >= 0.9 and cores > 1:
+            lines.append("The client used about a full core or more: Python threads share one interpreter lock, "
+                         "so the load generator itself may limit the throughput rather than the server.")
+        return lines
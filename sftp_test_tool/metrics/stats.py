@@ -0,0 +1,417 @@
+"""Latency statistics of individual operations, aggregated in bounded memory."""
+import csv
+import math
+import threading
+import time
+from array import array
+
+
+def percentile(sorted_values, pct):
+    """Returns the pct-th percentile (0-100) of an already sorted list using the nearest-rank method."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class LatencyHistogram:
+    """Mergeable latency histogram with logarithmic buckets, memory stays the same no matter how many values it holds.
+
+    Bucket bounds grow by GROWTH from MIN_VALUE up to about a day, a percentile is the geometric middle of its bucket and
+    off by at most half the growth (0.5 %). Count, sum, min and max are exact, percentiles never leave [min, max]. The
+    first EXACT_LIMIT values are also kept as they are, short runs report exact percentiles.
+    """
+    MIN_VALUE = 1e-6  # Seconds, smaller values share the first bucket
+    GROWTH = 1.01
+    BUCKETS = 2600  # Up to MIN_VALUE * GROWTH ** BUCKETS (about 1.8 days), larger values share the last bucket
+    EXACT_LIMIT = 4096
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.BUCKETS))
+        self.exact = array("d")  # None once more than EXACT_LIMIT values were added
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        index = int(math.log(value / self.MIN_VALUE) / self._LOG_GROWTH) + 1 if value > self.MIN_VALUE else 0
+        self.counts[min(index, self.BUCKETS - 1)] += 1
+        if self.exact is not None:
+            self.exact.append(value)
+            if len(self.exact) > self.EXACT_LIMIT:
+                self.exact = None
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Adds the values of another histogram, e.g. to combine the stats of several workers."""
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        if self.exact is not None and other.exact is not None and len(self.exact) + len(other.exact) <= self.EXACT_LIMIT:
+            self.exact.extend(other.exact)
+        else:
+            self.exact = None
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def copy(self):
+        histogram = LatencyHistogram()
+        histogram.counts = array("Q", self.counts)
+        histogram.exact = array("d", self.exact) if self.exact is not None else None
+        histogram.count, histogram.total, histogram.min, histogram.max = self.count, self.total, self.min, self.max
+        return histogram
+
+    def percentiles(self, *pcts):
+        """Returns the nearest-rank percentiles (0-100) in one pass over the buckets."""
+        if not self.count:
+            return [0.0] * len(pcts)
+        if self.exact is not None:
+            exact = sorted(self.exact)
+            return [percentile(exact, pct) for pct in pcts]
+        ranks = sorted((max(1, math.ceil(pct / 100 * self.count)), position) for position, pct in enumerate(pcts))
+        values = [0.0] * len(pcts)
+        cumulative = 0
+        pending = iter(ranks)
+        rank, position = next(pending)
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            cumulative += count
+            while cumulative >= rank:
+                middle = self.MIN_VALUE * self.GROWTH ** (index - 0.5) if index else self.MIN_VALUE
+                values[position] = min(self.max, max(self.min, middle))
+                rank, position = next(pending, (None, None))
+                if rank is None:
+                    return values
+        return values
+
+
+class ThroughputSeries:
+    """Operations, bytes and errors per time bucket, fixed-size and halving its resolution when full.
+
+    Buckets start one second wide, so a run of up to capacity seconds keeps per-second values and a week-long soak
+    still fits into the same arrays with coarser buckets.
+    """
+
+    def __init__(self, capacity=3600):
+        self.capacity = capacity - capacity % 2
+        self.counts = array("Q", bytes(8 * self.capacity))
+        self.bytes = array("d", bytes(8 * self.capacity))
+        self.errors = array("Q", bytes(8 * self.capacity))
+        self.width = 1.0
+        self.origin = None
+        self.used = 0
+
+    def add(self, when, count=0, nbytes=0, errors=0):
+        """Adds to the bucket of a time.perf_counter() value, the first value starts the series."""
+        if self.origin is None:
+            self.origin = when
+        index = max(0, int((when - self.origin) / self.width))
+        while index >= self.capacity:
+            self._halve()
+            index //= 2
+        self.counts[index] += count
+        self.bytes[index] += nbytes
+        self.errors[index] += errors
+        self.used = max(self.used, index + 1)
+
+    def _halve(self):
+        for i in range(self.capacity // 2):
+            self.counts[i] = self.counts[2 * i] + self.counts[2 * i + 1]
+            self.bytes[i] = self.bytes[2 * i] + self.bytes[2 * i + 1]
+            self.errors[i] = self.errors[2 * i] + self.errors[2 * i + 1]
+        for column in (self.counts, self.bytes, self.errors):
+            column[self.capacity // 2:] = type(column)(column.typecode, bytes(8 * (self.capacity // 2)))
+        self.width *= 2
+        self.used = (self.used + 1) // 2
+
+    def copy(self):
+        series = ThroughputSeries(self.capacity)
+        series.counts, series.bytes, series.errors = array("Q", self.counts), array("d", self.bytes), array("Q", self.errors)
+        series.width, series.origin, series.used = self.width, self.origin, self.used
+        return series
+
+    def merge(self, other):
+        """Adds the buckets of another series on the same clock, aligned on time: the result starts at the earlier origin
+        with the coarser of both resolutions, every bucket is added to the bucket of its midpoint."""
+        if other.origin is None:
+            return
+        merged = ThroughputSeries(self.capacity)
+        merged.origin = other.origin if self.origin is None else min(self.origin, other.origin)
+        merged.width = max(self.width, other.width)
+        for series in (self, other):
+            for index in range(series.used):
+                if series.counts[index] or series.bytes[index] or series.errors[index]:
+                    merged.add(series.origin + (index + 0.5) * series.width, series.counts[index], series.bytes[index],
+                               series.errors[index])
+        self.counts, self.bytes, self.errors = merged.counts, merged.bytes, merged.errors
+        self.width, self.origin, self.used = merged.width, merged.origin, merged.used
+
+    def to_dict(self):
+        return {"interval": self.width, "count": list(self.counts[:self.used]), "bytes": list(self.bytes[:self.used]),
+                "errors": list(self.errors[:self.used])}
+
+
+class RecordSpill:
+    """Writes every operation to a CSV file in chunks, so raw records can be analysed without keeping them in memory.
+
+    Records wait in array-backed columns until chunk_size of them are collected, then they are appended to the file in
+    one write. Shared by all OperationStats of a run, start and end are seconds since the spill was opened.
+    """
+    COLUMNS = ("operation", "start_s", "end_s", "latency_ms", "bytes", "ok")
+
+    def __init__(self, path, chunk_size=65536):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.origin = time.perf_counter()
+        self.names = []  # Operation names, the records store their index
+        self.records = 0
+        self._columns = self._new_columns()
+        self._lock = threading.Lock()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(self.COLUMNS)
+
+    @staticmethod
+    def _new_columns():
+        return array("H"), array("d"), array("d"), array("d"), array("b")
+
+    def append(self, name, start, end, nbytes, ok):
+        with self._lock:
+            if name not in self.names:
+                self.names.append(name)
+            operations, starts, ends, sizes, oks = self._columns
+            operations.append(self.names.index(name))
+            starts.append(start - self.origin)
+            ends.append(end - self.origin)
+            sizes.append(nbytes)
+            oks.append(ok)
+            self.records += 1
+            if len(operations) >= self.chunk_size:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        columns, self._columns = self._columns, self._new_columns()
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows((self.names[operation], f"{start:.6f}", f"{end:.6f}", f"{(end - start) * 1000:.3f}",
+                                     int(nbytes), ok) for operation, start, end, nbytes, ok in zip(*columns))
+
+    def close(self):
+        """Writes the records still in memory."""
+        with self._lock:
+            self._write_chunk()
+
+
+class OperationStats:
+    """Thread-safe latency and throughput collector for one kind of remote operation.
+
+    Latencies go into a LatencyHistogram and a ThroughputSeries instead of a list, so millions of operations cost
+    no more memory than a few. A RecordSpill additionally writes every operation to disk.
+    """
+
+    def __init__(self, name, spill=None):
+        self.name = name
+        self.histogram = LatencyHistogram()
+        self.series = ThroughputSeries()
+        self.spill = spill
+        self.bytes_transferred = 0
+        self.errors = 0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        return self.histogram.count
+
+    def record(self, start, end, nbytes=0):
+        """Records one successful operation, start and end are time.perf_counter() values."""
+        with self._lock:
+            self.histogram.add(end - start)
+            self.series.add(end, 1, nbytes)
+            self.bytes_transferred += nbytes
+            if self.first_start is None or start < self.first_start:
+                self.first_start = start
+            if self.last_end is None or end > self.last_end:
+                self.last_end = end
+        if self.spill:
+            self.spill.append(self.name, start, end, nbytes, 1)
+
+    def record_error(self):
+        """Counts one failed operation."""
+        now = time.perf_counter()
+        with self._lock:
+            self.errors += 1
+            self.series.add(now, errors=1)
+        if self.spill:
+            self.spill.append(self.name, now, now, 0, 0)
+
+    def merge(self, other):
+        """Adds the operations of another collector, its throughput series is merged aligned on time."""
+        with other._lock:
+            histogram = other.histogram.copy()
+            series = other.series.copy()
+            errors, nbytes, first_start, last_end = other.errors, other.bytes_transferred, other.first_start, other.last_end
+        with self._lock:
+            self.histogram.merge(histogram)
+            self.series.merge(series)
+            self.errors += errors
+            self.bytes_transferred += nbytes
+            if first_start is not None:
+                self.first_start = first_start if self.first_start is None else min(self.first_start, first_start)
+                self.last_end = last_end if self.last_end is None else max(self.last_end, last_end)
+
+    def summary(self):
+        """Returns count, rates and latency percentiles (in seconds) as a dictionary."""
+        with self._lock:
+            histogram = self.histogram.copy()
+            errors = self.errors
+            nbytes = self.bytes_transferred
+            elapsed = (self.last_end - self.first_start) if histogram.count else 0.0
+
+        count = histogram.count
+        p50, p95, p99 = histogram.percentiles(50, 95, 99)
+        return {
+            "operation": self.name,
+            "count": count,
+            "errors": errors,
+            "bytes": nbytes,
+            "elapsed": elapsed,
+            "ops_per_sec": count / elapsed if elapsed > 0 else 0.0,
+            "bytes_per_sec": nbytes / elapsed if elapsed > 0 else 0.0,
+            "latency_mean": histogram.total / count if count else 0.0,
+            "latency_p50": p50,
+            "latency_p95": p95,
+            "latency_p99": p99,
+            "latency_max": histogram.max or 0.0,
+        }
+
+    def per_second(self):
+        """Returns the completed operations, bytes and errors per interval (seconds) since the first operation."""
+        with self._lock:
+            return self.series.to_dict()
+
+    def format_summary(self):
+        """Returns the summary as a single human readable log line."""
+        s = self.summary()
+        throughput = f" | {s['bytes_per_sec'] / (1024 * 1024):.2f} MB/s" if s['bytes'] else ""
+        return (f"{s['operation']}: {s['count']} ok, {s['errors']} failed in {s['elapsed']:.2f}s | "
+                f"{s['ops_per_sec']:.1f} ops/s{throughput} | latency mean {s['latency_mean'] * 1000:.1f} ms, "
+                f"p50 {s['latency_p50'] * 1000:.1f} ms, p95 {s['latency_p95'] * 1000:.1f} ms, "
+                f"p99 {s['latency_p99'] * 1000:.1f} ms, max {s['latency_max'] * 1000:.1f} ms")
+
+
+class ScheduleStats:
+    """Latency of scheduled operations measured from their intended start, and the lag of the load generator.
+
+    A closed loop only starts the next operation when a session is free, so while the server stalls the operations
+    that should have started meanwhile are delayed, and that wait never shows up in their latency (coordinated
+    omission). Measuring from the intended start time includes it, the latency from the actual start is kept next to
+    it. The lag between both is split into queueing for a busy session, caused by slow responses, and timer lag of
+    threads that were free but woke up late, caused by the load generator itself (GIL contention, an overloaded
+    machine). Only the latter makes the results untrustworthy.
+    """
+    LATE_AFTER = 0.1  # Seconds behind schedule after which an operation counts as started late
+    TRUSTED_TIMER_LAG = 0.02  # p99 timer lag in seconds up to which the schedule was kept
+
+    def __init__(self, name):
+        self.corrected = OperationStats(f"{name} from intended start")
+        self.uncorrected = OperationStats(f"{name} from actual start")
+        self.queueing = OperationStats("Queueing for a busy session")
+        self.timer_lag = OperationStats("Load generator timer lag")
+        self.late_starts = 0
+        self._lock = threading.Lock()
+
+    def wait_until(self, due, stop_event):
+        """Waits until the intended start (a time.perf_counter() value) and records the lag.
+
+        Returns the actual start, or None when stop_event was set while waiting.
+        """
+        now = time.perf_counter()
+        if now >= due:
+            self.queueing.record(due, now)
+            self._count_late(now - due)
+            return now
+        if stop_event.wait(due - now):
+            return None
+        start = time.perf_counter()
+        self.timer_lag.record(due, start)
+        self._count_late(start - due)
+        return start
+
+    def _count_late(self, lag):
+        if lag > self.LATE_AFTER:
+            with self._lock:
+                self.late_starts += 1
+
+    def record(self, due, start, end, nbytes=0):
+        """Records one successful operation with its intended start, actual start and end."""
+        self.corrected.record(due, end, nbytes)
+        self.uncorrected.record(start, end, nbytes)
+
+    def record_error(self):
+        self.corrected.record_error()
+        self.uncorrected.record_error()
+
+    def summary(self):
+        queueing = self.queueing.summary()
+        timer_lag = self.timer_lag.summary()
+        return {
+            "corrected": self.corrected.summary(),
+            "uncorrected": self.uncorrected.summary(),
+            "queueing": queueing,
+            "timer_lag": timer_lag,
+            "late_starts": self.late_starts,
+            "max_lag": max(queueing["latency_max"], timer_lag["latency_max"]),
+            "trusted": timer_lag["latency_p99"] <= self.TRUSTED_TIMER_LAG,
+        }
+
+    def slo_metrics(self):
+        """Success criteria metrics of the schedule, see Threshold.METRICS."""
+        corrected = self.corrected.summary()
+        return {
+            "corrected_latency_p50": corrected["latency_p50"],
+            "corrected_latency_p99": corrected["latency_p99"],
+            "corrected_latency_max": corrected["latency_max"],
+            "generator_lag_p99": self.timer_lag.summary()["latency_p99"],
+        }
+
+    @staticmethod
+    def report_columns(summary, rate=None):
+        """CSV report columns of a schedule summary."""
+        return {
+            "rate": f"{rate:g}" if rate else "",
+            "corrected_p50_ms": f"{summary['corrected']['latency_p50'] * 1000:.1f}",
+            "corrected_p99_ms": f"{summary['corrected']['latency_p99'] * 1000:.1f}",
+            "late_starts": summary["late_starts"],
+            "max_lag_ms": f"{summary['max_lag'] * 1000:.1f}",
+            "timer_lag_p99_ms": f"{summary['timer_lag']['latency_p99'] * 1000:.1f}",
+        }
+
+    def format_summary(self):
+        """Returns log lines comparing corrected and uncorrected percentiles and judging the schedule."""
+        s = self.summary()
+
+        def percentiles(summary):
+            return (f"p50 {summary['latency_p50'] * 1000:.1f} ms, p99 {summary['latency_p99'] * 1000:.1f} ms, "
+                    f"max {summary['latency_max'] * 1000:.1f} ms")
+
+        started = s["queueing"]["count"] + s["timer_lag"]["count"]
+        lines = [f"{s['corrected']['operation']} (corrected for coordinated omission): {percentiles(s['corrected'])}",
+                 f"{s['uncorrected']['operation']} (uncorrected): {percentiles(s['uncorrected'])}",
+                 f"Schedule: {s['late_starts']} of {started} operations started more than {self.LATE_AFTER * 1000:.0f} ms late, "
+                 f"max lag {s['max_lag'] * 1000:.1f} ms. {s['queueing']['count']} waited for a busy session "
+                 f"({percentiles(s['queueing'])}), timer lag of the load generator {percentiles(s['timer_lag'])}"]
+        if not s["trusted"]:
+            lines.append(f"WARNING: the load generator woke up more than {self.TRUSTED_TIMER_LAG * 1000:.0f} ms late "
+                         f"(p99), it could not keep the schedule and its latencies include its own delays.")
+        return lines
@@ -0,0 +1,84 @@
+"""Per-task phase timeline of a run, exported in the Chrome trace event format."""
+import json
+import threading
+import time
+
+
+class TimelineRecorder:
+    """Records when every task of a run was in which phase (connect, auth, upload, close, ...).
+
+    Every thread appends to its own list, so recording takes no lock and costs one tuple per phase. The lists are
+    only merged when the timeline is written, as Chrome trace event JSON that Perfetto (ui.perfetto.dev) and
+    chrome://tracing show as one row per task, i.e. per connection.
+    """
+
+    def __init__(self, name="run"):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+        self._buffers = []  # The event lists of all threads
+        self._lock = threading.Lock()  # Only taken when a thread records its first event
+        self._local = threading.local()
+        self._tracks = {}  # Task -> row name
+
+    def begin(self):
+        """Clears the timeline and starts its clock, perf_counter timestamps are relative to this point."""
+        with self._lock:
+            self._buffers = []
+            self._tracks = {}
+        self._local = threading.local()
+        self.origin = time.perf_counter()
+        self.wall_origin = time.time()
+
+    def _buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = []
+            with self._lock:
+                self._buffers.append(buffer)
+            return buffer
+
+    def name_track(self, task, name):
+        """Names the row of a task, tasks without a name are shown as "Task <n>"."""
+        self._tracks[task] = name
+
+    def record(self, phase, start, end, task, args=None):
+        """Records a phase of a task between two perf_counter timestamps, args are shown when the phase is selected."""
+        self._buffer().append((phase, start, end, task, args))
+
+    def mark(self, name, when, task, args=None):
+        """Records an instant event such as an error."""
+        self._buffer().append((name, when, None, task, args))
+
+    def events(self):
+        """Returns the Chrome trace events sorted by time, timestamps and durations in microseconds."""
+        with self._lock:
+            records = [record for buffer in self._buffers for record in list(buffer)]
+        tasks = sorted({record[3] for record in records}, key=lambda task: (isinstance(task, str), task))
+        rows = {task: row for row, task in enumerate(tasks, start=1)}
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": self.name}}]
+        for task, row in rows.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": row,
+                           "args": {"name": self._tracks.get(task, f"Task {task}")}})
+            events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": row, "args": {"sort_index": row}})
+        for phase, start, end, task, args in sorted(records, key=lambda record: record[1]):
+            event = {"name": phase, "cat": "error" if end is None else "phase", "pid": 1, "tid": rows[task],
+                     "ts": round((start - self.origin) * 1e6, 1)}
+            if end is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round((end - start) * 1e6, 1))
+            if args:
+                event["args"] = args
+            events.append(event)
+        return events
+
+    def write(self, path):
+        """Writes the timeline as Chrome trace JSON, returns the number of recorded events."""
+        events = self.events()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"run": self.name, "started": time.strftime("%Y-%m-%d %H:%M:%S",
+                                                                                time.localtime(self.wall_origin))}}, f)
+        return sum(1 for event in events if event["ph"] != "M")
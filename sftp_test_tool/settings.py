@@ -0,0 +1,22 @@
+"""Connection defaults and paths shared by the GUI, the command line and the test engine."""
+import os
+
+from dotenv import load_dotenv
+
+
+# Initialize current working directory
+CURRENT_WORKING_DIR = os.getcwd()
+
+# Dotenv configuration
+load_dotenv(dotenv_path=os.path.join(CURRENT_WORKING_DIR, "_internal", "env", ".env"))
+
+# SFTP Configuration
+SFTP_HOST = os.getenv("GEIS_HOST")
+SFTP_PORT = 22
+SFTP_DIRECTORY = 'to_Geis'
+SFTP_USER = os.getenv("GEIS_USER")
+SFTP_PASS = os.getenv("GEIS_PASSWORD")
+TEST_FILE = r'dummy_files\dummy_1.txt'
+
+# Combined run and sweep reports are written here
+RESULTS_DIR = os.path.join(CURRENT_WORKING_DIR, "results")
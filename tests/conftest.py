@@ -0,0 +1,11 @@
+import pytest
+
+from sftp_test_tool.engine.sink import SinkServer
+
+
+@pytest.fixture
+def sink():
+    """An in-process SFTP/SCP sink accepting user/secret on a free port."""
+    server = SinkServer(port=0, username="user", password="secret").start()
+    yield server
+    server.stop()
@@ -0,0 +1,136 @@
+"""Success criteria: parsing and evaluating thresholds, validating plans and the exit codes of the run command."""
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from sftp_test_tool.engine import plan as test_plan  # Not imported by name, pytest would collect the TestPlan class
+from sftp_test_tool.engine.modes import create_worker, validate_points
+from sftp_test_tool.engine.plan import Threshold, parse_criteria_text, parse_thresholds
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "SFTPTestTool.py")
+
+
+@pytest.mark.parametrize("metric, expression, limit", [
+    ("upload_latency_p99", "< 2s", 2.0),
+    ("upload_latency_p99", "<= 250ms", 0.25),
+    ("error_rate", "< 0.1%", 0.001),
+    ("throughput_mb_s", "> 200 MB/s", 200.0),
+    ("uploads_per_sec", ">= 50 ops/s", 50.0),
+    ("refusal_rate", "<0.5", 0.5),
+])
+def test_threshold_units(metric, expression, limit):
+    threshold = Threshold(metric, expression)
+
+    assert threshold.limit == pytest.approx(limit)
+
+
+@pytest.mark.parametrize("metric, expression", [
+    ("upload_latency_p98", "< 2s"),  # Unknown metric
+    ("error_rate", "0.1%"),  # No operator
+    ("error_rate", "< 0.1 percent"),
+    ("throughput_mb_s", "> fast"),
+])
+def test_invalid_threshold_raises(metric, expression):
+    with pytest.raises(ValueError):
+        Threshold(metric, expression)
+
+
+def test_threshold_passes_and_breaches():
+    threshold = Threshold("error_rate", "< 1%")
+
+    assert threshold.passes({"error_rate": 0.005})
+    assert not threshold.passes({"error_rate": 0.01})
+    assert not threshold.clearly_breached({"error_rate": 0.014}, 0.5)
+    assert threshold.clearly_breached({"error_rate": 0.016}, 0.5)
+    assert threshold.describe({"error_rate": 0.02}) == "FAIL: error_rate < 1% (measured 2.000%)"
+
+
+def test_unmeasured_metric_fails():
+    threshold = Threshold("handshakes_per_sec", "> 10")
+
+    assert not threshold.passes({"error_rate": 0.0})
+    assert not threshold.clearly_breached({"error_rate": 0.0}, 0.5)  # Nothing to abort on
+    assert threshold.describe({}).endswith("(not measured in this test mode)")
+
+
+def test_parse_criteria_text():
+    thresholds = parse_criteria_text("upload_latency_p99 < 2s; error_rate < 0.1% ;")
+
+    assert thresholds == {"upload_latency_p99": "< 2s", "error_rate": "< 0.1%"}
+    assert [threshold.limit for threshold in parse_thresholds({"thresholds": thresholds})] == [2.0, 0.001]
+    with pytest.raises(ValueError):
+        parse_criteria_text("error_rate < 1%; latency < 2s")
+
+
+def test_validate_points_names_the_broken_point():
+    plan = test_plan.TestPlan({
+        "target": {"host": "127.0.0.1", "directory": "/in", "username": "user"},
+        "success_criteria": {"thresholds": {"error_rate": "< 1%"}},
+        "scenarios": [{"name": "fine"}, {"name": "broken", "success_criteria": {"thresholds": {"error_rate": "< lots"}}}],
+    })
+    points = plan.expand()
+
+    validate_points(points[:1])
+    with pytest.raises(ValueError, match="broken"):
+        validate_points(points)
+    with pytest.raises(ValueError, match="Unknown test mode"):
+        validate_points([("point", dict(points[0][1], mode="download"))])
+
+
+def unused_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def dead_server_plan(mode, port):
+    return {
+        "name": "dead server",
+        "mode": mode,
+        "target": {"host": "127.0.0.1", "port": port, "directory": "/in", "username": "user", "password": "secret"},
+        "load": {"connections": 2},
+        "payload": {"file_size": "1KB"},
+        "smallfile": {"files_per_connection": 5},
+        "timeouts": {"connect": 5, "operation": 5},
+        "success_criteria": {"thresholds": {"error_rate": "< 0.1%"}},
+    }
+
+
+@pytest.mark.parametrize("mode", ["upload", "smallfile"])
+def test_run_where_every_connect_fails_breaks_error_rate(mode):
+    _, point = test_plan.TestPlan(dead_server_plan(mode, unused_port())).expand()[0]
+    worker = create_worker(point)
+
+    worker.run()  # Synchronously in the test thread, like the calibration does
+
+    assert worker.verdict is False
+    assert worker.slo_metrics()["error_rate"] == 1.0
+
+
+def run_command(tmp_path, plan):
+    path = tmp_path / "plan.json"
+    path.write_text(json.dumps(plan), encoding="utf-8")
+    return subprocess.run([sys.executable, SCRIPT, "run", "--plan", str(path)], cwd=tmp_path, capture_output=True,
+                          text=True, timeout=120)
+
+
+def test_run_exit_code_of_failed_criteria(tmp_path):
+    completed = run_command(tmp_path, dead_server_plan("smallfile", unused_port()))
+
+    assert completed.returncode == 1, completed.stderr
+    assert "FAIL: error_rate" in completed.stdout
+
+
+def test_run_exit_code_of_invalid_plan(tmp_path):
+    plan = dead_server_plan("upload", unused_port())
+    plan["success_criteria"]["thresholds"] = {"error_rate": "< 0.1", "upload_latency_p98": "< 2s"}
+
+    completed = run_command(tmp_path, plan)
+
+    assert completed.returncode == 2
+    assert "upload_latency_p98" in completed.stderr
+    assert not (tmp_path / "results").exists()  # Rejected before anything ran
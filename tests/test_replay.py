@@ -0,0 +1,36 @@
+"""Replaying traces against the sink: sessions share a pool sized to the trace's peak concurrency."""
+from sftp_test_tool.engine.replay import ReplayWorker
+from sftp_test_tool.engine.workload import TraceEvent, WorkloadTrace
+
+
+def replay_worker(sink, events, **kwargs):
+    sink.directories.add("/replay")
+    return ReplayWorker(WorkloadTrace(events, seed=1), "127.0.0.1", sink.port, "/replay", "user", "secret",
+                        success_criteria={"thresholds": {"error_rate": "< 1%"}}, **kwargs)
+
+
+def test_sequential_sessions_share_one_connection(sink):
+    events = [TraceEvent(number * 0.2, f"session{number}", "upload", f"file{number}.bin", 1024) for number in range(10)]
+    worker = replay_worker(sink, events)
+
+    assert worker.connections == 1  # No two sessions overlap
+    worker.run()
+
+    result = worker.result()
+    assert result["operations_done"] == 10
+    assert result["upload"]["errors"] == 0
+    assert result["verdict"] is True
+    assert sink.files_written == 10
+    assert result["schedule"]["corrected"]["count"] == 10
+
+
+def test_pool_covers_peak_concurrency_and_headroom():
+    events = [TraceEvent(0.0, "a", "connect", "", 0), TraceEvent(0.1, "b", "connect", "", 0),
+              TraceEvent(0.2, "c", "upload", "c.bin", 10), TraceEvent(0.3, "a", "disconnect", "", 0),
+              TraceEvent(0.4, "b", "disconnect", "", 0), TraceEvent(0.5, "d", "upload", "d.bin", 10)]
+    trace = WorkloadTrace(events)
+
+    assert trace.peak_concurrency() == 3  # c runs while a and b are open, d after both left
+    assert ReplayWorker(trace, "127.0.0.1", 22, "/", "user", "").connections == 3
+    assert ReplayWorker(trace, "127.0.0.1", 22, "/", "user", "", max_sessions=2).connections == 3
+    assert ReplayWorker(trace, "127.0.0.1", 22, "/", "user", "", max_sessions=50).connections == 4  # One per session
@@ -0,0 +1,112 @@
+"""Upload runs of every protocol against in-process servers: the sink for SFTP and SCP, pyftpdlib for FTPS."""
+import datetime
+import threading
+
+import pytest
+
+from sftp_test_tool.engine import plan as test_plan  # Not imported by name, pytest would collect the TestPlan class
+from sftp_test_tool.engine.modes import create_worker
+
+CONNECTIONS = 3
+FILE_SIZE = 64 * 1024
+
+
+def upload_point(protocol, port, directory):
+    plan = test_plan.TestPlan({
+        "target": {"host": "127.0.0.1", "port": port, "directory": directory, "username": "user", "password": "secret",
+                   "protocol": protocol},
+        "load": {"connections": CONNECTIONS},
+        "payload": {"file_size": FILE_SIZE},
+        "timeouts": {"connect": 10, "operation": 30},
+        "success_criteria": {"thresholds": {"error_rate": "< 1%"}},
+    })
+    _, point = plan.expand()[0]
+    return point
+
+
+def run_upload(point):
+    worker = create_worker(point)
+    worker.run()  # Synchronously in the test thread, like the calibration does
+    return worker.result()
+
+
+@pytest.mark.parametrize("protocol", ["sftp", "scp"])
+def test_upload_to_sink(sink, protocol):
+    result = run_upload(upload_point(protocol, sink.port, f"/{protocol}"))
+
+    assert result["protocol"] == protocol
+    assert result["tasks_total"] == CONNECTIONS
+    assert result["tasks_succeeded"] == CONNECTIONS
+    assert result["upload"]["count"] == CONNECTIONS
+    assert result["upload"]["errors"] == 0
+    assert result["verdict"] is True
+    assert sink.files_written == CONNECTIONS
+    assert sink.bytes_written == CONNECTIONS * FILE_SIZE
+    uploaded = [path for path in sink.files if path.startswith(f"/{protocol}/")]
+    assert len(uploaded) == CONNECTIONS
+    assert all(sink.files[path].size == FILE_SIZE for path in uploaded)
+
+
+@pytest.fixture
+def ftps_server(tmp_path):
+    """A local explicit-TLS FTP server, skips the test when pyftpdlib or a TLS backend for it is missing."""
+    pytest.importorskip("OpenSSL")
+    handlers = pytest.importorskip("pyftpdlib.handlers")
+    authorizers = pytest.importorskip("pyftpdlib.authorizers")
+    servers = pytest.importorskip("pyftpdlib.servers")
+    if not hasattr(handlers, "TLS_FTPHandler"):
+        pytest.skip("pyftpdlib was installed without TLS support")
+
+    key_path, certificate_path = self_signed_certificate(tmp_path)
+    root = tmp_path / "ftproot"
+    (root / "ftps").mkdir(parents=True)
+    authorizer = authorizers.DummyAuthorizer()
+    authorizer.add_user("user", "secret", str(root), perm="elradfmw")
+
+    class Handler(handlers.TLS_FTPHandler):
+        pass
+
+    Handler.authorizer = authorizer
+    Handler.keyfile = str(key_path)
+    Handler.certfile = str(certificate_path)
+    Handler.tls_control_required = True
+    server = servers.FTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"timeout": 0.1}, daemon=True)
+    thread.start()
+    yield server.address[1], root
+    server.close_all()
+    thread.join(5)
+
+
+def self_signed_certificate(directory):
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+    hashes = pytest.importorskip("cryptography.hazmat.primitives.hashes")
+    ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+    x509 = pytest.importorskip("cryptography.x509")
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(x509.oid.NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+                   .serial_number(x509.random_serial_number()).not_valid_before(now - datetime.timedelta(minutes=5))
+                   .not_valid_after(now + datetime.timedelta(days=1)).sign(key, hashes.SHA256()))
+    key_path = directory / "ftps.key"
+    certificate_path = directory / "ftps.crt"
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+    certificate_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    return key_path, certificate_path
+
+
+def test_upload_over_ftps(ftps_server):
+    port, root = ftps_server
+    result = run_upload(upload_point("ftps", port, "/ftps"))
+
+    assert result["protocol"] == "ftps"
+    assert result["tasks_succeeded"] == CONNECTIONS
+    assert result["upload"]["count"] == CONNECTIONS
+    assert result["upload"]["errors"] == 0
+    assert result["verdict"] is True
+    uploaded = list((root / "ftps").iterdir())
+    assert len(uploaded) == CONNECTIONS
+    assert all(path.stat().st_size == FILE_SIZE for path in uploaded)
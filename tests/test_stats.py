@@ -0,0 +1,87 @@
+"""Merging collected statistics, as the cleanup phase does with the delete stats of every session, and the schedule lag of
+open workloads."""
+import threading
+import time
+
+import pytest
+
+from sftp_test_tool.metrics.stats import OperationStats, ScheduleStats, ThroughputSeries
+
+
+def test_merge_aligns_series_on_time():
+    stats = OperationStats("Upload")
+    for second in range(5):
+        stats.record(100 + second, 100.2 + second, 10)
+    other = OperationStats("Upload")
+    for second in range(3):
+        other.record(98 + second, 98.1 + second, 5)
+
+    stats.merge(other)
+
+    series = stats.per_second()
+    assert series["interval"] == 1.0
+    assert series["count"] == [1, 1, 2, 1, 1, 1, 1]  # Starts at the earlier origin, 98.1
+    assert series["bytes"] == [5.0, 5.0, 15.0, 10.0, 10.0, 10.0, 10.0]
+    assert stats.summary()["count"] == 8
+
+
+def test_merge_uses_the_coarser_resolution():
+    series = ThroughputSeries(capacity=8)
+    for second in range(20):
+        series.add(second, 1)
+    other = ThroughputSeries(capacity=8)
+    other.add(0.5, 1)  # Starts the series, its buckets span 0.5-1.5 and 3.5-4.5
+    other.add(3.5, 2)
+
+    series.merge(other)
+
+    assert series.width == 4.0
+    assert series.to_dict()["count"] == [5, 6, 4, 4, 4]  # Added at their midpoints, 1.0 and 4.0
+
+
+def test_merge_into_empty_series_copies_it():
+    other = ThroughputSeries()
+    other.add(10.0, 1, errors=1)
+    other.add(12.5, 2, 100)
+
+    series = ThroughputSeries()
+    series.merge(other)
+
+    assert series.to_dict() == {"interval": 1.0, "count": [1, 0, 2], "bytes": [0.0, 0.0, 100.0], "errors": [1, 0, 0]}
+
+
+def test_schedule_counts_a_busy_session_as_queueing():
+    schedule = ScheduleStats("Upload")
+    due = time.perf_counter() - 0.5  # The session was still busy with the previous upload
+
+    start = schedule.wait_until(due, threading.Event())
+    schedule.record(due, start, start + 0.1)
+
+    summary = schedule.summary()
+    assert summary["queueing"]["count"] == 1
+    assert summary["timer_lag"]["count"] == 0
+    assert summary["late_starts"] == 1
+    assert summary["max_lag"] >= 0.5
+    assert summary["trusted"]  # Queueing is the server's fault, not the generator's
+    assert schedule.slo_metrics()["corrected_latency_max"] == pytest.approx(start + 0.1 - due)
+    assert summary["uncorrected"]["latency_max"] == pytest.approx(0.1)
+
+
+def test_schedule_waits_for_the_intended_start():
+    schedule = ScheduleStats("Upload")
+    due = time.perf_counter() + 0.05
+
+    start = schedule.wait_until(due, threading.Event())
+
+    assert start >= due
+    summary = schedule.summary()
+    assert summary["queueing"]["count"] == 0
+    assert summary["timer_lag"]["count"] == 1
+    assert summary["late_starts"] == 0
+
+
+def test_schedule_wait_returns_none_when_stopped():
+    stop_event = threading.Event()
+    stop_event.set()
+
+    assert ScheduleStats("Upload").wait_until(time.perf_counter() + 10, stop_event) is None
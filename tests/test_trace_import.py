@@ -0,0 +1,75 @@
+"""Importing production traffic as replay traces: OpenSSH sftp-server logs and CSV exports."""
+import pytest
+
+from sftp_test_tool.engine.trace_import import flatten_path, load_trace
+from sftp_test_tool.engine.workload import TraceEvent
+
+SFTP_SERVER_LOG = """\
+Oct 19 08:00:00 host sshd[100]: Accepted password for alice from 10.0.0.1 port 5000 ssh2
+Oct 19 08:00:01 host internal-sftp[4711]: session opened for local user alice from [10.0.0.1]
+Oct 19 08:00:02 host internal-sftp[4711]: open "/home/alice/in/a.csv" flags WRITE,CREATE,TRUNCATE mode 0666
+Oct 19 08:00:03 host internal-sftp[4711]: close "/home/alice/in/a.csv" bytes read 0 written 1024
+Oct 19 08:00:04 host internal-sftp[4711]: opendir "/home/alice/in"
+Oct 19 08:00:04 host internal-sftp[4711]: closedir "/home/alice/in"
+Oct 19 08:00:05 host internal-sftp[4711]: rename old "/home/alice/in/a.csv" new "/home/alice/in/b.csv"
+Oct 19 08:00:06 host internal-sftp[4722]: session opened for local user bob from [10.0.0.2]
+Oct 19 08:00:07 host internal-sftp[4722]: open "/out/r.txt" flags READ mode 0666
+Oct 19 08:00:08 host internal-sftp[4722]: close "/out/r.txt" bytes read 2048 written 0
+Oct 19 08:00:09 host internal-sftp[4711]: session closed for local user alice from [10.0.0.1]
+Oct 19 08:00:10 host internal-sftp[4722]: remove name "/out/r.txt"
+Oct 19 08:00:11 host internal-sftp[4722]: session closed for local user bob from [10.0.0.2]
+"""
+
+
+def test_import_sftp_server_log(tmp_path):
+    path = tmp_path / "sftp.log"
+    path.write_text(SFTP_SERVER_LOG, encoding="utf-8")
+
+    trace = load_trace(str(path), year=2026)
+
+    assert trace.events == [
+        TraceEvent(0.0, "alice/4711", "connect", "", 0, "alice"),
+        TraceEvent(1.0, "alice/4711", "upload", "home__alice__in__a.csv", 1024, "alice"),
+        TraceEvent(3.0, "alice/4711", "list", "home__alice__in", 0, "alice"),
+        TraceEvent(5.0, "bob/4722", "connect", "", 0, "bob"),
+        TraceEvent(6.0, "bob/4722", "download", "out__r.txt", 2048, "bob"),
+        TraceEvent(8.0, "alice/4711", "disconnect", "", 0, "alice"),
+        TraceEvent(9.0, "bob/4722", "delete", "out__r.txt", 0, "bob"),
+        TraceEvent(10.0, "bob/4722", "disconnect", "", 0, "bob"),
+    ]
+    assert trace.source == "imported from sftp.log, skipped rename 1"
+    assert trace.peak_concurrency() == 2
+    assert trace.operation_counts() == {"upload": 1, "list": 1, "download": 1, "delete": 1}
+
+
+def test_import_csv(tmp_path):
+    path = tmp_path / "ops.csv"
+    path.write_text("time,user,op,path,size,session\n"
+                    "1760860800,alice,put,/in/a.bin,100,s1\n"
+                    "1760860800.5,alice,ls,/in,,s1\n"
+                    "1760860802,bob,get,/in/a.bin,100,\n", encoding="utf-8")
+
+    trace = load_trace(str(path))
+
+    assert [(event.offset, event.session, event.op, event.path, event.size, event.user) for event in trace.events] == [
+        (0.0, "s1", "upload", "in__a.bin", 100, "alice"),
+        (0.5, "s1", "list", "in", 0, "alice"),
+        (2.0, "bob", "download", "in__a.bin", 100, "bob"),  # Without a session the user is the session
+    ]
+
+
+@pytest.mark.parametrize("content, message", [
+    ("time,user,path\n1,alice,/a\n", "misses the CSV columns op"),
+    ("time,user,op,path\n1,alice,chmod,/a\n", "line 2: unknown operation 'chmod'"),
+    ("time,user,op,path\n", "contains no operations"),
+])
+def test_invalid_csv_raises(tmp_path, content, message):
+    path = tmp_path / "ops.csv"
+    path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(ValueError, match=message):
+        load_trace(str(path))
+
+
+def test_flatten_path():
+    assert flatten_path("/home/alice/in/a.csv") == "home__alice__in__a.csv"